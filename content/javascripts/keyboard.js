@@ -31,21 +31,9 @@
                         continue;
                     }
                         
-                    var context = keyboard.options.keydata[contextName];
-                    var contextSafeName = keyboard._getSafeID(contextName);
-                    var keyItems = context[keyName];
-
+                    var keyItems = keyboard.options.keydata[contextName][keyName];
                     if (keyItems) {
-                        html += "<div class='keyitems' data-context='" + contextSafeName + "'>";
-
-                        for (var i=0; i<keyItems.length; i++) {
-                            var keyItem = keyItems[i];
-                            var mods = (keyItem.mods.length > 0) ? keyItem.mods.join('_') : "NOMOD";
-                            html += "<div class='shortcut' data-mods='" + mods + "'>" + keyItem.name + "</div>";
-                        }
-
-                        html += "</div>";
-
+                        html += keyboard._getKeyItemsHtml(contextName, keyItems);
                         hasShortcut = true;
                     }
                 }
@@ -83,6 +71,36 @@
             this._update();
         },
 
+        _getKeyItemsHtml: function(contextName, keyItems) {
+            var html = "<div class='keyitems' data-context='" + this._getSafeID(contextName) + "'>";
+
+            for (var i=0; i<keyItems.length; i++) {
+                var keyItem = keyItems[i];
+                var mods = (keyItem.mods.length > 0) ? keyItem.mods.join('_') : "NOMOD";
+                html += "<div class='shortcut' data-mods='" + mods + "'>" + keyItem.name + "</div>";
+            }
+
+            html += "</div>";
+            return html;
+        },
+
+        addContext: function(contextName, context) {
+            // Inserts the shortcuts of a context that was loaded after the keyboard was created
+            var keyboard = this;
+            this.options.keydata[contextName] = context;
+            this.element.find("button").each(function() {
+                var keyItems = context[$(this).data("key")];
+                if (keyItems) {
+                    $(this).append(keyboard._getKeyItemsHtml(contextName, keyItems));
+                    $(this).removeClass("unmapped");
+                }
+            });
+
+            if (this.options.context === contextName) {
+                this.switchContext(contextName);
+            }
+        },
+
         _keyDown: function(e) {
             var keyName = window.utils.keyCodeMap[e.which];
 
@@ -3,6 +3,11 @@ function ShortcutMapper() {
     
     this.selectedApp = null;
     this.selectedAppData = null;
+    this.selectedAppDataSource = null;
+    this.selectedAppSearchIndex = null;
+    this.fetchedSearchIndex = null;
+    this.pendingShardContexts = {};
+    this.keyboardAppData = null;
     this.selectedVersion = null;
     this.selectedContext = null;
     this.selectedOS = null;
@@ -18,6 +23,10 @@ function ShortcutMapper() {
         shortcut: null
     };
 
+    // Same tokens as tokenize() in shmaplib/search.py: lowercase, without accents, split on anything but letters and digits
+    this.searchTokenRegex = new RegExp("[\\p{L}\\p{N}_]+", "gu");
+    this.searchAccentRegex = new RegExp("\\p{Mn}", "gu");
+
     this.init = function () {
         var self = this,
             hash = window.location.hash;
@@ -180,7 +189,15 @@ function ShortcutMapper() {
 
     this._updateContextOptions = function(selected) {
         // the datasheet contains all contexts and shortcuts for the application
-        this.selectedContext = this._setSelectOptions(this.elemContextSelect, selected, Object.keys(this.selectedAppData.contexts));
+        this.selectedContext = this._setSelectOptions(this.elemContextSelect, selected, this._getContextNames());
+    };
+
+    this._getContextNames = function() {
+        // A sharded app lists all its contexts in the shards, also the ones that aren't loaded yet
+        if (this.selectedAppData.shards) {
+            return this.selectedAppData.shards.map(function(shard) { return shard.context; });
+        }
+        return Object.keys(this.selectedAppData.contexts);
     };
 
     this._updateKeyboardTypeOptions = function(selected) {
@@ -223,19 +240,147 @@ function ShortcutMapper() {
     this._fetchAppKeydataAndUpdate = function() {
         var self = this;
         var filename = this.selectedApp.data[this.selectedVersion][this.selectedOS];
-        $.ajax({
+
+        // Apps exported with --sharded also have a small index that only has the default context (see
+        // serialize_sharded() in shmaplib/appdata.py). When it comes in before the full data, the keyboard is shown
+        // with it and the other contexts are loaded after
+        var dataRequest = $.ajax({
             url: "content/generated/" + filename,
             dataType: "json"
-        }).done(function (keydata) {
-            self.selectedAppData = keydata;
-            self.selectedContext = keydata.default_context;
-            self._updateContextOptions(self.selectedContext);
-            self._updateKeyboard();
-        }).fail(function() {
-            $("#keycontent").html("There is no data available for this OS or App Version (try selecting a different app version)");
+        }).done(function (keydata, textStatus, jqXHR) {
+            if (self._isSelectedFile(filename)) {
+                self._setAppData(keydata, {});
+                self._identifyAppData(keydata, jqXHR.responseText);
+            }
+        }).fail(function(jqXHR, textStatus) {
+            if (textStatus !== "abort") {
+                $("#keycontent").html("There is no data available for this OS or App Version (try selecting a different app version)");
+            }
+        });
+        $.ajax({
+            url: "content/generated/" + filename.replace(/\.json$/, ".shards.json"),
+            dataType: "json"
+        }).done(function (index) {
+            if (self._isSelectedFile(filename) && dataRequest.state() === "pending") {
+                dataRequest.abort();
+                self._loadShards(index);
+            }
+        });
+        this._fetchSearchIndex(filename);
+    };
+
+    this._isSelectedFile = function(filename) {
+        return this.selectedApp.data[this.selectedVersion][this.selectedOS] === filename;
+    };
+
+    this._setAppData = function(keydata, pendingShardContexts) {
+        this.selectedAppData = keydata;
+        this.selectedAppDataSource = null;
+        this.selectedAppSearchIndex = null;
+        this.pendingShardContexts = pendingShardContexts;
+        this.selectedContext = keydata.default_context;
+        this._updateContextOptions(this.selectedContext);
+        this._updateKeyboard();
+    };
+
+    this._loadShards = function(index) {
+        // The index is used as the app data, the other contexts are added to it and to the keyboard as their shard
+        // comes in. The index has the same "source" as the search index of the app
+        var self = this;
+        var pending = {};
+        index.shards.forEach(function(shard) {
+            if (!index.contexts.hasOwnProperty(shard.context)) {
+                pending[shard.context] = true;
+            }
+        });
+        this._setAppData(index, pending);
+        this.selectedAppDataSource = $.extend({checkSha1: true}, index.source);
+        this._applySearchIndex();
+
+        index.shards.forEach(function(shard) {
+            if (!pending[shard.context]) {
+                return;
+            }
+
+            $.ajax({
+                url: "content/generated/" + shard.file,
+                dataType: "json"
+            }).done(function (data) {
+                if (self.selectedAppData !== index) {
+                    return;
+                }
+
+                index.contexts[shard.context] = data[shard.context];
+                delete self.pendingShardContexts[shard.context];
+                if (self.keyboardAppData === index) {
+                    self.elemKeyboard.data("keyboard").addContext(shard.context, data[shard.context]);
+                }
+            });
+        });
+    };
+
+    this._fetchSearchIndex = function(filename) {
+        // The search index is written by the exporter with -s (see shmaplib/search.py), without it the search scans all shortcuts
+        var self = this;
+        this.selectedAppSearchIndex = null;
+        this.fetchedSearchIndex = null;
+        $.ajax({
+            url: "content/generated/" + filename.replace(/\.json$/, ".search.json"),
+            dataType: "json"
+        }).done(function (index) {
+            var selectedFilename = self.selectedApp.data[self.selectedVersion][self.selectedOS];
+            if (selectedFilename === filename && index.format === "shmaplib-search" && index.format_version === 2) {
+                self.fetchedSearchIndex = index;
+                self._applySearchIndex();
+            }
         });
     };
 
+    this._identifyAppData = function(keydata, text) {
+        // The same fingerprint of the loaded json file as the "source" of its search index. Without crypto.subtle
+        // (pages that aren't served over https or from localhost) the sha1 isn't compared
+        var self = this;
+        var bytes = new TextEncoder().encode(text);
+        var source = {
+            name: keydata.name,
+            version: keydata.version,
+            os: keydata.os,
+            size: bytes.length,
+            sha1: null,
+            checkSha1: window.crypto !== undefined && window.crypto.subtle !== undefined
+        };
+        this.selectedAppDataSource = source;
+        this._applySearchIndex();
+
+        if (source.checkSha1) {
+            window.crypto.subtle.digest("SHA-1", bytes).then(function(digest) {
+                source.sha1 = Array.prototype.map.call(new Uint8Array(digest), function(b) {
+                    return ("0" + b.toString(16)).slice(-2);
+                }).join("");
+                if (self.selectedAppDataSource === source) {
+                    self._applySearchIndex();
+                }
+            });
+        }
+    };
+
+    this._applySearchIndex = function() {
+        // The app data and its search index are fetched at the same time, the index is only used once the data it
+        // was built from is loaded. A stale index (the app was exported again without -s) is never used
+        var index = this.fetchedSearchIndex;
+        var source = this.selectedAppDataSource;
+        this.selectedAppSearchIndex = null;
+        if (index === null || source === null) {
+            return;
+        }
+
+        if (index.source.name === source.name && index.source.version === source.version &&
+                index.source.os === source.os && index.source.size === source.size &&
+                (!source.checkSha1 || index.source.sha1 === source.sha1)) {
+            this.selectedAppSearchIndex = index;
+        }
+    };
+
     this._updateKeyboard = function() {
         // Clear keyboard html contents
         // Todo: add some sort of loading thing
@@ -252,7 +397,8 @@ function ShortcutMapper() {
             content = content.replace(/<link\b[^>]*>/i,"");
             $("#keycontent").html(content);
 
-            // Init the keyboard widget
+            // Init the keyboard widget, with the contexts that are loaded so far
+            self.keyboardAppData = self.selectedAppData;
             self.elemKeyboard = $("#keyboard");
             self.elemKeyboard.keyboard({
                 'keydata': self.selectedAppData.contexts,
@@ -317,71 +463,44 @@ function ShortcutMapper() {
             return;
         }
 
-        var escapedSearchText = searchText.replace(/[-[\]{}()*+?.,\\^$|#\s]/g, "\\$&");
-        var regex = new RegExp(escapedSearchText, 'i');
-        var zregex = new RegExp(escapedSearchText, 'i');
+        var words = this._tokenizeSearchText(searchText);
+        var found = this._findShortcuts(words);
 
-        // Iterate through our shortcuts data and build a table for results
+        // Build a table for results, don't show more than max
         var html = "<table><tbody>";
-        var numResults = 0;
-        var numContexts = Object.keys(this.selectedAppData.contexts).length;
-        for (var contextName in this.selectedAppData.contexts) {
-            if (!this.selectedAppData.contexts.hasOwnProperty(contextName)) {
-                continue;
+        var numResults = found.length;
+        var numContexts = this._getContextNames().length;
+        for (var r=0; r<Math.min(numResults, this.maxSearchResults); r++) {
+            var contextName = found[r][0];
+            var keyName = found[r][1];
+            var shortcut = this.selectedAppData.contexts[contextName][keyName][found[r][2]];
+
+            // Keep track of selected result
+            if (this.selectedSearchResult === r) {
+                this.selectedSearchShortcut.context = contextName;
+                this.selectedSearchShortcut.key = keyName;
+                this.selectedSearchShortcut.shortcut = shortcut;
             }
-            
-            var context = self.selectedAppData.contexts[contextName];
-            for (var keyName in context) {
-                if (!context.hasOwnProperty(keyName)) {
-                    continue;
-                }
 
-                var shortcuts = context[keyName];
-                for (var i=0; i<shortcuts.length; i++) {
-                    var shortcut = shortcuts[i];
-                    var name = shortcut.name;
-                    if (regex.test(name)) {
-
-                        // Don't show more than max
-                        if (numResults >= this.maxSearchResults) {
-                            numResults++;
-                            continue;
-                        }
-
-                        // Keep track of selected result
-                        if (this.selectedSearchResult === numResults) {
-                            this.selectedSearchShortcut.context = contextName;
-                            this.selectedSearchShortcut.key = keyName;
-                            this.selectedSearchShortcut.shortcut = shortcut;
-                        }
-
-                        html += (this.selectedSearchResult === numResults) ? "<tr class='selected'>" : "<tr>";
-
-                        // Keys
-                        html += "<td>";
-                        for (var m=0; m<shortcut.mods.length; m++) {
-                            var mod = shortcut.mods[m].toLowerCase();
-                            html += "<span class='" + mod + "'>" + mod + "</span>";
-                        }
-                        html += "<span>" + keyName + "</span></td>";
-
-                        // Shortcut Name
-                        html += "<td>";
-                        var pos = name.search(zregex);
-                        html += name.substring(0, pos) + "<em>" + name.substring(pos, pos + searchText.length) + "</em>" + name.substring(pos + searchText.length);
-                        html += "</td>";
-
-                        // Context (only if there are multiple)
-                        if (numContexts > 1) {
-                            html += "<td>" + contextName + "</td>";
-                        }
-
-                        html += "</tr>";
-
-                        numResults++;
-                    }
-                }
+            html += (this.selectedSearchResult === r) ? "<tr class='selected'>" : "<tr>";
+
+            // Keys
+            html += "<td>";
+            for (var m=0; m<shortcut.mods.length; m++) {
+                var mod = shortcut.mods[m].toLowerCase();
+                html += "<span class='" + mod + "'>" + mod + "</span>";
             }
+            html += "<span>" + keyName + "</span></td>";
+
+            // Shortcut Name
+            html += "<td>" + this._highlightSearchWords(shortcut.name, words) + "</td>";
+
+            // Context (only if there are multiple)
+            if (numContexts > 1) {
+                html += "<td>" + contextName + "</td>";
+            }
+
+            html += "</tr>";
         }
         html += "</tbody></table>";
 
@@ -401,6 +520,120 @@ function ShortcutMapper() {
         }
     };
 
+    this._tokenizeSearchText = function(text) {
+        text = text.normalize("NFKD").replace(this.searchAccentRegex, "");
+        return text.toLowerCase().match(this.searchTokenRegex) || [];
+    };
+
+    this._tokenMatchesSearchWord = function(token, word) {
+        // Words shorter than the minimum search length only match whole tokens, like in the search index
+        if (word.length < this.minSearchLength) {
+            return token === word;
+        }
+        return token.lastIndexOf(word, 0) === 0;
+    };
+
+    this._findShortcuts = function(words) {
+        // Returns a list of [context name, key name, shortcut index] of the shortcuts of which the name has a token
+        // starting with each search word, in the order of the app data. Same as search_shortcuts() in shmaplib/search.py
+        var self = this;
+        var results = [];
+        if (words.length === 0) {
+            return results;
+        }
+
+        var index = this.selectedAppSearchIndex;
+        if (index !== null) {
+            var entryIds = null;
+            for (var w=0; w<words.length; w++) {
+                if (!index.terms.hasOwnProperty(words[w])) {
+                    return results;
+                }
+
+                // Postings are sorted by entry id
+                var postings = index.terms[words[w]];
+                if (entryIds === null) {
+                    entryIds = postings;
+                } else {
+                    entryIds = entryIds.filter(function(id) { return self._sortedContains(postings, id); });
+                }
+            }
+
+            for (var e=0; e<entryIds.length; e++) {
+                var i = entryIds[e] * 3;
+                var result = [index.contexts[index.entries[i]], index.keys[index.entries[i+1]], index.entries[i+2]];
+                if (this.pendingShardContexts.hasOwnProperty(result[0])) {
+                    // The shard of this context isn't loaded yet
+                    continue;
+                }
+                if (!this._hasShortcut(result[0], result[1], result[2])) {
+                    // The index doesn't fit the app data after all, scan the shortcuts from now on
+                    this.selectedAppSearchIndex = null;
+                    return this._findShortcuts(words);
+                }
+                results.push(result);
+            }
+            return results;
+        }
+
+        // No search index, scan all shortcuts
+        var contexts = this.selectedAppData.contexts;
+        Object.keys(contexts).sort().forEach(function(contextName) {
+            var context = contexts[contextName];
+            Object.keys(context).sort().forEach(function(keyName) {
+                var shortcuts = context[keyName];
+                for (var i=0; i<shortcuts.length; i++) {
+                    var tokens = self._tokenizeSearchText(shortcuts[i].name);
+                    var matches = words.every(function(word) {
+                        return tokens.some(function(token) { return self._tokenMatchesSearchWord(token, word); });
+                    });
+                    if (matches) {
+                        results.push([contextName, keyName, i]);
+                    }
+                }
+            });
+        });
+        return results;
+    };
+
+    this._hasShortcut = function(contextName, keyName, i) {
+        var contexts = this.selectedAppData.contexts;
+        return contexts.hasOwnProperty(contextName) && contexts[contextName].hasOwnProperty(keyName) &&
+            i < contexts[contextName][keyName].length;
+    };
+
+    this._sortedContains = function(values, value) {
+        var lo = 0;
+        var hi = values.length;
+        while (lo < hi) {
+            var mid = (lo + hi) >> 1;
+            if (values[mid] < value) {
+                lo = mid + 1;
+            } else {
+                hi = mid;
+            }
+        }
+        return lo < values.length && values[lo] === value;
+    };
+
+    this._highlightSearchWords = function(name, words) {
+        // Emphasizes the start of the tokens that match a search word
+        var self = this;
+        return name.replace(this.searchTokenRegex, function(token) {
+            var normalized = self._tokenizeSearchText(token)[0] || "";
+            var length = 0;
+            for (var w=0; w<words.length; w++) {
+                if (self._tokenMatchesSearchWord(normalized, words[w])) {
+                    length = Math.max(length, words[w].length);
+                }
+            }
+            if (length === 0) {
+                return token;
+            }
+            return "<em>" + token.substring(0, length) + "</em>" + token.substring(length);
+        });
+    };
+
     this.highlightShortcut = function(contextName, keyName, shortcut) {
         this.selectContext(contextName);
         this.elemKeyboard.data("keyboard").highlightShortcut(keyName, shortcut);
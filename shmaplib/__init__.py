@@ -3,8 +3,41 @@ import sys
 import os
 sys.path.append(os.path.dirname(__file__))
 
-from .appdata import Shortcut, ShortcutContext, ApplicationConfig
+import importlib
+
 from .keynames import get_all_valid_keynames, get_valid_keynames, is_valid_keyname
-from .logger import getlog, setuplog
-from .constants import DIR_ROOT, DIR_SOURCES, DIR_CONTENT_GENERATED, DIR_CONTENT_KEYBOARDS
-from .intermediate import IntermediateShortcutData, IntermediateDataExporter
+from .constants import DIR_ROOT, DIR_SOURCES, DIR_CONTENT_GENERATED, DIR_CONTENT_KEYBOARDS, DIR_CACHE
+from .compact import read_compact
+from .database import ShortcutDatabase, ShortcutRecord
+from .search import read_search_index, search_shortcuts
+
+# The package is imported before any `python -m shmaplib` command runs, and `python -m shmaplib query` has to start
+# quickly. These modules import appdata.py or the logging module, which takes longer than the query itself, so their
+# names are only imported when they're first used.
+_LAZY_NAMES = {
+    'appdata': ['Shortcut', 'ShortcutContext', 'ApplicationConfig', 'ExportSession'],
+    'logger': ['getlog', 'setuplog'],
+    'intermediate': ['IntermediateShortcutData', 'IntermediateDataExporter', 'ExportOptions'],
+    'cache': ['ExportCache'],
+    'compression': ['write_compressed_variants', 'log_compressed_size_report'],
+    'profiling': ['enable_profiling', 'profile_input', 'profile_stage', 'write_profiles'],
+    'tracing': ['enable_tracing', 'trace_span', 'pop_trace_events', 'add_trace_events', 'write_trace'],
+}
+_LAZY_MODULES = dict((name, module) for module, names in _LAZY_NAMES.items() for name in names)
+
+
+def __getattr__(name):
+    module_name = _LAZY_MODULES.get(name)
+    if module_name is None:
+        # The lazy modules used to be imported with the package, keep shmaplib.appdata and the like working
+        if name in _LAZY_NAMES:
+            return importlib.import_module('.' + name, __name__)
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    value = getattr(importlib.import_module('.' + module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_MODULES))
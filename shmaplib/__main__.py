@@ -0,0 +1,27 @@
+"""Command line tools of shmaplib, run from the repository root:
+    python -m shmaplib query "ctrl+shift+z" --os mac
+"""
+
+import sys
+
+
+COMMANDS = {
+    'query': "Finds the shortcuts bound to a keycombo in all generated applications",
+}
+
+
+def main(argv):
+    if len(argv) == 0 or argv[0] not in COMMANDS:
+        sys.stderr.write("usage: python -m shmaplib COMMAND [ARGS ...]\n\ncommands:\n")
+        for command in sorted(COMMANDS):
+            sys.stderr.write("  %-10s %s\n" % (command, COMMANDS[command]))
+        return 0 if argv and argv[0] in ('-h', '--help') else 2
+
+    # Commands are imported on use, so each only pays for the modules it needs
+    if argv[0] == 'query':
+        from .query import main as query_main
+        return query_main(argv[1:])
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
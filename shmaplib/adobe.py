@@ -3,7 +3,8 @@
 import os
 import re
 import codecs
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup, SoupStrainer
 
 from .intermediate import IntermediateShortcutData
 
@@ -11,6 +12,21 @@ from .logger import getlog
 log = getlog()
 
 
+# BeautifulSoup parser backends: lxml is a lot faster, html.parser is always available
+PARSER_LXML = 'lxml'
+PARSER_HTML = 'html.parser'
+PARSERS = [PARSER_LXML, PARSER_HTML]
+
+
+def get_default_parser():
+    """Returns PARSER_LXML when lxml is installed, PARSER_HTML otherwise"""
+    try:
+        import lxml
+        return PARSER_LXML
+    except ImportError:
+        return PARSER_HTML
+
+
 def _get_file_contents(source):
     f = codecs.open(source, encoding='utf-8')
     contents = f.read()
@@ -18,6 +34,12 @@ def _get_file_contents(source):
     return contents
 
 
+def _parse_html(contents, parser, parse_only):
+    """Parses only the elements matched by the parse_only SoupStrainer and their contents, all other elements
+    aren't added to the tree"""
+    return BeautifulSoup(contents, parser, parse_only=parse_only)
+
+
 class AdobeDocsParser(object):
     """This parser scrapes shortcuts and contexts from an adobe shortcuts documentation html file, such as:
     http://helpx.adobe.com/en/photoshop/using/default-keyboard-shortcuts.html
@@ -26,9 +48,11 @@ class AdobeDocsParser(object):
     From the contents of this div, it can extract shortcut contexts, shortcut names and keys for Windows and MacOS
     """
 
-    def __init__(self, app_name):
+    def __init__(self, app_name, parser=None):
+        """:param parser: the BeautifulSoup parser backend (one of PARSERS), None uses get_default_parser()"""
         super(AdobeDocsParser, self).__init__()
         self.idata = IntermediateShortcutData(app_name)
+        self.parser = parser or get_default_parser()
 
     @staticmethod
     def _clean_text(text):
@@ -45,10 +69,14 @@ class AdobeDocsParser(object):
             log.error("Source file '%s' does not exist", source_file_path)
             return
 
-        # Use BeautifulSoup to parse the html document
-        doc = BeautifulSoup(_get_file_contents(source_file_path))
-        main_wrapper_div = doc.find("div", class_="parsys main-pars")
+        # Use BeautifulSoup to parse the wrapper div of the html document, the rest of the page isn't needed
+        contents = _get_file_contents(source_file_path)
+        main_wrapper_div = None
+        if 'parsys main-pars' in contents:
+            doc = _parse_html(contents, self.parser, SoupStrainer("div", class_="parsys main-pars"))
+            main_wrapper_div = doc.find("div", class_="parsys main-pars")
         if main_wrapper_div is None:
+            doc = _parse_html(contents, self.parser, SoupStrainer("div", id="main"))
             main_wrapper_div = doc.find("div", id="main")
         sections = main_wrapper_div.find_all("div", class_="parbase")
 
@@ -80,92 +108,224 @@ class AdobeDocsParser(object):
         return self.idata
 
 
-class AdobeSummaryParser(object):
-    """This parser scrapes shortcuts and contexts from an adobe summary export. This file is exported from
-    photoshop's Edit shortcuts dialog."""
+# Characters of a whitespace-only string that BeautifulSoup collapses to a single space or newline
+_ASCII_SPACES = u'\x20\x0a\x09\x0c\x0d'
 
-    def __init__(self, app_name):
-        super(AdobeSummaryParser, self).__init__()
-        self.idata = IntermediateShortcutData(app_name)
+# The summary is read and parsed in chunks of this size, it is never in memory as a whole
+SUMMARY_READ_SIZE = 64 * 1024
 
-    def parse(self, source_filepath, platform_type):
-        assert platform_type in ["windows", "mac"], "Platform must be 'windows' or 'mac'"
 
-        if not os.path.exists(source_filepath):
-            log.error("Source file '%s' does not exist", source_filepath)
+class _SummaryCell(object):
+    """A <td> of the summary table row that is being parsed"""
+    __slots__ = ['width', 'is_shortcut', 'has_children', 'strings', 'text']
+
+    def __init__(self, attrs):
+        attrs = dict(attrs)
+        self.width = attrs.get('width')
+        self.is_shortcut = 'shortcutcols' in (attrs.get('class') or '').split()
+        self.has_children = False
+        # All strings, including comments. The text only has the regular strings, like the text of a DOM element
+        self.strings = []
+        self.text = u''
+
+
+class _SummaryHTMLParser(HTMLParser):
+    """Handles the html parser events of a summary export, the same way AdobeSummaryParser used to walk the
+    BeautifulSoup tree of it. Only the cells of the current table row are kept, rows are processed as soon as they end.
+
+    Each row is either a category (a single cell), a parent menu item (no shortcutcols cells, ends with '>') or a
+    shortcut. Spacer cells (width=40) give the indentation of a row, the category stack is popped when it decreases.
+    """
+
+    def __init__(self, idata, platform_type):
+        super(_SummaryHTMLParser, self).__init__(convert_charrefs=True)
+        self.idata = idata
+        self.platform_type = platform_type
+
+        self._data = []
+        self._table_depth = 0
+        self._row = None
+        self._cell = None
+
+        self._parent_categories = []
+        self._prev_was_category = False
+        self._indentation = None
+
+    def _end_data(self):
+        """Adds the text since the previous tag to the current cell as one string"""
+        if not self._data:
+            return
+        data = u''.join(self._data)
+        self._data = []
+        if self._cell is None:
             return
 
-        # Use BeautifulSoup to parse the html document
-        doc = BeautifulSoup(_get_file_contents(source_filepath))
-        tables = doc.find_all('table')
-
-        for table in tables:
-            parent_categories = []
-            prev_was_category = False
-            indentation = None
-
-            rows = table.find_all('tr')
-            for row in rows:
-                cols = row.find_all('td')
-
-                # Check for category
-                if len(cols) == 1:
-                    if len(parent_categories):
-                        parent_categories = parent_categories[:len(parent_categories)-1]
-                    if len(cols[0]):
-                        parent_categories.append(cols[0].text + '>')
+        if data.strip(_ASCII_SPACES) == u'':
+            data = u'\n' if u'\n' in data else u' '
+        self._cell.has_children = True
+        self._cell.strings.append(data)
+        self._cell.text += data
+
+    def _add_node(self, text=None):
+        """Adds a comment, declaration or processing instruction to the current cell, it is not part of its text"""
+        self._end_data()
+        if self._cell is not None:
+            self._cell.has_children = True
+            if text is not None:
+                self._cell.strings.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self._end_data()
+
+        if tag == 'table':
+            if self._table_depth == 0:
+                self._parent_categories = []
+                self._prev_was_category = False
+                self._indentation = None
+            self._table_depth += 1
+        elif self._table_depth == 0:
+            return
+        elif tag == 'tr':
+            self._end_row()
+            self._row = []
+        elif tag == 'td' and self._row is not None:
+            cell = _SummaryCell(attrs)
+            self._row.append(cell)
+            self._cell = cell
+        elif self._cell is not None:
+            self._cell.has_children = True
+
+    def handle_endtag(self, tag):
+        self._end_data()
+
+        if tag == 'td':
+            self._cell = None
+        elif tag == 'tr':
+            self._end_row()
+        elif tag == 'table' and self._table_depth > 0:
+            self._end_row()
+            self._table_depth -= 1
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_comment(self, data):
+        self._add_node(data)
+
+    def handle_decl(self, decl):
+        self._add_node(decl)
+
+    def handle_pi(self, data):
+        self._add_node(data)
+
+    def unknown_decl(self, data):
+        self._add_node(data)
+
+    def close(self):
+        super(_SummaryHTMLParser, self).close()
+        self._end_data()
+        self._end_row()
+
+    def _end_row(self):
+        cols = self._row
+        self._row = None
+        self._cell = None
+        if cols is None:
+            return
+
+        parent_categories = self._parent_categories
+
+        # Check for category
+        if len(cols) == 1:
+            if parent_categories:
+                parent_categories.pop()
+            if cols[0].has_children:
+                parent_categories.append(cols[0].text + '>')
+            return
+
+        num_spacers = 0
+        shortcutcols = []
+        for col in cols:
+            if col.width == '40':
+                num_spacers += 1
+            if col.is_shortcut:
+                shortcutcols.append(col)
+
+        # Handle indentation
+        if not self._indentation:
+            self._indentation = num_spacers
+        if num_spacers < self._indentation or (self._prev_was_category and num_spacers == self._indentation):
+            if parent_categories:
+                parent_categories.pop()
+        self._indentation = num_spacers
+
+        # Skip if there are no shortcuts in this row
+        if not shortcutcols:
+            # Check if it is a parent menu item '>'
+            for col in cols:
+                if '>' in col.text:
+                    parent_categories.append(col.text)
+                    self._prev_was_category = True
+            return
+        self._prev_was_category = False
+
+        # Find the name and shortcut text
+        name = None
+        keys = None
+        for col in shortcutcols:
+            if col.text:
+                if name is None:
+                    name = col.text.replace('...', '')
                     continue
 
-                spacers = row.find_all('td', attrs={'width':'40'})
-                shortcutcols = row.find_all('td', attrs={'class':'shortcutcols'})
-
-                # Handle indentation
-                if not indentation:
-                    indentation = len(spacers)
-                if len(spacers) < indentation or (prev_was_category and len(spacers) == indentation):
-                    parent_categories = parent_categories[:len(parent_categories)-1]
-                indentation = len(spacers)
-
-                # Skip if there are no shortcuts in this row
-                if not len(shortcutcols):
-                    # Check if it is a parent menu item '>'
-                    for col in cols:
-                        if '>' in col.text:
-                            category = col.text
-                            parent_categories.append(category)
-                            prev_was_category = True
+                # Check if content is &nbsp;
+                if col.text == u'\xa0':
                     continue
-                prev_was_category = False
 
-                # Find the name and shortcut text
-                name = None
-                keys = None
-                for col in shortcutcols:
-                    if col.text:
-                        if name is None:
-                            name = col.text.replace('...', '')
-                            continue
+                # Shortcut + removing <br>'s
+                keys = u' or '.join(col.strings)
 
-                        # Check if content is &nbsp;
-                        if col.text == u'\xa0':
-                            continue
+                # No need to continue, we found the the shortcuts
+                break
 
-                        # Shortcut + removing <br>'s
-                        keys = u' or '.join(col.findAll(text=True))
+        if not keys:
+            return
 
-                        # No need to continue, we found the the shortcuts
-                        break
+        # It's a shortcut, but is it set?
+        full_name = u''.join(parent_categories) + name
+        if self.platform_type == 'windows':
+            self.idata.add_shortcut("Application", full_name, keys, "")
+        else:
+            self.idata.add_shortcut("Application", full_name, "", keys)
 
-                if not keys:
-                    continue
 
-                # It's a shortcut, but is it set?
-                full_name = u''.join(parent_categories) + name
-                if platform_type == 'windows':
-                    self.idata.add_shortcut("Application", full_name, keys, "")
-                else:
-                    self.idata.add_shortcut("Application", full_name, "", keys)
+class AdobeSummaryParser(object):
+    """This parser scrapes shortcuts and contexts from an adobe summary export. This file is exported from
+    photoshop's Edit shortcuts dialog.
 
-        return self.idata
+    Summaries of large custom keymaps can be several MB, so the file is parsed while it is read, without building a
+    document tree (see _SummaryHTMLParser).
+    """
+
+    def __init__(self, app_name, read_size=SUMMARY_READ_SIZE):
+        super(AdobeSummaryParser, self).__init__()
+        self.idata = IntermediateShortcutData(app_name)
+        self.read_size = read_size
+
+    def parse(self, source_filepath, platform_type):
+        assert platform_type in ["windows", "mac"], "Platform must be 'windows' or 'mac'"
+
+        if not os.path.exists(source_filepath):
+            log.error("Source file '%s' does not exist", source_filepath)
+            return
 
+        html_parser = _SummaryHTMLParser(self.idata, platform_type)
+        with codecs.open(source_filepath, encoding='utf-8') as f:
+            while True:
+                chunk = f.read(self.read_size)
+                if not chunk:
+                    break
+                html_parser.feed(chunk)
+        html_parser.close()
 
+        return self.idata
@@ -1,26 +1,79 @@
+import io
+import sys
+import hashlib
 import json
-import copy
+import logging
 import collections
 import glob
 import codecs
+import shutil
 
 from . import keynames
 from .constants import *
 from .logger import getlog
+from .profiling import profile_stage
+from .tracing import trace_span
+from . import compact
+from . import search
+from . import sqlite
 log = getlog()
 
 
+class _InternedMods(object):
+    # mods as given -> sorted tuple of interned names, shared by all shortcuts with the same modifiers
+    tuples = {}
+    # sorted tuple -> serialized json list
+    json_strs = {}
+
+
+def _intern_mods(mods):
+    mods = tuple(mods)
+    interned = _InternedMods.tuples.get(mods)
+    if interned is None:
+        interned = tuple(sorted(sys.intern(m) for m in mods))
+        interned = _InternedMods.tuples.setdefault(interned, interned)
+        _InternedMods.tuples[mods] = interned
+    return interned
+
+
 class Shortcut(object):
-    def __init__(self, name, key, mods=list(), anymod=False):
-        self.name = name
-        self.key = key
-        self.mods = mods
-        self.anymod = anymod
+    """A shortcut (name, key and modifiers), this is immutable once created.
+
+    Modifiers are stored as a sorted tuple that is shared between all shortcuts with the same modifiers.
+    Use with_key() and with_mods() to derive a shortcut with a different key or modifiers.
+    """
+
+    __slots__ = ('name', 'key', 'mods', 'anymod')
+
+    def __init__(self, name, key, mods=(), anymod=False):
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'key', key)
+        object.__setattr__(self, 'mods', _intern_mods(mods))
+        object.__setattr__(self, 'anymod', anymod)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Shortcut is immutable, use with_key() or with_mods() instead")
+
+    def with_key(self, key):
+        """Returns a copy of this shortcut with a different key"""
+        shortcut = object.__new__(Shortcut)
+        object.__setattr__(shortcut, 'name', self.name)
+        object.__setattr__(shortcut, 'key', key)
+        object.__setattr__(shortcut, 'mods', self.mods)
+        object.__setattr__(shortcut, 'anymod', self.anymod)
+        return shortcut
+
+    def with_mods(self, mods):
+        """Returns a copy of this shortcut with different modifiers"""
+        return Shortcut(self.name, self.key, mods, self.anymod)
 
     def serialize(self):
-        mods = list(set(self.mods))
-        mods.sort()
-        mods_str = json.dumps(mods)
+        mods_str = _InternedMods.json_strs.get(self.mods)
+        if mods_str is None:
+            mods = list(set(self.mods))
+            mods.sort()
+            mods_str = json.dumps(mods)
+            _InternedMods.json_strs[self.mods] = mods_str
 
         return '{"name":"%s", "mods":%s}' % (self.name, mods_str)
 
@@ -32,12 +85,15 @@ class ShortcutContext(object):
     def __init__(self, name):
         self.name = name
         self.shortcuts = []
-        self.added_shortcuts_lookup = []
-        self.added_keycombos_lookup = []
-        self.added_keycombo_to_shortcuts_lookup = {}
+
+        # Index of the added shortcuts, keyed by (mods, key) where mods is the sorted tuple of modifier names
+        self._keycombo_index = {}
+        self._key_index = {}
 
     def add_shortcut(self, s, check_for_duplicates=True, explicit_numpad_mode=False):
-        log.debug("adding shortcut %s", self._get_shortcut_str(s))
+        debug = log.isEnabledFor(logging.DEBUG)
+        if debug:
+            log.debug("adding shortcut %s", self._get_shortcut_str(s))
 
         # Validate modifier names
         # Modifier keys cannot be ambiguous (ctrl -> left_ctrl, right_ctrl), but can be added later if needed
@@ -49,7 +105,7 @@ class ShortcutContext(object):
                 return
             assert len(valid_mod_keys) == 1, "Ambiguous modifier keys not supported yet"
             valid_mod_names.append(valid_mod_keys[0])
-        s.mods = valid_mod_names
+        s = s.with_mods(valid_mod_names)
 
         # Split up ambiguous keys into multiple shortcuts
         #  a simple example is +, which can be PLUS or NUMPAD_PLUS
@@ -66,38 +122,40 @@ class ShortcutContext(object):
                     s_expanded = Shortcut(s.name, key, [mod])
                     expanded_shortcuts.append(s_expanded)
             else:
-                s_expanded = copy.deepcopy(s)
-                s_expanded.key = key
-                expanded_shortcuts.append(s_expanded)
+                expanded_shortcuts.append(s.with_key(key))
 
         # Add all expanded shortcuts
         for shortcut in expanded_shortcuts:
-            shortcut_str = self._get_shortcut_str(shortcut)
-            keycombo_str = self._get_keycombo_str(shortcut)
-
-            if not check_for_duplicates:
-                self.shortcuts.append(shortcut)
-                self.added_shortcuts_lookup.append(shortcut_str)
-                self.added_keycombo_to_shortcuts_lookup[keycombo_str] = shortcut_str
-                continue
+            keycombo = (shortcut.mods, shortcut.key)
 
             # Don't Add Duplicates
-            if keycombo_str in self.added_keycombo_to_shortcuts_lookup.keys():
-                existing_shortcut = self.added_keycombo_to_shortcuts_lookup[keycombo_str]
-                log.warn('Warning: shortcut with keycombo %s already exists in context\n' +
-                    '   ...existing shortcut is: %s\n   ...skipping add shorcut: "%s"',
-                    keycombo_str, existing_shortcut, shortcut.name)
-                continue
+            if check_for_duplicates:
+                existing_shortcut = self._keycombo_index.get(keycombo)
+                if existing_shortcut is not None:
+                    log.warn('Warning: shortcut with keycombo %s already exists in context\n' +
+                        '   ...existing shortcut is: %s\n   ...skipping add shorcut: "%s"',
+                        self._get_keycombo_str(shortcut), self._get_shortcut_str(existing_shortcut), shortcut.name)
+                    continue
+
+                if debug and len(expanded_shortcuts) > 1:
+                    log.debug('   ...expanding into %s', self._get_shortcut_str(shortcut))
 
-            if len(expanded_shortcuts) > 1:
-                log.debug('   ...expanding into %s', shortcut_str)
             self.shortcuts.append(shortcut)
-            self.added_shortcuts_lookup.append(shortcut_str)
-            self.added_keycombo_to_shortcuts_lookup[keycombo_str] = shortcut_str
+            self._keycombo_index[keycombo] = shortcut
+            self._key_index.setdefault(shortcut.key, []).append(shortcut)
+
+    def lookup(self, combo):
+        """Returns the shortcut added with the given (mods, key) combo, or None.
+        The mods can be in any order, but must be valid key names (CONTROL, SHIFT, ...)"""
+        mods, key = combo
+        return self._keycombo_index.get((_intern_mods(mods), key))
+
+    def shortcuts_for_key(self, key):
+        """Returns a list of all added shortcuts that use the given key name"""
+        return list(self._key_index.get(key, ()))
 
     def _get_shortcut_str(self, shortcut):
-        keys = list(shortcut.mods)
-        keys.sort()
+        keys = sorted(shortcut.mods)
         keys.append(shortcut.key)
 
         anymod = ''
@@ -108,37 +166,61 @@ class ShortcutContext(object):
 
     def _get_keycombo_str(self, shortcut):
         keys = list(shortcut.mods)
-        keys.sort()
         keys.append(shortcut.key)
         return '+'.join(keys)
 
+    def get_sorted_shortcuts(self):
+        """Returns a list of (key, shortcuts) in the order they are serialized: sorted by key,
+        then by the serialized shortcut"""
+
+        lookup_table = {}
+        for shortcut in self.shortcuts:
+            lookup_table.setdefault(shortcut.key, []).append(shortcut)
+
+        sorted_shortcuts = []
+        for key, shortcuts in sorted(lookup_table.items()):
+            shortcuts.sort(key=Shortcut.serialize)
+            sorted_shortcuts.append((key, shortcuts))
+        return sorted_shortcuts
+
     def serialize(self):
+        return u''.join(self.iter_serialized())
+
+    def iter_serialized(self, indent=u''):
+        """Generates the serialized context in chunks, every line is prefixed with indent"""
+
         # todo: check for duplicates somewhere else!
         lookup_table = {}
         for shortcut in self.shortcuts:
-            if shortcut.key not in lookup_table.keys():
-                lookup_table[shortcut.key] = []
-            lookup_table[shortcut.key].append(shortcut)
+            lookup_table.setdefault(shortcut.key, []).append(shortcut)
 
-        output_str = '"%s" : {\n' % self.name
+        newline = u'\n' + indent
+        yield indent + _indent_text(u'"%s" : {' % self.name, newline)
 
-        sorted_shortcuts = collections.OrderedDict(sorted(lookup_table.items()))
-        for key, shortcuts in sorted_shortcuts.items():
-            output_str += '    "%s" : [\n' % key
+        key_separator = newline
+        for key, shortcuts in sorted(lookup_table.items()):
+            yield key_separator + _indent_text(u'    "%s" : [' % key, newline)
+            key_separator = u',' + newline
 
             # Important to sort shortcuts alphabetically, this improves the quality of repo diffs
             serialized_shortcuts = [s.serialize() for s in shortcuts]
             serialized_shortcuts.sort()
+
+            shortcut_separator = newline + u'        '
             for shortcut_str in serialized_shortcuts:
-                output_str += '        %s,\n' % shortcut_str
+                yield shortcut_separator + _indent_text(shortcut_str, newline)
+                shortcut_separator = u',' + newline + u'        '
 
-            output_str = output_str.rstrip(',\n')
-            output_str += '\n    ],\n'
-        output_str = output_str.rstrip(',\n')
+            yield newline + u'    ]'
 
-        output_str += '\n}'
+        yield newline + u'}'
 
-        return output_str
+
+def _indent_text(text, newline):
+    """Indents the lines following any newline in text (names could contain them)"""
+    if u'\n' in text:
+        return text.replace(u'\n', newline)
+    return text
 
 
 class ApplicationConfig(object):
@@ -176,10 +258,160 @@ class ApplicationConfig(object):
                 return False
         return True
 
-    def serialize(self, output_dir):
-        """Serialize this class into a .json file with name: 'APP-NAME_VERSION_OS.json'
+    def get_output_path(self, output_dir):
+        """Returns the path of the .json file this class serializes to: 'APP-NAME_VERSION_OS.json'"""
+
+        # todo: handle colons in name
+        appname_for_file = self.name.lower().replace(' ', '-')
+        return os.path.join(output_dir, "{0}_{1}_{2}.json".format(appname_for_file, self.version, self.os).lower())
+
+    def _serialize_variant(self, description, output_path, write):
+        """Writes this class in another format with write(self, output_path), like the compact format or the database.
+        Returns True for succes, False when this class is empty"""
+
+        if self.is_empty():
+            log.warn("Cannot export ApplicationConfig because it is empty")
+            return False
+
+        log.info('serializing %s to %s', description, output_path)
+        write(self, output_path)
+        return True
+
+    def get_compact_output_path(self, output_dir):
+        """Returns the path of the compact file: 'APP-NAME_VERSION_OS.compact.json'"""
+        output_path = self.get_output_path(output_dir)
+        return output_path[:-len('.json')] + COMPACT_JSON_EXTENSION
+
+    @trace_span('serialize compact')
+    @profile_stage('serialize')
+    def serialize_compact(self, output_dir):
+        """Serialize this class into the compact format (see compact.py) with name: 'APP-NAME_VERSION_OS.compact.json'
         Returns True for succes, False for failure"""
 
+        assert os.path.isdir(output_dir), "The output dir is not a directory"
+        return self._serialize_variant('compact ApplicationConfig', self.get_compact_output_path(output_dir),
+                                       compact.write_compact)
+
+    def get_search_index_output_path(self, output_dir):
+        """Returns the path of the search index file: 'APP-NAME_VERSION_OS.search.json'"""
+        output_path = self.get_output_path(output_dir)
+        return output_path[:-len('.json')] + SEARCH_INDEX_EXTENSION
+
+    @trace_span('serialize search index')
+    @profile_stage('serialize')
+    def serialize_search_index(self, output_dir):
+        """Serialize the search index of this class (see search.py) with name: 'APP-NAME_VERSION_OS.search.json'
+        The index points into the .json file of this class, so serialize() has to write it first.
+        Returns True for succes, False for failure"""
+
+        assert os.path.isdir(output_dir), "The output dir is not a directory"
+        json_path = self.get_output_path(output_dir)
+        assert os.path.exists(json_path), "The ApplicationConfig must be serialized before its search index"
+        return self._serialize_variant('search index', self.get_search_index_output_path(output_dir),
+                                       lambda app_config, path: search.write_search_index(app_config, path, json_path))
+
+    @trace_span('serialize sqlite')
+    @profile_stage('serialize')
+    def serialize_sqlite(self, db_path=SQLITE_DB_FILE):
+        """Writes this class into the SQLite database at db_path (see sqlite.py), replacing the previous data of the
+        same app, version and os. Returns True for succes, False for failure"""
+
+        return self._serialize_variant('ApplicationConfig into database', db_path, sqlite.write_application_to_file)
+
+    def get_sharded_output_paths(self, output_dir):
+        """Returns the paths of the index file and the shards directory of the sharded output:
+        'APP-NAME_VERSION_OS.shards.json' and 'APP-NAME_VERSION_OS.shards/'"""
+        base_path = self.get_output_path(output_dir)[:-len('.json')]
+        return base_path + SHARDS_INDEX_EXTENSION, base_path + SHARDS_DIR_EXTENSION
+
+    def _get_sorted_contexts(self):
+        """Returns the contexts that are serialized, sorted by name"""
+        contexts = [c for c in self.contexts.values() if len(c.shortcuts) > 0]
+        contexts.sort(key=lambda c: c.name)
+        return contexts
+
+    def _write_header(self, f, mods_used):
+        f.write(u'{\n')
+        f.write(u'    "name" : "%s",\n' % self.name)
+        f.write(u'    "version" : "%s",\n' % self.version)
+        f.write(u'    "os" : "%s",\n' % self.os)
+        f.write(u'    "mods_used" : %s,\n' % json.dumps(mods_used))
+        f.write(u'    "default_context" : "%s",\n' % self.default_context_name)
+
+    @trace_span('serialize sharded')
+    def serialize_sharded(self, output_dir):
+        """Serialize this class into a small index file and one shard file per context, so the web application only
+        has to load the contexts it shows. Returns the list of written paths.
+
+        The index 'APP-NAME_VERSION_OS.shards.json' has the same format as the regular .json file, but its "contexts"
+        only has the default context. A "shards" list describes every context:
+            {"context" : "NAME", "file" : "APP-NAME_VERSION_OS.shards/N.json", "size" : BYTES, "sha1" : "HASH",
+             "shortcuts" : COUNT}
+        A shard file holds the data of one context, like "contexts" does: {"NAME" : {...}}
+        The "source" of the index identifies the .json file like the search index does (see search.get_source()), so
+        serialize() has to write it first. serialize() also removes the sharded output of a previous export.
+        """
+
+        assert os.path.isdir(output_dir), "The output dir is not a directory"
+        assert os.path.exists(self.get_output_path(output_dir)), \
+            "The ApplicationConfig must be serialized before its sharded output"
+        index_path, shards_dir = self.get_sharded_output_paths(output_dir)
+        if not self._serialize_variant('sharded ApplicationConfig', index_path, ApplicationConfig._write_sharded):
+            return []
+        return [index_path] + sorted(glob.glob(os.path.join(shards_dir, '*.json')))
+
+    def _write_sharded(self, index_path):
+        base_path = index_path[:-len(SHARDS_INDEX_EXTENSION)]
+        shards_dir = base_path + SHARDS_DIR_EXTENSION
+        source = search.get_source(self, base_path + '.json')
+
+        # Remove the shards of a previous export, the contexts could have changed
+        if os.path.isdir(shards_dir):
+            for path in glob.glob(os.path.join(shards_dir, '*.json')):
+                os.remove(path)
+        else:
+            os.makedirs(shards_dir)
+
+        shards = []
+        contexts = self._get_sorted_contexts()
+        for i, context in enumerate(contexts):
+            with trace_span('serialize shard', context=context.name):
+                text = u'{\n' + u''.join(context.iter_serialized(u'    ')) + u'\n}\n'
+                data = text.encode('utf-8')
+
+                shard_path = os.path.join(shards_dir, '%d.json' % i)
+                with open(shard_path, 'wb') as f:
+                    f.write(data)
+
+            shard_file = os.path.basename(shards_dir) + '/' + os.path.basename(shard_path)
+            shards.append(u'{"context" : "%s", "file" : "%s", "size" : %d, "sha1" : "%s", "shortcuts" : %d}' % (
+                context.name, shard_file, len(data), hashlib.sha1(data).hexdigest(), len(context.shortcuts)))
+
+        with io.open(index_path, mode='w', encoding='utf-8', newline='') as f:
+            self._write_header(f, self.get_mods_used())
+            f.write(u'    "source" : %s,\n' % json.dumps(source, ensure_ascii=False))
+            f.write(u'    "shards" : [\n        ')
+            f.write(u',\n        '.join(shards))
+            f.write(u'\n    ],\n')
+
+            # The default context is embedded, so the first render only needs the index
+            f.write(u'    "contexts" : {\n')
+            for context in contexts:
+                if context.name == self.default_context_name:
+                    f.writelines(context.iter_serialized(u'        '))
+                    f.write(u'\n')
+            f.write(u'    }\n')
+            f.write(u'}\n')
+
+    @trace_span('serialize')
+    @profile_stage('serialize')
+    def serialize(self, output_dir, regenerate_apps_js=True):
+        """Serialize this class into a .json file with name: 'APP-NAME_VERSION_OS.json'
+        Returns True for succes, False for failure
+
+        :param regenerate_apps_js: set to False when the caller rebuilds apps.js itself after exporting many apps
+        """
+
         assert os.path.isdir(output_dir), "The output dir is not a directory"
         assert self.os in VALID_OS_NAMES, "The application Operating system must be one of these: " + str(VALID_OS_NAMES)
         assert self.version is not None and len(self.version) > 0, "The application version must be assigned"
@@ -189,52 +421,167 @@ class ApplicationConfig(object):
             log.warn("Cannot export ApplicationConfig because it is empty")
             return False
 
-        # todo: handle colons in name
-        appname_for_file = self.name.lower().replace(' ', '-')
-        output_path = os.path.join(output_dir, "{0}_{1}_{2}.json".format(appname_for_file, self.version, self.os).lower())
+        output_path = self.get_output_path(output_dir)
         log.info('serializing ApplicationConfig to %s', output_path)
 
         mods_used = self.get_mods_used()
 
-        output_str = u'{\n'
-        output_str += u'    "name" : "%s",\n' % self.name
-        output_str += u'    "version" : "%s",\n' % self.version
-        output_str += u'    "os" : "%s",\n' % self.os
-        output_str += u'    "mods_used" : %s,\n' % json.dumps(mods_used)
-        output_str += u'    "default_context" : "%s",\n' % self.default_context_name
-        output_str += u'    "contexts" : {\n'
+        # Stream the output straight to the file, context by context
+        with io.open(output_path, mode='w', encoding='utf-8', newline='') as f:
+            self._write_header(f, mods_used)
+            f.write(u'    "contexts" : {\n')
 
-        contexts_str = u""
-
-        contexts = list(self.contexts.values())
-        contexts.sort(key=lambda c: c.name)
-        for context in contexts:
             # don't serialize empty contexts
-            if len(context.shortcuts) == 0:
+            context_separator = u''
+            for context in self._get_sorted_contexts():
+                with trace_span('serialize context', context=context.name):
+                    f.write(context_separator)
+                    f.writelines(context.iter_serialized(u'        '))
+                context_separator = u',\n'
+
+            f.write(u'\n')
+            f.write(u'    }\n')
+            f.write(u'}\n')
+
+        # The web application loads a sharded output instead of this file, remove the one of a previous export. The
+        # caller writes it again with serialize_sharded()
+        index_path, shards_dir = self.get_sharded_output_paths(output_dir)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        if os.path.isdir(shards_dir):
+            shutil.rmtree(shards_dir)
+
+        # Regenerate apps.js file, this file has a list of all application json files
+        #  so the web application knows what apps exist
+        if regenerate_apps_js:
+            ExportSession.regenerate_site_apps_js()
+
+        return True
+
+
+class ExportSession(object):
+    """Context manager that batches apps.js regeneration when serializing many ApplicationConfigs.
+
+    Inside a session, ApplicationConfig.serialize() only queues the regeneration of apps.js.
+    It is regenerated once when the outermost session exits, also when an exception was raised. The exception of the
+    session is the one that is raised then, a failure to regenerate apps.js is only logged.
+
+        with shmaplib.ExportSession():
+            app_windows.serialize(DIR_CONTENT_GENERATED)
+            app_mac.serialize(DIR_CONTENT_GENERATED)
+    """
+
+    _depth = 0
+    _apps_js_queued = False
+
+    def __enter__(self):
+        ExportSession._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        ExportSession._depth -= 1
+        if ExportSession._depth == 0 and ExportSession._apps_js_queued:
+            ExportSession._apps_js_queued = False
+            if exc_type is None:
+                regenerate_site_apps_js()
+            else:
+                # List the apps that were serialized before the error, without hiding it
+                try:
+                    regenerate_site_apps_js()
+                except Exception:
+                    log.exception("Failed to regenerate apps.js")
+        return False
+
+    @staticmethod
+    def is_active():
+        return ExportSession._depth > 0
+
+    @staticmethod
+    def regenerate_site_apps_js():
+        """Regenerates apps.js now, or queues it when a session is active"""
+        if ExportSession.is_active():
+            ExportSession._apps_js_queued = True
+        else:
+            regenerate_site_apps_js()
+
+
+class AppsManifest(object):
+    """Persistent list of the generated application files with their name, version and os.
+
+    Each entry also stores the modification time and size of the file, which is used to detect changes.
+    This way, regenerating apps.js only needs to read the files that are new or have changed.
+    With manifest_file set to None, the manifest is kept in memory only.
+    """
+
+    def __init__(self, manifest_file=APPS_MANIFEST_FILE):
+        super(AppsManifest, self).__init__()
+        self.manifest_file = manifest_file
+        self.entries = collections.OrderedDict()
+        self.changed = False
+
+    def load(self):
+        self.entries = collections.OrderedDict()
+        self.changed = False
+        if self.manifest_file is None or not os.path.exists(self.manifest_file):
+            return
+
+        try:
+            with codecs.open(self.manifest_file, encoding='utf-8') as f:
+                self.entries = json.load(f, object_pairs_hook=collections.OrderedDict)
+        except ValueError:
+            log.warn("Apps manifest file '%s' is corrupt, ignoring it", self.manifest_file)
+
+    def save(self):
+        if not self.changed or self.manifest_file is None:
+            return
+
+        manifest_dir = os.path.dirname(self.manifest_file)
+        if not os.path.exists(manifest_dir):
+            os.makedirs(manifest_dir)
+
+        with codecs.open(self.manifest_file, encoding='utf-8', mode='w') as f:
+            json.dump(self.entries, f, indent=4)
+        self.changed = False
+
+    def update(self, generated_dir):
+        """Syncs the manifest with the application files in generated_dir"""
+
+        entries = collections.OrderedDict()
+        for path in glob.glob(os.path.join(generated_dir, "*.json")):
+            # Skip the minified variants of application files
+            if path.endswith(GENERATED_SIDECAR_EXTENSIONS):
                 continue
 
-            ctx_str = u'        ' + context.serialize()
-            ctx_str = ctx_str.replace(u'\n', u'\n        ')
+            filename = os.path.basename(path)
+            stat = os.stat(path)
 
-            contexts_str += ctx_str + u',\n'
-        contexts_str = contexts_str.rstrip(u',\n')
+            entry = self.entries.get(filename)
+            if entry is None or entry["mtime"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+                with open(path, encoding="utf8") as appdata_file:
+                    log.debug('...adding %s', path)
+                    appdata = json.load(appdata_file)
 
-        output_str += contexts_str + u'\n'
-        output_str += u'    }\n'
-        output_str += u'}\n'
+                entry = {
+                    "name": appdata["name"],
+                    "version": appdata["version"],
+                    "os": appdata["os"],
+                    "mtime": stat.st_mtime_ns,
+                    "size": stat.st_size
+                }
+                self.changed = True
 
-        # Write to file
-        f = codecs.open(output_path, encoding='utf-8', mode='w+')
-        f.write(output_str)
-        f.close()
+            entries[filename] = entry
 
-        # Regenerate apps.js file, this file has a list of all application json files
-        #  so the web application knows what apps exist
-        regenerate_site_apps_js()
+        if list(entries.keys()) != list(self.entries.keys()):
+            self.changed = True
+        self.entries = entries
 
 
-def regenerate_site_apps_js():
-    log.debug("REGENERATING FILE " + CONTENT_APPS_JS_FILE)
+@trace_span('regenerate apps.js')
+@profile_stage('apps_js')
+def regenerate_site_apps_js(generated_dir=DIR_CONTENT_GENERATED, apps_js_path=CONTENT_APPS_JS_FILE,
+                            manifest_file=APPS_MANIFEST_FILE):
+    log.debug("REGENERATING FILE " + apps_js_path)
 
     class SiteAppDatas:
         def __init__(self):
@@ -270,24 +617,21 @@ def regenerate_site_apps_js():
 
             return json_str
 
-    apps_js_file = open(CONTENT_APPS_JS_FILE, 'w')
+    apps_js_file = open(apps_js_path, 'w')
     apps_js_file.write("// DO NOT EDIT THIS FILE\n")
     apps_js_file.write("// This file is automatically generated when new ApplicationConfigs are serialized\n")
     apps_js_file.write("// look in /shmaplib/appdata.py at regenerate_site_apps_js()\n\n")
 
+    # Only application files that changed since the last time are read again
+    manifest = AppsManifest(manifest_file)
+    manifest.load()
+    manifest.update(generated_dir)
+    manifest.save()
+
     # Generate JSON for all applications in the specific format we want it
     app_sitedata = SiteAppDatas()
-    for path in glob.glob(os.path.join(DIR_CONTENT_GENERATED, "*.json")):
-        with open(path, encoding="utf8") as appdata_file:
-            log.debug('...adding %s', path)
-            appdata = json.load(appdata_file)
-
-            app_name = appdata["name"]
-            app_version = appdata["version"]
-            app_os = appdata["os"]
-
-            filename = os.path.basename(path)
-            app_sitedata.add_app(filename, app_name, app_version, app_os)
+    for filename, entry in manifest.entries.items():
+        app_sitedata.add_app(filename, entry["name"], entry["version"], entry["os"])
 
     # Write json for all application data
     apps_json = app_sitedata.to_json()
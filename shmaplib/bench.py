@@ -0,0 +1,324 @@
+"""Benchmarks the intermediate -> generated pipeline for every file under sources/*/intermediate.
+
+Each file is run through the same stages as utils/export_intermediate_data.py:
+- load:           IntermediateShortcutData.load
+- parse_windows:  IntermediateDataExporter.parse for Windows
+- parse_mac:      IntermediateDataExporter.parse for MacOS
+- serialize:      ApplicationConfig.serialize for all OS's
+After all files are done, regenerate_site_apps_js is timed with a cold and a warm manifest.
+
+Generated files are written to a temporary directory, content/generated is left untouched.
+
+Usage (from the repository root):
+    python -m shmaplib.bench -o results.json
+    python -m shmaplib.bench -o results.json --compare baseline.json
+    python -m shmaplib.bench --input results.json --compare baseline.json
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import traceback
+import collections
+import tracemalloc
+
+from .constants import DIR_ROOT, DIR_SOURCES, OS_WINDOWS, OS_MAC
+from .intermediate import IntermediateShortcutData, IntermediateDataExporter, get_json_backend
+from .appdata import regenerate_site_apps_js
+from .cache import get_code_version
+from .logger import getlog
+log = getlog()
+
+
+BENCH_FORMAT_VERSION = 1
+
+# Differences smaller than these are considered noise when comparing results
+MIN_TIME_DELTA = 0.002
+MIN_MEMORY_DELTA = 256 * 1024
+
+
+class _StageRecorder(object):
+    """Runs pipeline stages and records their wall time, and optionally their peak memory"""
+
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.times = collections.OrderedDict()
+        self.peak_memory = collections.OrderedDict()
+
+    def run(self, stage_name, func):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        result = func()
+        self.times[stage_name] = time.perf_counter() - start
+
+        if self.trace_memory:
+            self.peak_memory[stage_name] = tracemalloc.get_traced_memory()[1] - memory_before
+        return result
+
+
+def _load_intermediate(source):
+    idata = IntermediateShortcutData()
+    idata.load(source)
+    return idata
+
+
+def _serialize_all(app_configs, output_dir):
+    for app_config in app_configs:
+        app_config.serialize(output_dir, regenerate_apps_js=False)
+
+
+def _run_pipeline(source, output_dir, trace_memory):
+    """Runs all stages once for a source file.
+    Returns the stage recorder, the number of intermediate shortcuts and the number of generated shortcuts"""
+
+    recorder = _StageRecorder(trace_memory)
+    idata = recorder.run('load', lambda: _load_intermediate(source))
+
+    # The exporter loads the file again, this is not part of the measurements
+    exporter = IntermediateDataExporter(source)
+    if exporter.data_windows:
+        recorder.run('parse_windows', lambda: exporter.parse_os(OS_WINDOWS))
+    if exporter.data_mac:
+        recorder.run('parse_mac', lambda: exporter.parse_os(OS_MAC))
+
+    app_configs = [c for c in (exporter.data_windows, exporter.data_mac) if c]
+    recorder.run('serialize', lambda: _serialize_all(app_configs, output_dir))
+
+    num_intermediate = sum(len(c.shortcuts) for c in idata.contexts)
+    num_generated = sum(len(ctx.shortcuts) for c in app_configs for ctx in c.contexts.values())
+    return recorder, num_intermediate, num_generated
+
+
+def _measure(func, repeat):
+    """Runs func repeat times and once more with tracemalloc enabled.
+    Returns the last result, the best time for each stage and the peak memory of each stage"""
+
+    best_times = collections.OrderedDict()
+    for i in range(repeat):
+        recorder = func(False)[0]
+        for stage_name, stage_time in recorder.times.items():
+            best_times[stage_name] = min(stage_time, best_times.get(stage_name, stage_time))
+
+    tracemalloc.start()
+    try:
+        result = func(True)
+    finally:
+        tracemalloc.stop()
+
+    return result, best_times, result[0].peak_memory
+
+
+def _make_stage_results(best_times, peak_memory, num_items):
+    stages = collections.OrderedDict()
+    for stage_name, stage_time in best_times.items():
+        stages[stage_name] = {
+            "time": stage_time,
+            "peak_memory": peak_memory.get(stage_name),
+            "shortcuts_per_sec": num_items / stage_time if stage_time > 0 else None
+        }
+    return stages
+
+
+def bench_file(source, output_dir, repeat):
+    """Benchmarks all pipeline stages for a single intermediate file"""
+
+    def run(trace_memory):
+        return _run_pipeline(source, output_dir, trace_memory)
+
+    (recorder, num_intermediate, num_generated), best_times, peak_memory = _measure(run, repeat)
+    total_time = sum(best_times.values())
+    return {
+        "shortcuts": num_intermediate,
+        "generated_shortcuts": num_generated,
+        "total_time": total_time,
+        "shortcuts_per_sec": num_intermediate / total_time if total_time > 0 else None,
+        "peak_memory": max(peak_memory.values()),
+        "stages": _make_stage_results(best_times, peak_memory, num_intermediate)
+    }
+
+
+def bench_apps_js(output_dir, repeat):
+    """Benchmarks regenerate_site_apps_js for all files in output_dir, with a cold and a warm manifest"""
+
+    apps_js_path = os.path.join(output_dir, 'apps.js')
+    manifest_file = os.path.join(output_dir, 'manifest', 'apps_manifest.json')
+    num_apps = len(glob.glob(os.path.join(output_dir, '*.json')))
+
+    def run(trace_memory):
+        recorder = _StageRecorder(trace_memory)
+        if os.path.exists(manifest_file):
+            os.remove(manifest_file)
+        recorder.run('apps_js_cold', lambda: regenerate_site_apps_js(output_dir, apps_js_path, manifest_file))
+        recorder.run('apps_js_warm', lambda: regenerate_site_apps_js(output_dir, apps_js_path, manifest_file))
+        return recorder,
+
+    result, best_times, peak_memory = _measure(run, repeat)
+    return {
+        "apps": num_apps,
+        "stages": _make_stage_results(best_times, peak_memory, num_apps)
+    }
+
+
+def run_benchmarks(source_files, repeat=3):
+    """Runs the benchmarks for all source files, returns the results as a json serializable dict"""
+
+    results = collections.OrderedDict()
+    results["format_version"] = BENCH_FORMAT_VERSION
+    results["code_version"] = get_code_version()
+    results["python"] = platform.python_version()
+    results["platform"] = platform.platform()
+    results["json_backend"] = get_json_backend()
+    results["repeat"] = repeat
+    results["files"] = collections.OrderedDict()
+
+    output_dir = tempfile.mkdtemp(prefix='shmaplib_bench_')
+    try:
+        for source in source_files:
+            file_key = os.path.relpath(source, DIR_ROOT).replace(os.sep, '/')
+            try:
+                results["files"][file_key] = bench_file(source, output_dir, repeat)
+            except Exception:
+                results["files"][file_key] = {"error": traceback.format_exc().strip().splitlines()[-1]}
+
+        results["apps_js"] = bench_apps_js(output_dir, repeat)
+    finally:
+        shutil.rmtree(output_dir)
+
+    file_results = [r for r in results["files"].values() if "error" not in r]
+    total_shortcuts = sum(r["shortcuts"] for r in file_results)
+    total_time = sum(r["total_time"] for r in file_results)
+    results["total"] = {
+        "files": len(file_results),
+        "failed_files": len(results["files"]) - len(file_results),
+        "shortcuts": total_shortcuts,
+        "time": total_time,
+        "shortcuts_per_sec": total_shortcuts / total_time if total_time > 0 else None
+    }
+    return results
+
+
+def _iter_stage_results(results):
+    """Yields (name, stage_name, stage_result) for all stages in a results dict"""
+    for file_key, file_result in results["files"].items():
+        for stage_name, stage_result in file_result.get("stages", {}).items():
+            yield file_key, stage_name, stage_result
+    for stage_name, stage_result in results.get("apps_js", {}).get("stages", {}).items():
+        yield "apps.js", stage_name, stage_result
+
+
+def compare_results(baseline, results, threshold=0.1):
+    """Compares results against a baseline.
+    Returns a list of regression descriptions, a stage is a regression when it is slower or uses more memory
+    than the baseline by more than the threshold (0.1 is 10%) and more than the noise margin."""
+
+    baseline_stages = dict(((name, stage_name), r) for name, stage_name, r in _iter_stage_results(baseline))
+
+    regressions = []
+    for name, stage_name, stage_result in _iter_stage_results(results):
+        base = baseline_stages.get((name, stage_name))
+        if base is None:
+            continue
+
+        base_time, cur_time = base["time"], stage_result["time"]
+        if cur_time > base_time * (1.0 + threshold) and cur_time - base_time > MIN_TIME_DELTA:
+            regressions.append("%s [%s] time: %.2fms -> %.2fms (+%.0f%%)" % (
+                name, stage_name, base_time * 1000, cur_time * 1000, (cur_time / base_time - 1.0) * 100))
+
+        base_memory, cur_memory = base.get("peak_memory"), stage_result.get("peak_memory")
+        if base_memory and cur_memory and cur_memory > base_memory * (1.0 + threshold) and \
+                cur_memory - base_memory > MIN_MEMORY_DELTA:
+            regressions.append("%s [%s] peak memory: %.1fKB -> %.1fKB (+%.0f%%)" % (
+                name, stage_name, base_memory / 1024.0, cur_memory / 1024.0, (float(cur_memory) / base_memory - 1.0) * 100))
+
+    for file_key, file_result in results["files"].items():
+        if "error" in file_result and "error" not in baseline["files"].get(file_key, {"error": None}):
+            regressions.append("%s failed: %s" % (file_key, file_result["error"]))
+
+    return regressions
+
+
+def print_summary(results):
+    row_format = "%-60s %9s %9s %9s %9s %9s %12s %10s"
+    print(row_format % ("file", "shortcuts", "load", "parse win", "parse mac", "serialize", "shortcuts/s", "peak mem"))
+
+    def ms(stages, stage_name):
+        if stage_name not in stages:
+            return "-"
+        return "%.1fms" % (stages[stage_name]["time"] * 1000)
+
+    for file_key, r in results["files"].items():
+        if "error" in r:
+            print("%-60s ERROR: %s" % (file_key, r["error"]))
+            continue
+        stages = r["stages"]
+        print(row_format % (file_key, r["shortcuts"], ms(stages, 'load'), ms(stages, 'parse_windows'),
+                            ms(stages, 'parse_mac'), ms(stages, 'serialize'),
+                            "%.0f" % r["shortcuts_per_sec"], "%.1fKB" % (r["peak_memory"] / 1024.0)))
+
+    apps_js_stages = results["apps_js"]["stages"]
+    print("apps.js (%d apps): cold manifest %s, warm manifest %s" % (
+        results["apps_js"]["apps"], ms(apps_js_stages, 'apps_js_cold'), ms(apps_js_stages, 'apps_js_warm')))
+
+    total = results["total"]
+    if total["shortcuts_per_sec"] is not None:
+        print("total: %d files, %d shortcuts in %.1fms (%.0f shortcuts/s), %d failed" % (
+            total["files"], total["shortcuts"], total["time"] * 1000, total["shortcuts_per_sec"], total["failed_files"]))
+    else:
+        print("total: %d files, %d failed" % (total["files"], total["failed_files"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the intermediate to generated data pipeline.")
+    parser.add_argument('-o', '--output', default='bench_results.json', help="Output file for the results (json)")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="Number of timed runs per file, the best time is kept")
+    parser.add_argument('-i', '--input', help="Don't run the benchmarks, use these results instead (for --compare)")
+    parser.add_argument('-c', '--compare', help="Baseline results file to check for regressions")
+    parser.add_argument('-t', '--threshold', type=float, default=0.1, help="Relative slowdown flagged as a regression (default 0.1)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Show the log output of the pipeline")
+    parser.add_argument('files', nargs='*', help="Intermediate files to benchmark (default: all under sources/*/intermediate)")
+    args = parser.parse_args()
+
+    # The pipeline logs lots of warnings about the data, that's not what we're measuring
+    log.setLevel(logging.INFO if args.verbose else logging.CRITICAL)
+
+    if args.input:
+        with open(args.input) as f:
+            results = json.load(f)
+    else:
+        source_files = [os.path.abspath(p) for p in args.files]
+        if not source_files:
+            source_files = sorted(glob.glob(os.path.join(DIR_SOURCES, '*', 'intermediate', '*.json')))
+
+        results = run_benchmarks(source_files, max(args.repeat, 1))
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print_summary(results)
+        print("results written to %s" % args.output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        regressions = compare_results(baseline, results, args.threshold)
+        for regression in regressions:
+            print("REGRESSION: " + regression)
+        if regressions:
+            print("%d regressions compared to %s" % (len(regressions), args.compare))
+            return 1
+        print("no regressions compared to %s" % args.compare)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
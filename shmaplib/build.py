@@ -0,0 +1,418 @@
+"""Finds the steps that build the site content from the sources, and remembers which of them are up to date.
+
+There are two kinds of steps:
+- raw to intermediate: a raw_to_intermediate script that converts the files under sources/APP/raw to an intermediate
+  file. These steps are declared in a build.json file in the source directory, see RawStep.
+- intermediate to generated: every sources/APP/intermediate/*.json file is exported to content/generated, these are
+  tracked by the ExportCache.
+
+Intermediate files are hand-edited after they were converted, so a raw step never overwrites an intermediate file
+that it didn't write itself, or that was changed since (see BuildState.get_raw_step_status).
+
+build.json example (paths are relative to the source directory):
+    {
+        "raw_to_intermediate": [
+            {
+                "script": "raw_to_intermediate.py",
+                "inputs": ["raw/lightroom_v5.4.html"],
+                "output": "intermediate/lightroom_v5.4.json",
+                "version": "v5.4",
+                "default_context": "Global Context"
+            }
+        ]
+    }
+
+The script is run from the source directory as `python SCRIPT -o OUTPUT ARGS...`. ARGS are the inputs, unless the step
+has an "args" list. Inputs can be files or directories.
+
+The version and default context of an intermediate file are set by hand, the scripts leave them empty or guess. After
+a script ran, they are set to the values of the step ("version" and "default_context" are optional), or else kept
+from the intermediate file the script replaced.
+"""
+
+import os
+import sys
+import json
+import glob
+import codecs
+import queue
+import hashlib
+import traceback
+import subprocess
+import multiprocessing
+
+from .constants import DIR_ROOT, DIR_SOURCES, DIR_CACHE, DIR_CONTENT_GENERATED
+from .cache import hash_file
+from .appdata import ExportSession
+from .intermediate import IntermediateShortcutData, ExportOptions
+from .export import init_worker, export_intermediate_file_worker, handle_export_result, get_log_records, \
+    replay_log_records
+from .logger import getlog
+log = getlog()
+
+
+BUILD_MANIFEST_FILENAME = "build.json"
+BUILD_STATE_FILE = os.path.join(DIR_CACHE, "build_state.json")
+
+# Status of a raw step, see BuildState.get_raw_step_status()
+RAW_STEP_UP_TO_DATE = 'up-to-date'
+RAW_STEP_STALE = 'stale'
+RAW_STEP_EDITED = 'edited'
+RAW_STEP_UNTRACKED = 'untracked'
+
+# Fields of an intermediate file that are set by hand, see RawStep.apply_metadata()
+METADATA_FIELDS = ("version", "default_context")
+
+
+def _key(path):
+    return os.path.relpath(os.path.abspath(path), DIR_ROOT).replace(os.sep, '/')
+
+
+def hash_path(path):
+    """Returns the sha1 hex digest of a file, or of the names and contents of all files in a directory"""
+
+    if not os.path.isdir(path):
+        return hash_file(path)
+
+    sha = hashlib.sha1()
+    for dir_path, dir_names, file_names in os.walk(path):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            file_path = os.path.join(dir_path, file_name)
+            sha.update(os.path.relpath(file_path, path).replace(os.sep, '/').encode('utf-8'))
+            sha.update(hash_file(file_path).encode('ascii'))
+    return sha.hexdigest()
+
+
+class RawStep(object):
+    """A raw_to_intermediate script run, declared in the build.json file of a source directory"""
+
+    def __init__(self, source_dir, script, inputs, output, args=None, metadata=None):
+        """:param metadata: dict of the METADATA_FIELDS values of the intermediate file, see apply_metadata()"""
+        super(RawStep, self).__init__()
+        self.source_dir = os.path.normpath(os.path.abspath(source_dir))
+        self.script = os.path.normpath(os.path.join(self.source_dir, script))
+        self.inputs = [os.path.normpath(os.path.join(self.source_dir, p)) for p in inputs]
+        self.output = os.path.normpath(os.path.join(self.source_dir, output))
+        self.args = list(args) if args is not None else list(inputs)
+        self.metadata = dict(metadata or {})
+
+    @property
+    def key(self):
+        """The intermediate file path relative to the repository root, each intermediate file has one step"""
+        return _key(self.output)
+
+    def get_input_hashes(self):
+        """Returns a dict of the hash of the script and of each input, keyed by their path"""
+        return dict((_key(p), hash_path(p)) for p in [self.script] + self.inputs)
+
+    def get_command(self):
+        return [sys.executable, self.script, '-o', self.output] + self.args
+
+    def run(self):
+        """Runs the script and returns a tuple of (returncode, output), output has the stdout and stderr lines"""
+
+        # The scripts import shmaplib from this repository, wherever the source directory is
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(p for p in (DIR_ROOT, env.get('PYTHONPATH')) if p)
+
+        process = subprocess.run(self.get_command(), cwd=self.source_dir, env=env, stdout=subprocess.PIPE,
+                                 stderr=subprocess.STDOUT)
+        return process.returncode, process.stdout.decode('utf-8', 'replace')
+
+    def read_metadata(self):
+        """Returns a dict of the METADATA_FIELDS values of the current intermediate file, empty when there is none"""
+
+        if not os.path.exists(self.output):
+            return {}
+
+        try:
+            with codecs.open(self.output, encoding='utf-8') as f:
+                data = json.load(f)
+        except ValueError:
+            return {}
+        return dict((name, data.get(name, "")) for name in METADATA_FIELDS)
+
+    def apply_metadata(self, previous_metadata):
+        """Sets the METADATA_FIELDS of the intermediate file the script wrote to the values of the step, or else to
+        previous_metadata (see read_metadata()). Fields without either keep the value of the script.
+        Returns the names of the fields that are empty"""
+
+        idata = IntermediateShortcutData()
+        idata.load(self.output)
+
+        changed = False
+        missing = []
+        for name in METADATA_FIELDS:
+            value = self.metadata.get(name) or previous_metadata.get(name)
+            if value and value != getattr(idata, name):
+                setattr(idata, name, value)
+                changed = True
+            elif not getattr(idata, name):
+                missing.append(name)
+
+        if changed:
+            idata.serialize(self.output)
+        return missing
+
+
+def read_build_manifest(source_dir):
+    """Returns the RawSteps of a source directory, none when it doesn't have a build.json file.
+    Raises ValueError when the file is invalid."""
+
+    manifest_file = os.path.join(source_dir, BUILD_MANIFEST_FILENAME)
+    if not os.path.exists(manifest_file):
+        return []
+
+    with codecs.open(manifest_file, encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    steps = []
+    for step in manifest.get("raw_to_intermediate", []):
+        for name in ("script", "inputs", "output"):
+            if name not in step:
+                raise ValueError("Missing '%s' in a raw_to_intermediate step of %s" % (name, manifest_file))
+        metadata = dict((name, step[name]) for name in METADATA_FIELDS if name in step)
+        steps.append(RawStep(source_dir, step["script"], step["inputs"], step["output"], step.get("args"), metadata))
+    return steps
+
+
+def discover_raw_steps(sources_dir=DIR_SOURCES):
+    """Returns the RawSteps of all source directories, sorted by output path"""
+
+    steps = []
+    for source_dir in sorted(glob.glob(os.path.join(sources_dir, '*', ''))):
+        steps.extend(read_build_manifest(source_dir))
+
+    outputs = set()
+    for step in steps:
+        if step.output in outputs:
+            raise ValueError("Intermediate file '%s' is the output of more than one step" % step.key)
+        outputs.add(step.output)
+
+    steps.sort(key=lambda s: s.output)
+    return steps
+
+
+def discover_intermediate_files(sources_dir=DIR_SOURCES):
+    """Returns all intermediate files, including the ones a raw step has yet to write"""
+
+    file_paths = set(os.path.normpath(p) for p in glob.glob(os.path.join(sources_dir, '*', 'intermediate', '*.json')))
+    file_paths.update(step.output for step in discover_raw_steps(sources_dir))
+    return sorted(file_paths)
+
+
+class BuildState(object):
+    """Remembers the raw steps that were run, like the ExportCache does for exported intermediate files.
+
+    An entry is keyed by the intermediate file path (relative to the repository root) and stores:
+    - the hashes of the script and the inputs of the step
+    - the hash of the intermediate file
+    - whether the intermediate file was written by the step, or was there before the step was tracked
+    """
+
+    def __init__(self, state_file=BUILD_STATE_FILE):
+        super(BuildState, self).__init__()
+        self.state_file = state_file
+        self.entries = {}
+
+    def load(self):
+        self.entries = {}
+        if not os.path.exists(self.state_file):
+            return
+
+        try:
+            with codecs.open(self.state_file, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except ValueError:
+            log.warn("Build state file '%s' is corrupt, ignoring it", self.state_file)
+
+    def save(self):
+        state_dir = os.path.dirname(self.state_file)
+        if not os.path.exists(state_dir):
+            os.makedirs(state_dir)
+
+        with codecs.open(self.state_file, encoding='utf-8', mode='w') as f:
+            json.dump(self.entries, f, indent=4, sort_keys=True)
+
+    def get_raw_step_status(self, step, input_hashes):
+        """Returns the status of a raw step:
+        - RAW_STEP_UP_TO_DATE: the inputs didn't change since the step was run
+        - RAW_STEP_STALE: the step has to run, its intermediate file is missing or was written by it and is untouched
+        - RAW_STEP_EDITED: the inputs changed, but running the step would overwrite changes to the intermediate file
+        - RAW_STEP_UNTRACKED: the intermediate file exists, but the step isn't tracked yet. These files were converted by
+          hand and hand-edited after, see track()
+        """
+
+        if not os.path.exists(step.output):
+            return RAW_STEP_STALE
+
+        entry = self.entries.get(step.key)
+        if entry is None:
+            return RAW_STEP_UNTRACKED
+
+        if entry["inputs"] == input_hashes:
+            return RAW_STEP_UP_TO_DATE
+        if entry["generated"] and entry["output_hash"] == hash_file(step.output):
+            return RAW_STEP_STALE
+        return RAW_STEP_EDITED
+
+    def update(self, step, input_hashes, generated=True):
+        self.entries[step.key] = {
+            "inputs": input_hashes,
+            "output_hash": hash_file(step.output),
+            "generated": generated
+        }
+
+    def track(self, step, input_hashes):
+        """Tracks an existing intermediate file that the step didn't write, as up to date with the current inputs"""
+        self.update(step, input_hashes, generated=False)
+
+
+def run_raw_step_worker(step):
+    """Runs a raw step inside a worker process that was set up by export.init_worker().
+    Returns a tuple of (step, log_records, error), error is None when the step succeeded"""
+
+    get_log_records()
+
+    error = None
+    try:
+        log.info("Converting raw files to: %s", step.key)
+        previous_metadata = step.read_metadata()
+        returncode, output = step.run()
+        for line in output.splitlines():
+            log.debug('    %s', line)
+
+        if returncode != 0:
+            error = "%s exited with code %d:\n%s" % (os.path.basename(step.script), returncode, output)
+        elif not os.path.exists(step.output):
+            error = "%s didn't write %s:\n%s" % (os.path.basename(step.script), step.key, output)
+        else:
+            missing = step.apply_metadata(previous_metadata)
+            if missing:
+                error = "%s has no %s, add them to the step in %s" % (
+                    step.key, ' and '.join(missing), os.path.join(step.source_dir, BUILD_MANIFEST_FILENAME))
+    except Exception:
+        error = traceback.format_exc()
+
+    return step, get_log_records(), error
+
+
+def plan_raw_steps(state, overwrite_intermediate=False, dry_run=False, sources_dir=DIR_SOURCES):
+    """Returns a list of (step, input_hashes) of the raw steps that have to run, and a list of (step, error) of the
+    steps that can't run.
+
+    Intermediate files that aren't tracked yet are tracked as they are, unless dry_run is set.
+    """
+
+    tasks = []
+    failures = []
+    for step in discover_raw_steps(sources_dir):
+        missing = [p for p in [step.script] + step.inputs if not os.path.exists(p)]
+        if missing:
+            error = "Missing inputs: %s" % ', '.join(missing)
+            log.error("Can't convert raw files to %s. %s", step.key, error)
+            failures.append((step, error))
+            continue
+
+        input_hashes = step.get_input_hashes()
+        status = state.get_raw_step_status(step, input_hashes)
+        if status == RAW_STEP_UNTRACKED:
+            if dry_run:
+                log.info("Would track the existing intermediate file: %s", step.key)
+            else:
+                log.info("Tracking the existing intermediate file: %s", step.key)
+                state.track(step, input_hashes)
+        elif status == RAW_STEP_EDITED and not overwrite_intermediate:
+            log.warning("Not converting raw files to %s: the raw files have changed, but so has the intermediate file. "
+                        "Merge the changes by hand, or use --overwrite-intermediate", step.key)
+        elif status != RAW_STEP_UP_TO_DATE:
+            tasks.append((step, input_hashes))
+    return tasks, failures
+
+
+def build_content(jobs, cache, state, explicit_numpad_mode=False, overwrite_intermediate=False, dry_run=False,
+                  sources_dir=DIR_SOURCES, generated_dir=DIR_CONTENT_GENERATED):
+    """Runs the stale raw steps and exports the intermediate files that changed, in a pool of worker processes.
+
+    An intermediate file is exported as soon as the raw step that writes it is done, all other files are exported
+    right away. apps.js is regenerated once everything is exported, when generated_dir is content/generated.
+    Returns a list of (path, error) for the steps that failed."""
+
+    raw_tasks, raw_failures = plan_raw_steps(state, overwrite_intermediate, dry_run, sources_dir)
+    failures = [(step.key, error) for step, error in raw_failures]
+
+    # Exports of the files that are written by a raw step have to wait for it
+    input_hashes_by_output = dict((step.output, input_hashes) for step, input_hashes in raw_tasks)
+    file_paths = [p for p in discover_intermediate_files(sources_dir)
+                  if p not in input_hashes_by_output and os.path.exists(p)]
+
+    if dry_run:
+        # Only the json files are exported
+        stale_file_paths = [p for p in file_paths if not cache.is_up_to_date(p, explicit_numpad_mode, ExportOptions())]
+        for step, _ in raw_tasks:
+            log.info("Would convert raw files to: %s", step.key)
+        for file_path in sorted(stale_file_paths + list(input_hashes_by_output)):
+            log.info("Would export: %s", file_path)
+        if not raw_tasks and not stale_file_paths:
+            log.info("Everything is up to date")
+        return failures
+
+    def export_task(file_path):
+        return file_path, False, explicit_numpad_mode, ExportOptions()
+
+    # apps.js lists the files in content/generated only
+    regenerate_apps_js = os.path.abspath(generated_dir) == os.path.abspath(DIR_CONTENT_GENERATED)
+
+    # Results are handled by the main process in the order they finish
+    results = queue.Queue()
+    initargs = (log.level, cache.cache_file, cache.force, None, False, generated_dir)
+    pool = multiprocessing.Pool(jobs, initializer=init_worker, initargs=initargs)
+    num_raw_steps = 0
+    num_exports = 0
+    num_warnings = 0
+
+    with ExportSession():
+        try:
+            def submit(kind, func, arg):
+                pool.apply_async(func, (arg,), callback=lambda result: results.put((kind, result)),
+                                 error_callback=lambda e: results.put(('exception', e)))
+
+            for step, _ in raw_tasks:
+                submit('raw', run_raw_step_worker, step)
+            for file_path in file_paths:
+                submit('export', export_intermediate_file_worker, export_task(file_path))
+            pending = len(raw_tasks) + len(file_paths)
+
+            while pending > 0:
+                kind, result = results.get()
+                pending -= 1
+
+                if kind == 'exception':
+                    raise result
+
+                if kind == 'raw':
+                    step, records, error = result
+                    num_raw_steps += 1
+                    num_warnings += replay_log_records(records)
+                    if error is not None:
+                        log.error("Failed to convert raw files to: %s\n%s", step.key, error)
+                        failures.append((step.key, error))
+                        continue
+
+                    state.update(step, input_hashes_by_output[step.output])
+                    submit('export', export_intermediate_file_worker, export_task(step.output))
+                    pending += 1
+                else:
+                    num_exports += 1
+                    warnings, error = handle_export_result(result, cache, False, regenerate_apps_js)
+                    num_warnings += warnings
+                    if error is not None:
+                        failures.append((result[0], error))
+        finally:
+            pool.close()
+            pool.join()
+
+    log.info("Converted %d raw files and checked %d intermediate files with %d jobs: %d warnings, %d failures",
+             num_raw_steps, num_exports, jobs, num_warnings, len(failures))
+    return failures
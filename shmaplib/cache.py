@@ -0,0 +1,151 @@
+import os
+import json
+import glob
+import hashlib
+import codecs
+
+from .constants import DIR_ROOT, DIR_CACHE
+from . import sqlite
+from .logger import getlog
+log = getlog()
+
+
+EXPORT_CACHE_FILE = os.path.join(DIR_CACHE, "export_cache.json")
+
+
+def hash_file(file_path):
+    """Returns the sha1 hex digest of a file's contents"""
+    sha = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class _CodeVersion(object):
+    value = None
+
+
+def get_code_version():
+    """Returns a hash of all shmaplib source files, any code change invalidates cached exports"""
+
+    if _CodeVersion.value is None:
+        sha = hashlib.sha1()
+        lib_dir = os.path.dirname(os.path.abspath(__file__))
+        for path in sorted(glob.glob(os.path.join(lib_dir, '*.py'))):
+            sha.update(os.path.basename(path).encode('utf-8'))
+            with open(path, 'rb') as f:
+                sha.update(f.read())
+        _CodeVersion.value = sha.hexdigest()
+
+    return _CodeVersion.value
+
+
+class ExportCache(object):
+    """Remembers which intermediate files have been exported, so unchanged files can be skipped.
+
+    An entry is keyed by the intermediate file path (relative to the repository root) and stores:
+    - the hash of the intermediate file
+    - the exporter flags and output options used
+    - the shmaplib code version
+    - the hashes of the generated files it produced
+    - the applications it wrote into the SQLite database, when the export writes one
+
+    An entry is only a hit when all of these still match the files on disk, and the SQLite database still has the data
+    of the applications.
+    Setting force to True turns every lookup into a miss, entries are still updated.
+    """
+
+    def __init__(self, cache_file=EXPORT_CACHE_FILE, force=False):
+        super(ExportCache, self).__init__()
+        self.cache_file = cache_file
+        self.force = force
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(source):
+        return os.path.relpath(os.path.abspath(source), DIR_ROOT).replace(os.sep, '/')
+
+    def load(self):
+        self.entries = {}
+        if not os.path.exists(self.cache_file):
+            return
+
+        try:
+            with codecs.open(self.cache_file, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except ValueError:
+            log.warn("Export cache file '%s' is corrupt, ignoring it", self.cache_file)
+
+    def save(self):
+        cache_dir = os.path.dirname(self.cache_file)
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+        with codecs.open(self.cache_file, encoding='utf-8', mode='w') as f:
+            json.dump(self.entries, f, indent=4, sort_keys=True)
+
+    def get_entry(self, source):
+        return self.entries.get(self._key(source))
+
+    def set_entry(self, source, entry):
+        self.entries[self._key(source)] = entry
+
+    @staticmethod
+    def make_entry(source, explicit_numpad_mode, output_paths, options, sqlite_apps=()):
+        """:param sqlite_apps: (name, version, os) of the applications written into the SQLite database of the options
+        """
+        return {
+            "source_hash": hash_file(source),
+            "explicit_numpad_mode": bool(explicit_numpad_mode),
+            "options": dict(options._asdict()),
+            "code_version": get_code_version(),
+            "outputs": dict((ExportCache._key(p), hash_file(p)) for p in output_paths),
+            "sqlite_apps": [list(app) for app in sqlite_apps]
+        }
+
+    def is_up_to_date(self, source, explicit_numpad_mode, options):
+        """Returns True if the source file was exported before with the same settings and its outputs are untouched.
+        Counts the result as a cache hit or miss.
+
+        :param options: the ExportOptions of the export, they change which files are written
+        """
+
+        entry = self.get_entry(source)
+        up_to_date = not self.force and entry is not None and \
+            entry["explicit_numpad_mode"] == bool(explicit_numpad_mode) and \
+            entry.get("options", {}) == dict(options._asdict()) and \
+            entry["code_version"] == get_code_version() and \
+            entry["source_hash"] == hash_file(source) and \
+            self._outputs_match(entry["outputs"]) and \
+            self._sqlite_apps_match(options.sqlite_db, entry.get("sqlite_apps"))
+
+        if up_to_date:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return up_to_date
+
+    @staticmethod
+    def _outputs_match(outputs):
+        for key, file_hash in outputs.items():
+            path = os.path.join(DIR_ROOT, key)
+            if not os.path.exists(path) or hash_file(path) != file_hash:
+                return False
+        return True
+
+    @staticmethod
+    def _sqlite_apps_match(db_path, sqlite_apps):
+        if not db_path:
+            return True
+        if sqlite_apps is None:
+            return False
+        for name, version, os_name in sqlite_apps:
+            if not sqlite.has_application(db_path, name, version, os_name):
+                return False
+        return True
+
+    def update(self, source, explicit_numpad_mode, output_paths, options, sqlite_apps=()):
+        self.set_entry(source, self.make_entry(source, explicit_numpad_mode, output_paths, options, sqlite_apps))
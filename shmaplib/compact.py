@@ -0,0 +1,148 @@
+"""A compact, columnar variant of the generated application json format.
+
+The generated json repeats every shortcut name and modifier list in full. The compact format stores them once:
+
+{
+    "format": "shmaplib-compact",
+    "format_version": 1,
+    "name": "...", "version": "...", "os": "...", "default_context": "...",
+    "mods_used": ["ALT", "CONTROL", "SHIFT"],      modifier bit i is mods_used[i]
+    "keys": ["A", "B", "F1", ...],                 key names table
+    "names": ["Copy", "Paste", ...],               shortcut names table
+    "contexts": [
+        ["Context Name", [key ids], [mods masks], [name ids]],
+        ...
+    ]
+}
+
+Each context has three columns of equal length, one row per shortcut. Rows are stored in the order of the generated
+json file (sorted by key, then by shortcut), so read_compact() can rebuild that exact structure.
+"""
+
+import io
+import json
+import collections
+
+from .names import decode_name
+
+
+COMPACT_FORMAT = "shmaplib-compact"
+COMPACT_FORMAT_VERSION = 1
+
+
+def build_compact(app_config):
+    """Builds the compact data of an ApplicationConfig, returns a dict that can be written as json"""
+
+    mods_used = app_config.get_mods_used()
+    mod_bits = dict((mod, 1 << i) for i, mod in enumerate(mods_used))
+
+    # Rows in the same order as the generated json: contexts by name, keys sorted, shortcuts by their serialized json
+    context_rows = []
+    keys = set()
+    for context in sorted(app_config.contexts.values(), key=lambda c: c.name):
+        if len(context.shortcuts) == 0:
+            continue
+
+        rows = []
+        for key, shortcuts in context.get_sorted_shortcuts():
+            rows.extend(shortcuts)
+            keys.add(key)
+        context_rows.append((context.name, rows))
+
+    key_ids = dict((key, i) for i, key in enumerate(sorted(keys)))
+    name_ids = {}
+    names = []
+
+    contexts = []
+    for context_name, shortcuts in context_rows:
+        key_column = []
+        mods_column = []
+        name_column = []
+        for shortcut in shortcuts:
+            name = decode_name(shortcut.name)
+            name_id = name_ids.get(name)
+            if name_id is None:
+                name_id = len(names)
+                name_ids[name] = name_id
+                names.append(name)
+
+            mask = 0
+            for mod in shortcut.mods:
+                mask |= mod_bits[mod]
+
+            key_column.append(key_ids[shortcut.key])
+            mods_column.append(mask)
+            name_column.append(name_id)
+        contexts.append([decode_name(context_name), key_column, mods_column, name_column])
+
+    data = collections.OrderedDict()
+    data["format"] = COMPACT_FORMAT
+    data["format_version"] = COMPACT_FORMAT_VERSION
+    data["name"] = decode_name(app_config.name)
+    data["version"] = decode_name(app_config.version)
+    data["os"] = app_config.os
+    data["default_context"] = decode_name(app_config.default_context_name)
+    data["mods_used"] = mods_used
+    data["keys"] = sorted(keys)
+    data["names"] = names
+    data["contexts"] = contexts
+    return data
+
+
+def write_compact(app_config, output_path):
+    """Writes the compact data of an ApplicationConfig to output_path (without whitespace)"""
+
+    data = build_compact(app_config)
+    with io.open(output_path, mode='w', encoding='utf-8', newline='') as f:
+        f.write(json.dumps(data, separators=(',', ':'), ensure_ascii=False))
+
+
+def compact_to_dict(data):
+    """Rebuilds the generated json structure from compact data: the result is equal to json.load() of the
+    generated json file, with the same key order (dicts keep their insertion order)"""
+
+    if data.get("format") != COMPACT_FORMAT:
+        raise ValueError("Not a compact application file")
+    if data["format_version"] > COMPACT_FORMAT_VERSION:
+        raise ValueError("Unsupported compact format version %d" % data["format_version"])
+
+    mods_used = data["mods_used"]
+    keys = data["keys"]
+    names = data["names"]
+
+    # Mods masks repeat a lot, build each modifier list once
+    mods_lists = {}
+
+    contexts = {}
+    for context_name, key_column, mods_column, name_column in data["contexts"]:
+        context = {}
+        for key_id, mask, name_id in zip(key_column, mods_column, name_column):
+            mods = mods_lists.get(mask)
+            if mods is None:
+                mods = [mod for i, mod in enumerate(mods_used) if mask & (1 << i)]
+                mods_lists[mask] = mods
+
+            shortcut = {"name": names[name_id], "mods": list(mods)}
+
+            key = keys[key_id]
+            shortcuts = context.get(key)
+            if shortcuts is None:
+                shortcuts = context[key] = []
+            shortcuts.append(shortcut)
+        contexts[context_name] = context
+
+    return {
+        "name": data["name"],
+        "version": data["version"],
+        "os": data["os"],
+        "mods_used": mods_used,
+        "default_context": data["default_context"],
+        "contexts": contexts,
+    }
+
+
+def read_compact(path):
+    """Reads a compact application file and returns it in the generated json structure, see compact_to_dict()"""
+
+    with io.open(path, encoding='utf-8') as f:
+        return compact_to_dict(json.load(f))
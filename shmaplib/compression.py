@@ -0,0 +1,122 @@
+"""Writes minified and gzipped variants of the application json files in content/generated.
+
+The exporter writes them with the --compressed flag. To (re)write the variants of files that were exported in another
+way, like Blender's, run this module from the repository root:
+    python -m shmaplib.compression [FILE ...]
+"""
+
+import io
+import os
+import sys
+import glob
+import gzip
+import json
+import logging
+import argparse
+import collections
+
+from .constants import DIR_CONTENT_GENERATED, MINIFIED_JSON_EXTENSION, GZIP_JSON_EXTENSION, GENERATED_SIDECAR_EXTENSIONS
+from .logger import getlog, setuplog
+log = getlog()
+
+
+def get_compressed_variant_paths(json_path):
+    """Returns the (minified, gzip) paths of the variants written next to an application json file:
+    'APP.json' -> ('APP.min.json', 'APP.json.gz')"""
+
+    base_path = json_path[:-len('.json')] if json_path.endswith('.json') else json_path
+    return base_path + MINIFIED_JSON_EXTENSION, base_path + GZIP_JSON_EXTENSION
+
+
+def minify_json(json_path):
+    """Returns the contents of a json file without whitespace, as utf-8 encoded bytes. Key order is kept."""
+
+    with io.open(json_path, encoding='utf-8') as f:
+        data = json.load(f, object_pairs_hook=collections.OrderedDict)
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def write_compressed_variants(json_path):
+    """Writes a minified .min.json and a gzipped .json.gz (of the minified json) next to an application json file.
+    The pretty json file stays the source of truth, the variants are smaller to serve.
+    Returns the list of written paths."""
+
+    minified_path, gzip_path = get_compressed_variant_paths(json_path)
+    minified = minify_json(json_path)
+
+    with open(minified_path, 'wb') as f:
+        f.write(minified)
+
+    # mtime=0 so the output only changes when the data changes
+    with open(gzip_path, 'wb') as f:
+        with gzip.GzipFile(filename='', mode='wb', compresslevel=9, fileobj=f, mtime=0) as gz:
+            gz.write(minified)
+
+    pretty_size = os.path.getsize(json_path)
+    log.info('...compressed %s: %d bytes, minified %d bytes (%.0f%%), gzip %d bytes (%.0f%%)',
+             os.path.basename(json_path), pretty_size,
+             len(minified), 100.0 * len(minified) / pretty_size,
+             os.path.getsize(gzip_path), 100.0 * os.path.getsize(gzip_path) / pretty_size)
+
+    return [minified_path, gzip_path]
+
+
+def get_app_json_paths(generated_dir=DIR_CONTENT_GENERATED):
+    """Returns the paths of all application json files in generated_dir, without their variants"""
+
+    paths = glob.glob(os.path.join(generated_dir, '*.json'))
+    return sorted(p for p in paths if not p.endswith(GENERATED_SIDECAR_EXTENSIONS))
+
+
+def get_compressed_size_report(generated_dir=DIR_CONTENT_GENERATED):
+    """Returns a list of (filename, pretty size, minified size, gzip size) for each application json file in
+    generated_dir that has compressed variants, sorted by pretty size (largest first)"""
+
+    report = []
+    for path in get_app_json_paths(generated_dir):
+        minified_path, gzip_path = get_compressed_variant_paths(path)
+        if not os.path.exists(minified_path) or not os.path.exists(gzip_path):
+            continue
+
+        report.append((os.path.basename(path), os.path.getsize(path),
+                       os.path.getsize(minified_path), os.path.getsize(gzip_path)))
+
+    report.sort(key=lambda r: r[1], reverse=True)
+    return report
+
+
+def log_compressed_size_report(generated_dir=DIR_CONTENT_GENERATED):
+    report = get_compressed_size_report(generated_dir)
+    if not report:
+        return
+
+    lines = ['%-50s %10s %10s %10s' % ('File', 'Pretty', 'Minified', 'Gzip')]
+    for filename, pretty_size, minified_size, gzip_size in report:
+        lines.append('%-50s %10d %10d %10d' % (filename, pretty_size, minified_size, gzip_size))
+
+    total_pretty = sum(r[1] for r in report)
+    total_minified = sum(r[2] for r in report)
+    total_gzip = sum(r[3] for r in report)
+    lines.append('%-50s %10d %10d %10d' % ('Total', total_pretty, total_minified, total_gzip))
+    lines.append('Minified is %.1f%% and gzip is %.1f%% of the pretty size' % (
+        100.0 * total_minified / total_pretty, 100.0 * total_gzip / total_pretty))
+
+    log.info('Compressed variants size report:\n%s', '\n'.join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes minified and gzipped variants of generated application json files.")
+    parser.add_argument('files', nargs='*', help="Application json files (default: all files in content/generated)")
+    args = parser.parse_args()
+
+    log.setLevel(logging.INFO)
+    setuplog()
+
+    for path in args.files or get_app_json_paths():
+        write_compressed_variants(os.path.abspath(path))
+    log_compressed_size_report()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,11 +6,26 @@ DIR_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file_
 DIR_SOURCES = os.path.normpath(os.path.join(DIR_ROOT, "sources"))
 DIR_CONTENT_GENERATED = os.path.normpath(os.path.join(DIR_ROOT, "content", "generated"))
 DIR_CONTENT_KEYBOARDS = os.path.normpath(os.path.join(DIR_ROOT, "content", "keyboards"))
+DIR_CACHE = os.path.normpath(os.path.join(DIR_ROOT, ".shmapcache"))
 
 CONTENT_APPS_JS_FILE = os.path.normpath(os.path.join(DIR_ROOT, "content", "generated", "apps.js"))
+APPS_MANIFEST_FILE = os.path.normpath(os.path.join(DIR_CACHE, "apps_manifest.json"))
+SQLITE_DB_FILE = os.path.normpath(os.path.join(DIR_CACHE, "shortcuts.sqlite"))
 
 OS_WINDOWS = 'windows'
 OS_MAC = 'mac'
 OS_LINUX = 'linux'
 
 VALID_OS_NAMES = [OS_WINDOWS, OS_MAC, OS_LINUX]
+
+# Variants written next to an application json file in content/generated
+MINIFIED_JSON_EXTENSION = ".min.json"
+GZIP_JSON_EXTENSION = ".json.gz"
+COMPACT_JSON_EXTENSION = ".compact.json"
+SEARCH_INDEX_EXTENSION = ".search.json"
+SHARDS_INDEX_EXTENSION = ".shards.json"
+SHARDS_DIR_EXTENSION = ".shards"
+
+# Files in content/generated ending with these are not application json files
+GENERATED_SIDECAR_EXTENSIONS = (MINIFIED_JSON_EXTENSION, COMPACT_JSON_EXTENSION, SEARCH_INDEX_EXTENSION,
+                                SHARDS_INDEX_EXTENSION)
@@ -0,0 +1,180 @@
+# The query command imports this module for ShortcutRecord, so it only imports modules that are fast to import:
+# appdata.py is imported when a ShortcutDatabase is created, and the logging module isn't used
+import os
+import json
+import collections
+
+from .constants import DIR_CONTENT_GENERATED, APPS_MANIFEST_FILE
+
+
+# Number of applications kept in memory by default, more than the number of generated files today
+DEFAULT_MAX_LOADED_APPS = 64
+
+# A shortcut of a generated application file, mods is a sorted tuple of modifier key names
+ShortcutRecord = collections.namedtuple('ShortcutRecord', ['app', 'version', 'os', 'context', 'key', 'mods', 'name'])
+
+# A generated application file
+AppInfo = collections.namedtuple('AppInfo', ['filename', 'name', 'version', 'os'])
+
+
+def parse_combo(combo):
+    """Returns the (mods, key) of a keycombo like "CONTROL+SHIFT+Z", or of a (mods, key) tuple.
+    The key names must be valid key names, see keynames.get_valid_keynames()"""
+
+    if isinstance(combo, tuple):
+        mods, key = combo
+    else:
+        parts = [p.strip() for p in combo.split('+')]
+        mods, key = parts[:-1], parts[-1]
+    return tuple(sorted(set(mods))), key
+
+
+class _AppShortcuts(object):
+    """The shortcuts of one loaded application file, indexed by keycombo, name and context"""
+
+    def __init__(self, info, mtime):
+        self.info = info
+        self.mtime = mtime
+        self.shortcuts = []
+        self.by_combo = {}
+        self.by_name = {}
+        self.by_context = {}
+
+    def load(self, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+
+        info = self.info
+        mods_tuples = {}
+        for context_name, context in data["contexts"].items():
+            context_shortcuts = self.by_context.setdefault(context_name, [])
+            for key, shortcuts in context.items():
+                for shortcut in shortcuts:
+                    # Most shortcuts use one of a few modifier combinations, share their tuples
+                    mods = tuple(shortcut["mods"])
+                    mods = mods_tuples.setdefault(mods, mods)
+
+                    record = ShortcutRecord(info.name, info.version, info.os, context_name, key, mods, shortcut["name"])
+                    self.shortcuts.append(record)
+                    context_shortcuts.append(record)
+                    self.by_combo.setdefault((mods, key), []).append(record)
+                    self.by_name.setdefault(record.name.lower(), []).append(record)
+
+
+class ShortcutDatabase(object):
+    """Queries the shortcuts of all generated application files.
+
+    The list of applications comes from the apps manifest (see AppsManifest), so no application file is read until it
+    is queried. Application files are then loaded on first use and indexed by keycombo, name and context. At most
+    max_loaded_apps applications are kept in memory, the least recently used one is dropped first.
+
+    Example:
+        db = ShortcutDatabase()
+        for shortcut in db.find_by_combo("CONTROL+SHIFT+Z", os_name='windows'):
+            print(shortcut.app, shortcut.context, shortcut.name)
+    """
+
+    def __init__(self, generated_dir=DIR_CONTENT_GENERATED, max_loaded_apps=DEFAULT_MAX_LOADED_APPS,
+                 manifest_file=APPS_MANIFEST_FILE):
+        """:param manifest_file: where the apps manifest is cached, None keeps it in memory only.
+                              Use None or a different file when generated_dir isn't the default."""
+        from .appdata import AppsManifest
+
+        super(ShortcutDatabase, self).__init__()
+        self.generated_dir = generated_dir
+        self.max_loaded_apps = max_loaded_apps
+        self.manifest = AppsManifest(manifest_file)
+        self.manifest.load()
+
+        self._apps = []
+        self._apps_by_name = {}
+        self._apps_by_os = {}
+        self._loaded = collections.OrderedDict()
+        self.refresh()
+
+    def refresh(self):
+        """Picks up generated files that were added, removed or changed since the database was created"""
+
+        self.manifest.update(self.generated_dir)
+        self.manifest.save()
+
+        self._apps = []
+        self._apps_by_name = {}
+        self._apps_by_os = {}
+        for filename, entry in self.manifest.entries.items():
+            info = AppInfo(filename, entry["name"], entry["version"], entry["os"])
+            self._apps.append(info)
+            self._apps_by_name.setdefault(info.name.lower(), []).append(info)
+            self._apps_by_os.setdefault(info.os, []).append(info)
+
+        # Drop loaded applications that were removed or changed
+        for filename in list(self._loaded.keys()):
+            entry = self.manifest.entries.get(filename)
+            if entry is None or entry["mtime"] != self._loaded[filename].mtime:
+                del self._loaded[filename]
+
+    def apps(self, app=None, version=None, os_name=None):
+        """Returns the AppInfo of all generated files that match the given application name (case insensitive),
+        version and os"""
+
+        if app is not None:
+            candidates = self._apps_by_name.get(app.lower(), [])
+        elif os_name is not None:
+            candidates = self._apps_by_os.get(os_name, [])
+        else:
+            candidates = self._apps
+
+        return [a for a in candidates
+                if (version is None or a.version == version) and (os_name is None or a.os == os_name)]
+
+    def _get_app_shortcuts(self, info):
+        app_shortcuts = self._loaded.get(info.filename)
+        if app_shortcuts is not None:
+            self._loaded.move_to_end(info.filename)
+            return app_shortcuts
+
+        path = os.path.join(self.generated_dir, info.filename)
+        app_shortcuts = _AppShortcuts(info, self.manifest.entries[info.filename]["mtime"])
+        app_shortcuts.load(path)
+
+        self._loaded[info.filename] = app_shortcuts
+        while len(self._loaded) > self.max_loaded_apps:
+            self._loaded.popitem(last=False)
+        return app_shortcuts
+
+    def _find(self, index_name, index_key, app, version, os_name, context):
+        results = []
+        for info in self.apps(app, version, os_name):
+            records = getattr(self._get_app_shortcuts(info), index_name).get(index_key)
+            if records:
+                if context is None:
+                    results.extend(records)
+                else:
+                    results.extend(r for r in records if r.context == context)
+        return results
+
+    def find_by_combo(self, combo, app=None, version=None, os_name=None, context=None):
+        """Returns the ShortcutRecords bound to a keycombo: "CONTROL+SHIFT+Z" or (mods, key) with valid key names"""
+        return self._find('by_combo', parse_combo(combo), app, version, os_name, context)
+
+    def find_by_name(self, name, app=None, version=None, os_name=None, context=None):
+        """Returns the ShortcutRecords with the given name (case insensitive)"""
+        return self._find('by_name', name.lower(), app, version, os_name, context)
+
+    def find_in_context(self, context, app=None, version=None, os_name=None):
+        """Returns all ShortcutRecords of a context"""
+        return self._find('by_context', context, app, version, os_name, None)
+
+    def get_shortcuts(self, app=None, version=None, os_name=None):
+        """Returns all ShortcutRecords of the matching applications"""
+        results = []
+        for info in self.apps(app, version, os_name):
+            results.extend(self._get_app_shortcuts(info).shortcuts)
+        return results
+
+    def get_contexts(self, app=None, version=None, os_name=None):
+        """Returns the sorted names of all contexts of the matching applications"""
+        contexts = set()
+        for info in self.apps(app, version, os_name):
+            contexts.update(self._get_app_shortcuts(info).by_context.keys())
+        return sorted(contexts)
@@ -0,0 +1,155 @@
+"""Exports intermediate files to content/generated, on its own or in a pool of worker processes.
+
+Used by utils/export_intermediate_data.py and shmaplib/build.py. A pool exports files with
+export_intermediate_file_worker() after init_worker() set up each process, and the main process passes every result to
+handle_export_result().
+"""
+
+import os
+import logging
+import traceback
+import multiprocessing
+
+from .constants import DIR_CONTENT_GENERATED
+from .appdata import ExportSession
+from .intermediate import IntermediateDataExporter, ExportOptions
+from .cache import ExportCache
+from .profiling import enable_profiling, profile_input
+from .tracing import enable_tracing, trace_span, pop_trace_events, add_trace_events
+from .logger import getlog
+log = getlog()
+
+
+def export_intermediate_file(file_path, test_mode, explicit_numpad_mode, regenerate_apps_js=True, cache=None,
+                             options=ExportOptions(), generated_dir=DIR_CONTENT_GENERATED):
+    log.info("Exporting from file: %s", file_path)
+
+    with trace_span(os.path.basename(file_path), 'file', path=file_path):
+        use_cache = cache is not None and not test_mode
+        if use_cache and cache.is_up_to_date(file_path, explicit_numpad_mode, options):
+            log.info("...skipping, file is unchanged since the last export")
+            return
+
+        with profile_input(file_path):
+            exporter = IntermediateDataExporter(file_path, explicit_numpad_mode)
+            exporter.parse()
+            if not test_mode:
+                output_paths = exporter.export(regenerate_apps_js, options, generated_dir)
+                if use_cache:
+                    cache.update(file_path, explicit_numpad_mode, output_paths, options, exporter.sqlite_apps)
+
+
+class LogRecordCollector(logging.Handler):
+    """Keeps the log records of a worker process so they can be replayed by the main process in one block"""
+
+    def __init__(self):
+        super(LogRecordCollector, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        # Records are sent back to the main process, so make sure they can be pickled
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+
+
+def get_log_records():
+    """Returns the log records collected in a worker process since the last call"""
+
+    collector = log.handlers[0]
+    records = collector.records
+    collector.records = []
+    return records
+
+
+class _WorkerState(object):
+    cache = None
+    generated_dir = DIR_CONTENT_GENERATED
+
+
+def init_worker(log_level, cache_file, force, profile_dir, trace, generated_dir=DIR_CONTENT_GENERATED):
+    """Initializes a worker process: log records are collected instead of written out
+
+    :param cache_file: the file of the ExportCache of the main process, None when it doesn't use one
+    """
+
+    log.setLevel(log_level)
+    for handler in list(log.handlers):
+        log.removeHandler(handler)
+    log.addHandler(LogRecordCollector())
+
+    # Workers write the profiles of the files they export
+    if profile_dir is not None:
+        enable_profiling(profile_dir)
+
+    # Trace events are sent back to the main process with the results of each file
+    if trace:
+        enable_tracing(multiprocessing.current_process().name)
+
+    # Each worker reads the export cache, only the main process writes it
+    if cache_file is not None:
+        _WorkerState.cache = ExportCache(cache_file, force=force)
+        _WorkerState.cache.load()
+
+    _WorkerState.generated_dir = generated_dir
+
+
+def export_intermediate_file_worker(task):
+    """Exports a single file inside a worker process, task is a tuple of (file_path, test_mode, explicit_numpad_mode,
+    options).
+    Returns a tuple of (file_path, log_records, error, cache_hit, cache_entry, trace_events),
+    error is None when the export succeeded"""
+
+    file_path, test_mode, explicit_numpad_mode, options = task
+    get_log_records()
+
+    cache = _WorkerState.cache
+    hits = cache.hits if cache else 0
+
+    error = None
+    try:
+        export_intermediate_file(file_path, test_mode, explicit_numpad_mode, regenerate_apps_js=False, cache=cache,
+                                 options=options, generated_dir=_WorkerState.generated_dir)
+    except Exception:
+        error = traceback.format_exc()
+
+    cache_hit = cache is not None and cache.hits > hits
+    cache_entry = cache.get_entry(file_path) if cache else None
+    return file_path, get_log_records(), error, cache_hit, cache_entry, pop_trace_events()
+
+
+def replay_log_records(records):
+    """Handles the log records of a worker process in the main process. Returns the number of warnings and errors"""
+
+    num_warnings = 0
+    for record in records:
+        if record.levelno >= logging.WARNING:
+            num_warnings += 1
+        log.handle(record)
+    return num_warnings
+
+
+def handle_export_result(result, cache, test_mode, regenerate_apps_js=True):
+    """Handles the result of export_intermediate_file_worker in the main process: updates the export cache, queues the
+    apps.js rebuild and replays the log records of the worker. Returns a tuple of (num_warnings, error)"""
+
+    file_path, records, error, cache_hit, cache_entry, trace_events = result
+    add_trace_events(trace_events)
+    if cache is not None and not test_mode:
+        if cache_hit:
+            cache.hits += 1
+        else:
+            cache.misses += 1
+            if cache_entry is not None:
+                cache.set_entry(file_path, cache_entry)
+    if regenerate_apps_js and not cache_hit and error is None and not test_mode:
+        # Workers don't touch apps.js, it is regenerated once when the session exits
+        ExportSession.regenerate_site_apps_js()
+
+    num_warnings = replay_log_records(records)
+    if error is not None:
+        log.error("Failed to export file: %s\n%s", file_path, error)
+    return num_warnings, error
@@ -3,14 +3,65 @@
 import os
 import json
 import codecs
-import re
+import collections
 
 from .logger import getlog
 log = getlog()
 
 from .appdata import Shortcut, ApplicationConfig
+from .keyparser import parse_key_combos, split_key_alternatives, ALTERNATIVES_SEPARATOR
+from .profiling import profile_stage
+from .tracing import trace_span
+from .compression import write_compressed_variants
 from .constants import DIR_CONTENT_GENERATED, VALID_OS_NAMES, OS_WINDOWS, OS_MAC
 
+# Optional, orjson decodes the intermediate files several times faster than the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Output options of IntermediateDataExporter.export(), what is written besides the generated json files:
+# - compressed_variants: a minified .min.json and a gzipped .json.gz next to each json file
+# - compact: the compact format (.compact.json) next to each json file
+# - search_index: a search index (.search.json) next to each json file
+# - sharded: a .shards.json index and one shard per context next to each json file
+# - sqlite_db: the path of a SQLite database the applications are also written into, or None
+ExportOptions = collections.namedtuple('ExportOptions', ['compressed_variants', 'compact', 'search_index', 'sharded',
+                                                         'sqlite_db'], defaults=(False, False, False, False, None))
+
+
+def get_json_backend():
+    """Returns the name of the module used to decode intermediate files: 'orjson' when it is installed, or 'json'"""
+    return 'orjson' if orjson is not None else 'json'
+
+
+def _load_json_file(file_path):
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
+
+
+def _add_key_alternatives(keys, alternatives, new_keys):
+    """Adds the alternatives of new_keys that aren't in keys yet, returns the new (keys, alternatives).
+
+    alternatives is the ordered set (a dict) of the alternatives in keys, None when it hasn't been built yet.
+    The returned keys is None when alternatives were added, it is joined again when it is read.
+    """
+
+    if alternatives is None:
+        alternatives = dict.fromkeys(split_key_alternatives(keys))
+
+    for alternative in split_key_alternatives(new_keys):
+        if alternative not in alternatives:
+            alternatives[alternative] = None
+            keys = None
+    return keys, alternatives
+
 
 class IntermediateShortcutData(object):
     """Intermediate shortcut data format for applications.
@@ -46,13 +97,52 @@ class IntermediateShortcutData(object):
     - "Space / Z"       '/' is used as a separator if shortcut has multiple options
     """
 
-    class Shortcut:
-        """Intermediate Shortcut structure"""
+    class Shortcut(object):
+        """Intermediate Shortcut structure.
+
+        Once keys are merged into a shortcut, its keys are kept as an ordered set of alternatives per OS. Adding keys
+        compares whole alternatives and takes the same time however many have been added before, the keys string is
+        only joined again when it is read.
+        """
+        __slots__ = ('name', '_win_keys', '_mac_keys', '_win_alternatives', '_mac_alternatives')
+
         def __init__(self, name, win_keys, mac_keys):
             self.name = name
             self.win_keys = win_keys
             self.mac_keys = mac_keys
 
+        @property
+        def win_keys(self):
+            if self._win_keys is None:
+                self._win_keys = ALTERNATIVES_SEPARATOR.join(self._win_alternatives)
+            return self._win_keys
+
+        @win_keys.setter
+        def win_keys(self, keys):
+            self._win_keys = keys
+            self._win_alternatives = None
+
+        @property
+        def mac_keys(self):
+            if self._mac_keys is None:
+                self._mac_keys = ALTERNATIVES_SEPARATOR.join(self._mac_alternatives)
+            return self._mac_keys
+
+        @mac_keys.setter
+        def mac_keys(self, keys):
+            self._mac_keys = keys
+            self._mac_alternatives = None
+
+        def add_keys(self, win_keys, mac_keys):
+            """Adds the key alternatives this shortcut doesn't have yet, they are joined with ' / '.
+            Alternatives are compared as a whole: "A" is added to "Ctrl + A"."""
+            if win_keys:
+                self._win_keys, self._win_alternatives = _add_key_alternatives(
+                    self._win_keys, self._win_alternatives, win_keys)
+            if mac_keys:
+                self._mac_keys, self._mac_alternatives = _add_key_alternatives(
+                    self._mac_keys, self._mac_alternatives, mac_keys)
+
         def _escape(self, text):
             text = text.replace('\\', '\\\\')
             text = text.replace('"', '\\"')
@@ -72,13 +162,9 @@ class IntermediateShortcutData(object):
 
         def add_shortcut(self, name, win_keys, mac_keys):
             # Add keys to existing shortcut
-            existing_shortcut = self.get_shortcut(name)
+            existing_shortcut = self._shortcut_lookup.get(name)
             if existing_shortcut is not None:
-                if len(win_keys) and win_keys not in existing_shortcut.win_keys:
-                    existing_shortcut.win_keys += " / " + win_keys
-                if len(mac_keys) and mac_keys not in existing_shortcut.mac_keys:
-                    existing_shortcut.mac_keys += " / " + mac_keys
-
+                existing_shortcut.add_keys(win_keys, mac_keys)
                 return
 
             # Create new
@@ -128,48 +214,67 @@ class IntermediateShortcutData(object):
         self.contexts = []
         self._context_lookup = {}
 
-    def add_shortcut(self, context_name, shortcut_name, win_keys, mac_keys):
-        if context_name not in self._context_lookup.keys():
+    def _get_or_create_context(self, context_name):
+        context = self._context_lookup.get(context_name)
+        if context is None:
             context = IntermediateShortcutData.Context(context_name)
             self._context_lookup[context_name] = context
             self.contexts.append(context)
-            print('Adding Context: ' + context.name)
+            log.debug('Adding Context: %s', context.name)
+        return context
 
-        self._context_lookup[context_name].add_shortcut(shortcut_name, win_keys, mac_keys)
+    def add_shortcut(self, context_name, shortcut_name, win_keys, mac_keys):
+        self._get_or_create_context(context_name).add_shortcut(shortcut_name, win_keys, mac_keys)
 
     def extend(self, idata):
-        """Merges the data from one intermediate data object into this one"""
+        """Merges the data from one intermediate data object into this one.
+        Keys of shortcuts that exist in both are merged per alternative, see Shortcut.add_keys()"""
         assert isinstance(idata, IntermediateShortcutData), "Can only extend (merge) with IntermediateShortcutData type"
 
         for source_context in idata.contexts:
-            for source_shortcut in source_context.shortcuts:
-                self.add_shortcut(source_context.name, source_shortcut.name, source_shortcut.win_keys, source_shortcut.mac_keys)
+            if not source_context.shortcuts:
+                continue
 
-                # Merge key contents
-                if source_context.name in self._context_lookup.keys():
-                    shortcut = self._context_lookup[source_context.name].get_shortcut(source_shortcut.name)
-                    if shortcut.win_keys is None or len(shortcut.win_keys) == 0:
-                        shortcut.win_keys = source_shortcut.win_keys
-                    if shortcut.mac_keys is None or len(shortcut.mac_keys) == 0:
-                        shortcut.mac_keys = source_shortcut.mac_keys
+            context = self._get_or_create_context(source_context.name)
+            for source_shortcut in source_context.shortcuts:
+                context.add_shortcut(source_shortcut.name, source_shortcut.win_keys, source_shortcut.mac_keys)
 
+    @trace_span('load')
+    @profile_stage('load')
     def load(self, file_path):
-        """Load the intermediate data from a json file"""
+        """Load the intermediate data from a json file.
+
+        Contexts and shortcuts are built straight from the decoded json, without add_shortcut(): names are unique
+        within a json object, so there is nothing to merge.
+        """
         self.contexts = []
         self._context_lookup = {}
 
-        with codecs.open(file_path, encoding='utf-8') as idata_file:
-            json_idata = json.load(idata_file)
+        json_idata = _load_json_file(file_path)
 
-            self.name = json_idata["name"]
-            self.version = json_idata["version"]
-            self.default_context = json_idata["default_context"]
-            self.os = json_idata["os"]
+        self.name = json_idata["name"]
+        self.version = json_idata["version"]
+        self.default_context = json_idata["default_context"]
+        self.os = json_idata["os"]
 
-            for context_name, shortcuts in json_idata["contexts"].iteritems():
-                for shortcut_name, os_keys in shortcuts.iteritems():
-                    self.add_shortcut(context_name, shortcut_name, os_keys[0], os_keys[1])
+        new_shortcut = IntermediateShortcutData.Shortcut
+        for context_name, shortcuts in json_idata["contexts"].items():
+            # add_shortcut() only creates a context for its first shortcut
+            if not shortcuts:
+                continue
 
+            context = IntermediateShortcutData.Context(context_name)
+            context_shortcuts = context.shortcuts
+            shortcut_lookup = context._shortcut_lookup
+            for shortcut_name, os_keys in shortcuts.items():
+                shortcut = new_shortcut(shortcut_name, os_keys[0], os_keys[1])
+                context_shortcuts.append(shortcut)
+                shortcut_lookup[shortcut_name] = shortcut
+
+            self.contexts.append(context)
+            self._context_lookup[context_name] = context
+
+    @profile_stage('serialize')
     def serialize(self, output_filepath):
         """Save the intermediate data to a json file"""
         json_str = "{\n"
@@ -212,6 +317,9 @@ class IntermediateDataExporter(object):
         self.app_version = self.idata.version
         self.default_context_name = self.idata.default_context
 
+        # (name, version, os) of the app configs that export() wrote into the SQLite database
+        self.sqlite_apps = []
+
         # Windows and Mac app configs
         self.data_windows = None
         self.data_mac = None
@@ -221,107 +329,61 @@ class IntermediateDataExporter(object):
             self.data_mac = ApplicationConfig(self.app_name, self.app_version, OS_MAC, self.default_context_name)
 
     def _parse_shortcut(self, name, keys):
-        if len(keys) == 0:
-            return []
-
-        # All cases we need to handle:
-        #  "A"
-        #  "Shift + A"
-        #  "Ctrl + 0 - 8"     this is a range of keys from 0 to 8
-        #  "Shift + ] / Shift + ["
-        #  ". (period) / , (comma)"
-        #  "Spacebar or Z"
-        #  "Up Arrow / Down Arrow or + / -"
-        #  "Shift + Up Arrow / Shift + Down Arrow or Shift + + / Shift + -"
-
-        # Cleanup the string and replace edge cases
-        keys = re.sub("numpad \+", "NUMPAD_PLUS", keys, flags=re.IGNORECASE)
-        keys = re.sub("numpad /", "NUMPAD_SLASH", keys, flags=re.IGNORECASE)
-        keys = keys.replace(" or +", " or TEMP_PLUS")
-        keys = keys.replace(" or /", " or TEMP_SLASH")
-        keys = keys.replace(" + +", " + TEMP_PLUS")
-        keys = keys.replace(" + /", " + TEMP_SLASH")
-        keys = keys.strip(" ")
-        if keys == '/':
-            keys = "TEMP_SLASH"
-        if keys == '+':
-            keys = "TEMP_PLUS"
-
-        # If we split by ' or ' and then ' / ' we can parse each combo separately
-        combo_parts = []
-        for parts1 in keys.split(' or '):
-            for parts2 in parts1.split('/'):
-                combo_parts.append(parts2)
-
-        # Parse each combo
-        shortcuts = []
-        for combo in combo_parts:
-            # TODO: skip mouse shortcuts for now
-            if 'click' in combo.lower() or 'drag' in combo.lower():
-                continue
-
-            parts = combo.split("+")
-
-            # Parse main key
-            key = parts[-1]  # last element
-            key = key.strip(' ')
-            if key == 'TEMP_SLASH':
-                key = '/'
-            elif key == 'TEMP_PLUS':
-                key = '+'
-
-            # Has no key
-            if len(key) == 0:
-                continue
-
-            # Parse modifiers
-            mods = [m.strip(u' ') for m in parts[:-1]]  # all but last
-
-            # Handle a range of keys (Example: "Ctrl + 0-9" or "Ctrl + Numpad 0-9")
-            #  which will result in multiple shortcuts with the same label
-            results = re.findall(".*?([0-9])-([0-9])", key)
-            if results:
-                start = int(results[0][0])
-                end = int(results[0][1])
-                is_numpad_key = 'numpad' in key.lower()
-
-                for i in range(start, end+1):
-                    key_name = str(i)
-                    if is_numpad_key:
-                        key_name = 'Numpad ' + key_name
-                    shortcut = Shortcut(name, key_name, mods)
-                    shortcuts.append(shortcut)
-
-            # Result is just one shortcut
-            else:
-                shortcut = Shortcut(name, key, mods)
-                shortcuts.append(shortcut)
-
-        return shortcuts
+        # The key string grammar is documented in keyparser.parse_key_combos()
+        return [Shortcut(name, key, list(mods)) for key, mods in parse_key_combos(keys)]
 
+    @profile_stage('parse')
     def parse(self):
-        # WINDOWS: Iterate contexts and shortcuts
         if self.data_windows:
-            log.info("Parsing intermediate data for Windows shortcuts")
-            for context in self.idata.contexts:
-                context_win = self.data_windows.get_or_create_new_context(context.name)
-                for shortcut in context.shortcuts:
-                    for s in self._parse_shortcut(shortcut.name, shortcut.win_keys):
-                        context_win.add_shortcut(s, True, self.explicit_numpad_mode)
-            log.info("...DONE\n")
-
-        # MAC: Iterate contexts and shortcuts
+            self.parse_os(OS_WINDOWS)
         if self.data_mac:
+            self.parse_os(OS_MAC)
+
+    def parse_os(self, os_name):
+        """Parses the intermediate shortcuts for a single OS (OS_WINDOWS or OS_MAC)"""
+
+        if os_name == OS_WINDOWS:
+            app_config = self.data_windows
+            log.info("Parsing intermediate data for Windows shortcuts")
+        else:
+            app_config = self.data_mac
             log.info("Parsing intermediate data for MacOS shortcuts")
+
+        # Iterate contexts and shortcuts
+        with trace_span('parse ' + os_name):
             for context in self.idata.contexts:
-                context_mac = self.data_mac.get_or_create_new_context(context.name)
+                app_context = app_config.get_or_create_new_context(context.name)
                 for shortcut in context.shortcuts:
-                    for s in self._parse_shortcut(shortcut.name, shortcut.mac_keys):
-                        context_mac.add_shortcut(s, True, self.explicit_numpad_mode)
-            log.info("...DONE\n")
+                    keys = shortcut.win_keys if os_name == OS_WINDOWS else shortcut.mac_keys
+                    for s in self._parse_shortcut(shortcut.name, keys):
+                        app_context.add_shortcut(s, True, self.explicit_numpad_mode)
+        log.info("...DONE\n")
+
+    def export(self, regenerate_apps_js=True, options=ExportOptions(), generated_dir=DIR_CONTENT_GENERATED):
+        """Serializes the parsed application data to generated_dir, the content/generated directory by default.
+        Returns a list of the files that were written
+
+        :param options: ExportOptions of the files that are written besides the json files. The SQLite database isn't
+                        in the returned list, it's shared by all exported files: the apps written into it are
+                        listed in self.sqlite_apps
+        :param generated_dir: apps.js only lists the files in content/generated, use regenerate_apps_js=False when
+                              exporting to another directory
+        """
 
-    def export(self):
-        if self.data_windows:
-            self.data_windows.serialize(DIR_CONTENT_GENERATED)
-        if self.data_mac:
-            self.data_mac.serialize(DIR_CONTENT_GENERATED)
+        output_paths = []
+        for app_config in (self.data_windows, self.data_mac):
+            if app_config and app_config.serialize(generated_dir, regenerate_apps_js):
+                output_path = app_config.get_output_path(generated_dir)
+                output_paths.append(output_path)
+                if options.compressed_variants:
+                    with trace_span('compress'):
+                        output_paths.extend(write_compressed_variants(output_path))
+                if options.compact and app_config.serialize_compact(generated_dir):
+                    output_paths.append(app_config.get_compact_output_path(generated_dir))
+                if options.search_index and app_config.serialize_search_index(generated_dir):
+                    output_paths.append(app_config.get_search_index_output_path(generated_dir))
+                if options.sharded:
+                    output_paths.extend(app_config.serialize_sharded(generated_dir))
+                if options.sqlite_db and app_config.serialize_sqlite(options.sqlite_db):
+                    self.sqlite_apps.append((app_config.name, app_config.version, app_config.os))
+        return output_paths
@@ -3,9 +3,6 @@
 # makes all strings here unicode by default (u'')
 
 
-from .logger import getlog
-log = getlog()
-
 class DataContainer(object):
     VALID_NAME_LOOKUP = {
         u'§': ['SECTION'],
@@ -280,6 +277,10 @@ class DataContainer(object):
     }
 
     VALID_KEYNAMES = None
+    VALID_KEYNAMES_SET = None
+
+    # Memoized results of get_valid_keynames(), one dict per numpad mode (index 0: default, 1: explicit numpad)
+    RESOLVED_KEYNAMES = None
 
 
 def _populate_valid_keynames():
@@ -299,6 +300,36 @@ def _populate_valid_keynames():
 
     # Filter out duplicates & set
     DataContainer.VALID_KEYNAMES = list(set(valid_keynames))
+    DataContainer.VALID_KEYNAMES_SET = frozenset(DataContainer.VALID_KEYNAMES)
+
+    # Precompute the results for all known names and aliases, in both numpad modes
+    DataContainer.RESOLVED_KEYNAMES = ({}, {})
+    known_names = list(DataContainer.VALID_NAME_LOOKUP.keys())
+    known_names.extend(DataContainer.VALID_KEYNAMES)
+    known_names.extend([n.lower() for n in DataContainer.VALID_KEYNAMES])
+    for name in known_names:
+        for treat_numpad_keys_explicitly in (False, True):
+            resolved = DataContainer.RESOLVED_KEYNAMES[treat_numpad_keys_explicitly]
+            resolved[name] = _resolve_keynames(name, treat_numpad_keys_explicitly)
+
+
+def _resolve_keynames(char_or_name, treat_numpad_keys_explicitly):
+    """Uncached implementation of get_valid_keynames()"""
+
+    valid_keynames = []
+
+    name_lower = char_or_name.lower()
+    name_upper = char_or_name.upper()
+    if name_upper in DataContainer.VALID_KEYNAMES_SET:
+        valid_keynames = [name_upper]
+    elif name_lower in DataContainer.VALID_NAME_LOOKUP:
+        valid_keynames = DataContainer.VALID_NAME_LOOKUP[name_lower]
+
+    # Remove numpad keys
+    if treat_numpad_keys_explicitly and 'numpad' not in name_lower:
+        valid_keynames = [n for n in valid_keynames if 'numpad' not in n.lower()]
+
+    return valid_keynames
 
 
 def get_all_valid_keynames():
@@ -316,7 +347,7 @@ def is_valid_keyname(name):
     if DataContainer.VALID_KEYNAMES is None:
         _populate_valid_keynames()
 
-    return name in DataContainer.VALID_KEYNAMES
+    return name in DataContainer.VALID_KEYNAMES_SET
 
 
 def get_valid_keynames(char_or_name, treat_numpad_keys_explicitly=False):
@@ -324,19 +355,18 @@ def get_valid_keynames(char_or_name, treat_numpad_keys_explicitly=False):
     returns a list of uppercased valid key names.
 
     If the given name couldn't be converted, an empty list is returned.
+    Results are memoized, the returned list is shared between calls and must not be modified.
 
     /:param treat_numpad_keys_explicitly    if true, will not expand ambiguous keys to numpad keys (0 and Numpad 0 have different functions)
     """
 
-    valid_keynames = []
-
-    if is_valid_keyname(char_or_name.upper()):
-        valid_keynames =  [char_or_name.upper()]
-    elif char_or_name.lower() in DataContainer.VALID_NAME_LOOKUP.keys():
-        valid_keynames =  DataContainer.VALID_NAME_LOOKUP[char_or_name.lower()]
+    if DataContainer.RESOLVED_KEYNAMES is None:
+        _populate_valid_keynames()
 
-    # Remove numpad keys
-    if treat_numpad_keys_explicitly and 'numpad' not in char_or_name.lower():
-        valid_keynames = [n for n in valid_keynames if 'numpad' not in n.lower()]
+    resolved = DataContainer.RESOLVED_KEYNAMES[bool(treat_numpad_keys_explicitly)]
+    valid_keynames = resolved.get(char_or_name)
+    if valid_keynames is None:
+        valid_keynames = _resolve_keynames(char_or_name, treat_numpad_keys_explicitly)
+        resolved[char_or_name] = valid_keynames
 
     return valid_keynames
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+import re
+
+
+# Placeholders for '+' and '/' when they are used as a key, so they aren't mistaken for separators
+_LITERAL_PLUS = 'TEMP_PLUS'
+_LITERAL_SLASH = 'TEMP_SLASH'
+
+# Key names and separators that need a placeholder, matched in a single pass (leftmost match wins)
+_LITERALS_RE = re.compile(r'(?i:numpad) \+|(?i:numpad) /| or \+| or /| \+ \+| \+ /')
+_LITERALS = {
+    ' or +': ' or ' + _LITERAL_PLUS,
+    ' or /': ' or ' + _LITERAL_SLASH,
+    ' + +': ' + ' + _LITERAL_PLUS,
+    ' + /': ' + ' + _LITERAL_SLASH,
+}
+
+# Separates the options of a shortcut: "Spacebar or Z", "Shift + ] / Shift + ["
+_OPTIONS_SEPARATOR_RE = re.compile(r' or |/')
+
+# Joins the alternatives of a shortcut when shortcuts are merged: "Shift + ] / Shift + ["
+ALTERNATIVES_SEPARATOR = ' / '
+
+# A range of keys: "0-9", "Numpad 0-9"
+_KEY_RANGE_RE = re.compile(r'([0-9])-([0-9])')
+
+
+class _ParsedKeys(object):
+    cache = {}
+
+
+def _replace_literal(match):
+    text = match.group(0)
+    literal = _LITERALS.get(text)
+    if literal is not None:
+        return literal
+
+    # numpad +, numpad / (any case)
+    if text[-1] == '+':
+        return 'NUMPAD_PLUS'
+    return 'NUMPAD_SLASH'
+
+
+def _tokenize(keys):
+    """Uncached implementation of parse_key_combos()"""
+
+    keys = _LITERALS_RE.sub(_replace_literal, keys).strip(' ')
+    if keys == '/':
+        keys = _LITERAL_SLASH
+    elif keys == '+':
+        keys = _LITERAL_PLUS
+
+    # Mouse shortcuts are only checked per option when they are mentioned at all
+    check_mouse = False
+    keys_lower = keys.lower()
+    if 'click' in keys_lower or 'drag' in keys_lower:
+        check_mouse = True
+
+    combos = []
+    for option in _OPTIONS_SEPARATOR_RE.split(keys):
+        # TODO: skip mouse shortcuts for now
+        if check_mouse:
+            option_lower = option.lower()
+            if 'click' in option_lower or 'drag' in option_lower:
+                continue
+
+        parts = option.split('+')
+
+        # Parse main key (last element)
+        key = parts[-1].strip(' ')
+        if key == _LITERAL_SLASH:
+            key = '/'
+        elif key == _LITERAL_PLUS:
+            key = '+'
+
+        # Has no key
+        if len(key) == 0:
+            continue
+
+        # Parse modifiers (all but last)
+        mods = tuple([m.strip(' ') for m in parts[:-1]])
+
+        # Handle a range of keys (Example: "Ctrl + 0-9" or "Ctrl + Numpad 0-9")
+        #  which will result in multiple shortcuts with the same label
+        key_range = _KEY_RANGE_RE.search(key)
+        if key_range:
+            prefix = ''
+            if 'numpad' in key.lower():
+                prefix = 'Numpad '
+            for i in range(int(key_range.group(1)), int(key_range.group(2)) + 1):
+                combos.append((prefix + str(i), mods))
+        else:
+            combos.append((key, mods))
+
+    return tuple(combos)
+
+
+def parse_key_combos(keys):
+    """Parses a shortcut keys string from the intermediate data format into a tuple of (key, mods) combos.
+    The key and modifier names are returned as written, they are resolved later with keynames.get_valid_keynames().
+
+    All cases handled:
+     "A"
+     "Shift + A"
+     "Ctrl + 0-8"       this is a range of keys from 0 to 8
+     "Shift + ] / Shift + ["
+     ". (period) / , (comma)"
+     "Spacebar or Z"
+     "Up Arrow / Down Arrow or + / -"
+     "Shift + Up Arrow / Shift + Down Arrow or Shift + + / Shift + -"
+     "Ctrl + Numpad +"  numpad + and numpad / are single keys
+
+    Mouse shortcuts (click, drag) are skipped. Results are memoized per keys string.
+    """
+
+    combos = _ParsedKeys.cache.get(keys)
+    if combos is None:
+        combos = _tokenize(keys)
+        _ParsedKeys.cache[keys] = combos
+    return combos
+
+
+def split_key_alternatives(keys):
+    """Splits a shortcut keys string on the ' / ' that separates its alternatives. '/' and '+' keys are recognized
+    like parse_key_combos() does, the alternatives are returned as written:
+     "Ctrl + / / Ctrl + A"   -> ["Ctrl + /", "Ctrl + A"]
+     "Up Arrow or + / -"     -> ["Up Arrow or +", "-"]
+    """
+
+    i = keys.find(ALTERNATIVES_SEPARATOR)
+    if i == -1:
+        return [keys] if keys.strip(' ') else []
+
+    # Positions of '/' characters that are a key
+    literal_slashes = set()
+    for match in _LITERALS_RE.finditer(keys):
+        if match.group(0)[-1] == '/':
+            literal_slashes.add(match.end() - 1)
+
+    alternatives = []
+    start = 0
+    while i != -1:
+        if i + 1 not in literal_slashes:
+            alternatives.append(keys[start:i])
+            start = i + len(ALTERNATIVES_SEPARATOR)
+        i = keys.find(ALTERNATIVES_SEPARATOR, i + 1)
+    alternatives.append(keys[start:])
+    return [a for a in alternatives if a.strip(' ')]
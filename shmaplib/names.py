@@ -0,0 +1,12 @@
+"""Helpers for the names in the generated application json files, shared by the writers of the other formats."""
+
+import json
+
+
+def decode_name(name):
+    """Returns a name as it reads from the generated json file, which writes names without escaping them.
+    Names that aren't valid in a json string are returned as they are"""
+    try:
+        return json.loads(u'"%s"' % name, strict=False)
+    except ValueError:
+        return name
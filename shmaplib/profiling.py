@@ -0,0 +1,123 @@
+import io
+import os
+import contextlib
+
+from .logger import getlog
+log = getlog()
+
+
+# Number of functions listed in the log summary of each profile
+DEFAULT_TOP_FUNCTIONS = 20
+
+# Input name of the profiles that are recorded outside of profile_input()
+_NO_INPUT = None
+
+
+class _ProfilingState(object):
+    output_dir = None
+    top = DEFAULT_TOP_FUNCTIONS
+    current_input = _NO_INPUT
+
+    # (input_name, stage) -> cProfile.Profile, profiles of the same stage accumulate until they are written
+    profiles = {}
+
+    # Stack of (stage, profile) for nested stages, only the innermost profile is enabled
+    active = []
+
+
+def enable_profiling(output_dir, top=DEFAULT_TOP_FUNCTIONS):
+    """Profile all pipeline stages from now on. A .pstats file is written to output_dir per input file and per
+    stage, and a summary of the top functions (by own time) is logged. Inspect the files with the pstats module or
+    a viewer like snakeviz."""
+
+    output_dir = os.path.abspath(output_dir)
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    _ProfilingState.output_dir = output_dir
+    _ProfilingState.top = top
+
+
+def is_profiling():
+    return _ProfilingState.output_dir is not None
+
+
+@contextlib.contextmanager
+def profile_input(file_path):
+    """All stages profiled within this block are recorded for the given input file, they are written when the
+    block exits."""
+
+    if not is_profiling():
+        yield
+        return
+
+    input_name = os.path.basename(file_path)
+    previous_input = _ProfilingState.current_input
+    _ProfilingState.current_input = input_name
+    try:
+        yield
+    finally:
+        _ProfilingState.current_input = previous_input
+        _write_profiles(input_name)
+
+
+@contextlib.contextmanager
+def profile_stage(stage):
+    """Profiles a pipeline stage: 'load', 'parse', 'serialize', 'apps_js'. Can also be used as a decorator.
+    Nested stages are recorded separately, the outer stage is paused while an inner stage runs.
+    Does nothing unless enable_profiling() was called."""
+
+    active = _ProfilingState.active
+    if not is_profiling() or (active and active[-1][0] == stage):
+        yield
+        return
+
+    key = (_ProfilingState.current_input, stage)
+    profile = _ProfilingState.profiles.get(key)
+    if profile is None:
+        import cProfile
+        profile = cProfile.Profile()
+        _ProfilingState.profiles[key] = profile
+
+    if active:
+        active[-1][1].disable()
+    active.append((stage, profile))
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        active.pop()
+        if active:
+            active[-1][1].enable()
+
+
+def write_profiles():
+    """Writes the stages that were profiled outside of profile_input(), like the apps.js rebuild at the end of
+    an export session"""
+
+    if is_profiling():
+        _write_profiles(_NO_INPUT)
+
+
+def _get_profile_path(input_name, stage):
+    if input_name is _NO_INPUT:
+        return os.path.join(_ProfilingState.output_dir, "%s.pstats" % stage)
+    return os.path.join(_ProfilingState.output_dir, "%s.%s.pstats" % (input_name, stage))
+
+
+def _write_profiles(input_name):
+    # Imported here, pstats takes long to import and is only needed when profiling
+    import pstats
+
+    for key in sorted(k for k in _ProfilingState.profiles if k[0] == input_name):
+        profile = _ProfilingState.profiles.pop(key)
+        stage = key[1]
+        output_path = _get_profile_path(input_name, stage)
+        profile.dump_stats(output_path)
+
+        summary = io.StringIO()
+        stats = pstats.Stats(profile, stream=summary)
+        stats.strip_dirs().sort_stats('tottime').print_stats(_ProfilingState.top)
+        log.info("Profiled stage '%s' of %s in %.3fs, written to %s\n%s", stage, input_name or 'the session',
+                 stats.total_tt, output_path, summary.getvalue().strip('\n'))
@@ -0,0 +1,213 @@
+"""Looks up keycombos across all generated applications, using an index file that is only rebuilt when
+content/generated changes.
+
+Usage (from the repository root):
+    python -m shmaplib query "ctrl+shift+z" --os mac
+"""
+
+# Only modules that are fast to import: a query with an up to date index must start quickly. A ShortcutDatabase (which
+# imports appdata.py) is only created to build the index.
+import os
+import sys
+import marshal
+import argparse
+
+from . import keynames
+from .constants import DIR_CACHE, DIR_CONTENT_GENERATED, VALID_OS_NAMES, GENERATED_SIDECAR_EXTENSIONS
+from .database import ShortcutRecord, ShortcutDatabase
+
+
+QUERY_INDEX_FILE = os.path.join(DIR_CACHE, "query_index.bin")
+QUERY_INDEX_VERSION = 1
+
+
+def get_generated_signature(generated_dir=DIR_CONTENT_GENERATED):
+    """Returns a sorted list of (filename, mtime, size) of the application files in generated_dir,
+    it changes whenever a file is added, removed or changed"""
+
+    signature = []
+    for entry in os.scandir(generated_dir):
+        if entry.name.endswith('.json') and not entry.name.endswith(GENERATED_SIDECAR_EXTENSIONS):
+            stat = entry.stat()
+            signature.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    signature.sort()
+    return signature
+
+
+def build_query_index(generated_dir=DIR_CONTENT_GENERATED, index_file=QUERY_INDEX_FILE):
+    """Writes the query index of all applications in generated_dir, as loaded by a ShortcutDatabase.
+
+    The file has the size of its header (8 bytes), the header and one list of shortcuts per keycombo, all written with
+    marshal: it is a cache for this python version only, and marshal loads faster than pickle imports. The header maps
+    each keycombo ("CONTROL+SHIFT+Z") to the offset and size of its list, so a lookup only loads what it needs.
+    """
+
+    # Taken before reading the files, a file that changes while building makes the next query rebuild the index
+    signature = get_generated_signature(generated_dir)
+
+    # Every application is read once, there is no need to keep them loaded
+    db = ShortcutDatabase(generated_dir, max_loaded_apps=1, manifest_file=None)
+    combos = {}
+    for s in db.get_shortcuts():
+        combo = u''.join(m + u'+' for m in s.mods) + s.key
+        combos.setdefault(combo, []).append((s.app, s.version, s.os, s.context, s.name))
+
+    offsets = {}
+    chunks = []
+    offset = 0
+    for combo in sorted(combos):
+        chunk = marshal.dumps(combos[combo])
+        offsets[combo] = (offset, len(chunk))
+        chunks.append(chunk)
+        offset += len(chunk)
+
+    header = marshal.dumps({"version": QUERY_INDEX_VERSION, "python": tuple(sys.version_info[:2]),
+                            "signature": signature, "offsets": offsets})
+
+    index_dir = os.path.dirname(index_file)
+    if not os.path.exists(index_dir):
+        os.makedirs(index_dir)
+
+    # Write to a temporary file first, so a concurrent query never reads a half written index
+    tmp_file = index_file + '.tmp%d' % os.getpid()
+    with open(tmp_file, 'wb') as f:
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_file, index_file)
+
+
+class QueryIndex(object):
+    """Reads the query index file, rebuilding it first when it is missing or content/generated has changed"""
+
+    def __init__(self, generated_dir=DIR_CONTENT_GENERATED, index_file=QUERY_INDEX_FILE):
+        super(QueryIndex, self).__init__()
+        self.generated_dir = generated_dir
+        self.index_file = index_file
+        self.offsets = {}
+        self.data_offset = 0
+        self.rebuilt = False
+
+        if not self._read_header():
+            build_query_index(generated_dir, index_file)
+            self.rebuilt = True
+            self._read_header()
+
+    def _read_header(self):
+        """Returns False when the index has to be rebuilt"""
+        try:
+            with open(self.index_file, 'rb') as f:
+                size = int.from_bytes(f.read(8), 'little')
+                header = marshal.loads(f.read(size))
+                self.data_offset = 8 + size
+        except (IOError, OSError, EOFError, ValueError, TypeError):
+            return False
+
+        if not isinstance(header, dict) or header.get("version") != QUERY_INDEX_VERSION or \
+                header.get("python") != tuple(sys.version_info[:2]) or \
+                header.get("signature") != get_generated_signature(self.generated_dir):
+            return False
+
+        self.offsets = header["offsets"]
+        return True
+
+    def lookup(self, combo):
+        """Returns the ShortcutRecords bound to a keycombo of valid key names, in "CONTROL+SHIFT+Z" form
+        (modifiers sorted)"""
+
+        location = self.offsets.get(combo)
+        if location is None:
+            return []
+
+        offset, size = location
+        with open(self.index_file, 'rb') as f:
+            f.seek(self.data_offset + offset)
+            shortcuts = marshal.loads(f.read(size))
+
+        parts = combo.split('+')
+        mods, key = tuple(parts[:-1]), parts[-1]
+        return [ShortcutRecord(app, version, os_name, context, key, mods, name)
+                for app, version, os_name, context, name in shortcuts]
+
+
+def _split_combo(text):
+    """Splits user input like "ctrl+shift+z", "Ctrl + +" or "cmd+/" into (mods, key)"""
+
+    text = text.strip()
+    if text.endswith('+'):
+        mods, key = text[:-1], '+'
+    else:
+        mods, _, key = text.rpartition('+')
+    return [m.strip() for m in mods.split('+') if m.strip()], key.strip()
+
+
+def resolve_combos(text, explicit_numpad_mode=False):
+    """Resolves user input like "ctrl+shift+z" to keycombos of valid key names with keynames.get_valid_keynames(),
+    in "CONTROL+SHIFT+Z" form. Ambiguous keys resolve to several keycombos ("ctrl++" matches PLUS and NUMPAD_PLUS).
+    Raises ValueError for unknown key names."""
+
+    mods, key = _split_combo(text)
+
+    valid_mods = set()
+    for mod in mods:
+        names = keynames.get_valid_keynames(mod, explicit_numpad_mode)
+        if len(names) == 0:
+            raise ValueError("Unknown modifier key '%s'" % mod)
+        valid_mods.add(names[0])
+
+    keys = keynames.get_valid_keynames(key, explicit_numpad_mode)
+    if len(keys) == 0:
+        raise ValueError("Unknown key '%s'" % key)
+
+    mods_prefix = u''.join(m + u'+' for m in sorted(valid_mods))
+    return [mods_prefix + k for k in keys]
+
+
+def query(text, os_name=None, app=None, index=None):
+    """Returns the ShortcutRecords bound to the keycombo given as user input, like "ctrl+shift+z" """
+
+    if index is None:
+        index = QueryIndex()
+
+    results = []
+    for combo in resolve_combos(text):
+        for shortcut in index.lookup(combo):
+            if os_name is not None and shortcut.os != os_name:
+                continue
+            if app is not None and shortcut.app.lower() != app.lower():
+                continue
+            results.append(shortcut)
+
+    results.sort(key=lambda s: (s.app.lower(), s.version, s.os, s.context, s.name))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m shmaplib query",
+                                     description="Finds the shortcuts bound to a keycombo in all generated applications.")
+    parser.add_argument('combo', help="Keycombo, like \"ctrl+shift+z\" or \"cmd + /\"")
+    parser.add_argument('--os', choices=VALID_OS_NAMES, help="Only show shortcuts for this OS")
+    parser.add_argument('--app', help="Only show shortcuts of this application (case insensitive)")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the index, even if content/generated is unchanged")
+    args = parser.parse_args(argv)
+
+    if args.rebuild:
+        build_query_index()
+    index = QueryIndex()
+    if index.rebuilt:
+        sys.stderr.write("Rebuilt the query index of %s\n" % index.generated_dir)
+
+    try:
+        results = query(args.combo, args.os, args.app, index)
+    except ValueError as e:
+        sys.stderr.write("Error: %s\n" % e)
+        return 2
+
+    for s in results:
+        sys.stdout.write(u"%s %s (%s)  [%s]  %s  %s\n" % (
+            s.app, s.version, s.os, s.context, '+'.join(s.mods + (s.key,)), s.name))
+    if not results:
+        sys.stdout.write("No shortcuts found\n")
+        return 1
+    return 0
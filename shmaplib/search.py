@@ -0,0 +1,169 @@
+"""A prebuilt inverted index of shortcut names, written next to a generated application json file.
+
+{
+    "format": "shmaplib-search",
+    "format_version": 2,
+    "source": {"name": "...", "version": "...", "os": "...", "size": BYTES, "sha1": "HASH"},
+    "contexts": ["Context Name", ...],
+    "keys": ["A", "B", ...],
+    "entries": [context id, key id, shortcut index, context id, key id, shortcut index, ...],
+    "terms": {"term": [entry id, ...], ...}
+}
+
+An entry points at contexts[context name][key][shortcut index] in the generated json file, entry ids follow the order
+of that file. Terms are the normalized tokens of shortcut names and all their prefixes of at least MIN_PREFIX_LENGTH
+characters, so a lookup is a single dict access per search word instead of a scan of all shortcuts.
+
+"source" identifies the generated json file the entries point into. An app can be exported again without its search
+index, so the web application only uses an index of which the source matches the json file it loaded.
+
+The search box of the web application (content/javascripts/manager.js) loads this file when it exists, and tokenizes
+and matches the same way when it has to scan the shortcuts.
+"""
+
+import io
+import re
+import json
+import hashlib
+import unicodedata
+
+from .names import decode_name
+
+
+SEARCH_INDEX_FORMAT = "shmaplib-search"
+SEARCH_INDEX_FORMAT_VERSION = 2
+
+# Same as the minimum search length of the web application
+MIN_PREFIX_LENGTH = 2
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Splits text into normalized search tokens: lowercase, without accents, split on anything but letters and
+    digits. Used for both shortcut names and search queries."""
+
+    text = unicodedata.normalize('NFKD', text)
+    text = u''.join(c for c in text if not unicodedata.combining(c))
+    return _TOKEN_RE.findall(text.lower())
+
+
+def get_terms(token):
+    """Returns the index terms of a token: all its prefixes of at least MIN_PREFIX_LENGTH characters"""
+
+    if len(token) <= MIN_PREFIX_LENGTH:
+        return [token]
+    return [token[:n] for n in range(MIN_PREFIX_LENGTH, len(token) + 1)]
+
+
+def get_source(app_config, json_path=None):
+    """Returns the "source" of the search index of an ApplicationConfig, json_path is the generated json file of the
+    app. The size and sha1 of the file are left out without it"""
+
+    source = {
+        "name": decode_name(app_config.name),
+        "version": decode_name(app_config.version),
+        "os": app_config.os,
+    }
+    if json_path is not None:
+        with open(json_path, 'rb') as f:
+            data = f.read()
+        source["size"] = len(data)
+        source["sha1"] = hashlib.sha1(data).hexdigest()
+    return source
+
+
+def build_search_index(app_config, json_path=None):
+    """Builds the search index of an ApplicationConfig, returns a dict that can be written as json
+
+    :param json_path: the generated json file of the app, identifies it in the "source" of the index
+    """
+
+    contexts = []
+    key_ids = {}
+    entries = []
+    terms = {}
+
+    # Same order as the generated json: contexts by name, keys sorted, shortcuts by their serialized json
+    for context in sorted(app_config.contexts.values(), key=lambda c: c.name):
+        if len(context.shortcuts) == 0:
+            continue
+
+        context_id = len(contexts)
+        # Names as the web application reads them from the generated json
+        contexts.append(decode_name(context.name))
+        for key, shortcuts in context.get_sorted_shortcuts():
+            key_id = key_ids.setdefault(key, len(key_ids))
+            for i, shortcut in enumerate(shortcuts):
+                entry_id = len(entries) // 3
+                entries.extend((context_id, key_id, i))
+
+                for token in set(tokenize(decode_name(shortcut.name))):
+                    for term in get_terms(token):
+                        postings = terms.setdefault(term, [])
+                        # A name can have several tokens with the same prefix
+                        if not postings or postings[-1] != entry_id:
+                            postings.append(entry_id)
+
+    keys = [None] * len(key_ids)
+    for key, key_id in key_ids.items():
+        keys[key_id] = key
+
+    return {
+        "format": SEARCH_INDEX_FORMAT,
+        "format_version": SEARCH_INDEX_FORMAT_VERSION,
+        "source": get_source(app_config, json_path),
+        "contexts": contexts,
+        "keys": keys,
+        "entries": entries,
+        "terms": dict(sorted(terms.items())),
+    }
+
+
+def write_search_index(app_config, output_path, json_path):
+    """Writes the search index of an ApplicationConfig to output_path (without whitespace), json_path is the
+    generated json file of the app"""
+
+    index = build_search_index(app_config, json_path)
+    with io.open(output_path, mode='w', encoding='utf-8', newline='') as f:
+        f.write(json.dumps(index, separators=(',', ':'), ensure_ascii=False))
+
+
+def read_search_index(path):
+    with io.open(path, encoding='utf-8') as f:
+        index = json.load(f)
+
+    if index.get("format") != SEARCH_INDEX_FORMAT:
+        raise ValueError("Not a search index file")
+    if index["format_version"] > SEARCH_INDEX_FORMAT_VERSION:
+        raise ValueError("Unsupported search index format version %d" % index["format_version"])
+    return index
+
+
+def search_shortcuts(index, query):
+    """Returns the shortcuts of which the name has a token starting with each word of the query, as a list of
+    (context name, key, shortcut index) in the order of the generated json file"""
+
+    entry_ids = None
+    for token in tokenize(query):
+        # Words shorter than MIN_PREFIX_LENGTH only match whole tokens
+        postings = index["terms"].get(token)
+        if postings is None:
+            return []
+
+        if entry_ids is None:
+            entry_ids = set(postings)
+        else:
+            entry_ids.intersection_update(postings)
+
+    if not entry_ids:
+        return []
+
+    contexts = index["contexts"]
+    keys = index["keys"]
+    entries = index["entries"]
+    results = []
+    for entry_id in sorted(entry_ids):
+        i = entry_id * 3
+        results.append((contexts[entries[i]], keys[entries[i + 1]], entries[i + 2]))
+    return results
@@ -0,0 +1,178 @@
+"""Writes generated application data into a SQLite database, for queries that join across all apps and versions.
+
+Tables, every generated json file is one row in versions:
+    apps            (id, name)
+    versions        (id, app_id, version, os, default_context)
+    contexts        (id, version_id, name)
+    keys            (id, name)
+    mods            (id, name)
+    shortcuts       (id, context_id, key_id, name)
+    shortcut_mods   (shortcut_id, mod_id)
+
+The shortcut_combos view joins them back into (app, version, os, context, key, mods, name) rows, mods is a sorted,
+'+' separated string like "CONTROL+SHIFT". Example:
+    SELECT app, version, name FROM shortcut_combos WHERE os = 'mac' AND key = 'Z' AND mods = 'COMMAND+SHIFT'
+"""
+
+import os
+import sqlite3
+
+from .names import decode_name
+
+
+SQLITE_SCHEMA_VERSION = 1
+
+_SCHEMA = u"""
+CREATE TABLE IF NOT EXISTS apps (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY,
+    app_id INTEGER NOT NULL REFERENCES apps(id),
+    version TEXT NOT NULL,
+    os TEXT NOT NULL,
+    default_context TEXT NOT NULL,
+    UNIQUE (app_id, version, os)
+);
+CREATE TABLE IF NOT EXISTS contexts (
+    id INTEGER PRIMARY KEY,
+    version_id INTEGER NOT NULL REFERENCES versions(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    UNIQUE (version_id, name)
+);
+CREATE TABLE IF NOT EXISTS keys (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS mods (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS shortcuts (
+    id INTEGER PRIMARY KEY,
+    context_id INTEGER NOT NULL REFERENCES contexts(id) ON DELETE CASCADE,
+    key_id INTEGER NOT NULL REFERENCES keys(id),
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shortcut_mods (
+    shortcut_id INTEGER NOT NULL REFERENCES shortcuts(id) ON DELETE CASCADE,
+    mod_id INTEGER NOT NULL REFERENCES mods(id),
+    PRIMARY KEY (shortcut_id, mod_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS shortcuts_context ON shortcuts(context_id);
+CREATE INDEX IF NOT EXISTS shortcuts_key ON shortcuts(key_id);
+CREATE INDEX IF NOT EXISTS shortcuts_name ON shortcuts(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS shortcut_mods_mod ON shortcut_mods(mod_id);
+
+CREATE VIEW IF NOT EXISTS shortcut_combos AS
+    SELECT a.name AS app, v.version AS version, v.os AS os, c.name AS context, k.name AS key,
+           (SELECT ifnull(group_concat(name, '+'), '') FROM
+               (SELECT m.name AS name FROM shortcut_mods sm JOIN mods m ON m.id = sm.mod_id
+                WHERE sm.shortcut_id = s.id ORDER BY m.name)) AS mods,
+           s.name AS name
+    FROM shortcuts s
+    JOIN contexts c ON c.id = s.context_id
+    JOIN versions v ON v.id = c.version_id
+    JOIN apps a ON a.id = v.app_id
+    JOIN keys k ON k.id = s.key_id;
+"""
+
+
+def connect(db_path):
+    """Opens the database at db_path, creating it when it doesn't exist. Raises ValueError when the database was
+    created by a newer version of this module."""
+
+    db_dir = os.path.dirname(os.path.abspath(db_path))
+    if not os.path.exists(db_dir):
+        os.makedirs(db_dir)
+
+    # Parallel exports write into the same database, wait for each other's transactions
+    conn = sqlite3.connect(db_path, timeout=60)
+    conn.execute("PRAGMA foreign_keys = ON")
+
+    schema_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if schema_version > SQLITE_SCHEMA_VERSION:
+        conn.close()
+        raise ValueError("Unsupported database schema version %d" % schema_version)
+
+    if schema_version < SQLITE_SCHEMA_VERSION:
+        with conn:
+            conn.executescript(_SCHEMA)
+            conn.execute("PRAGMA user_version = %d" % SQLITE_SCHEMA_VERSION)
+    return conn
+
+
+def _get_id(conn, table, name, cache):
+    """Returns the id of the row with the given name in a (id, name) table, inserts it when missing"""
+
+    row_id = cache.get(name)
+    if row_id is None:
+        conn.execute("INSERT OR IGNORE INTO %s (name) VALUES (?)" % table, (name,))
+        row_id = conn.execute("SELECT id FROM %s WHERE name = ?" % table, (name,)).fetchone()[0]
+        cache[name] = row_id
+    return row_id
+
+
+def write_application(conn, app_config):
+    """Writes an ApplicationConfig into the database, replacing the data of the same app, version and os.
+    This is one transaction: other connections see either the previous or the new data of the app."""
+
+    with conn:
+        app_id = _get_id(conn, 'apps', decode_name(app_config.name), {})
+        version = decode_name(app_config.version)
+
+        # Contexts, shortcuts and shortcut_mods of the previous export are removed by cascading deletes
+        conn.execute("DELETE FROM versions WHERE app_id = ? AND version = ? AND os = ?",
+                     (app_id, version, app_config.os))
+        version_id = conn.execute(
+            "INSERT INTO versions (app_id, version, os, default_context) VALUES (?, ?, ?, ?)",
+            (app_id, version, app_config.os, decode_name(app_config.default_context_name))).lastrowid
+
+        key_ids = {}
+        mod_ids = {}
+        for context in sorted(app_config.contexts.values(), key=lambda c: c.name):
+            if len(context.shortcuts) == 0:
+                continue
+
+            context_id = conn.execute("INSERT INTO contexts (version_id, name) VALUES (?, ?)",
+                                      (version_id, decode_name(context.name))).lastrowid
+
+            for key, shortcuts in context.get_sorted_shortcuts():
+                key_id = _get_id(conn, 'keys', key, key_ids)
+                for shortcut in shortcuts:
+                    shortcut_id = conn.execute("INSERT INTO shortcuts (context_id, key_id, name) VALUES (?, ?, ?)",
+                                               (context_id, key_id, decode_name(shortcut.name))).lastrowid
+                    conn.executemany("INSERT OR IGNORE INTO shortcut_mods (shortcut_id, mod_id) VALUES (?, ?)",
+                                     [(shortcut_id, _get_id(conn, 'mods', mod, mod_ids)) for mod in shortcut.mods])
+
+
+def has_application(db_path, app_name, version, os_name):
+    """Returns True when the database at db_path has the data of an application version and os. Doesn't create the
+    database when it doesn't exist."""
+
+    if not os.path.exists(db_path):
+        return False
+
+    conn = sqlite3.connect(db_path, timeout=60)
+    try:
+        row = conn.execute("SELECT 1 FROM versions v JOIN apps a ON a.id = v.app_id "
+                           "WHERE a.name = ? AND v.version = ? AND v.os = ?",
+                           (decode_name(app_name), decode_name(version), os_name)).fetchone()
+    except sqlite3.DatabaseError:
+        # Not a database written by this module
+        return False
+    finally:
+        conn.close()
+    return row is not None
+
+
+def write_application_to_file(app_config, db_path):
+    """Opens the database at db_path, writes an ApplicationConfig into it and closes it again"""
+
+    conn = connect(db_path)
+    try:
+        write_application(conn, app_config)
+    finally:
+        conn.close()
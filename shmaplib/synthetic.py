@@ -0,0 +1,126 @@
+"""Generates synthetic shortcut data, used to test how the pipeline scales beyond the size of real applications.
+
+Usage (from the repository root):
+    python -m shmaplib.synthetic -n 100000 -c 50 -o synthetic.json
+"""
+
+import sys
+import random
+import argparse
+
+from .constants import OS_WINDOWS, OS_MAC
+from .appdata import Shortcut, ApplicationConfig
+from .intermediate import IntermediateShortcutData
+
+
+# Keys and modifiers as they are written in intermediate files
+INTERMEDIATE_KEYS = [
+    'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M',
+    'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z',
+    '0', '1', '2', '3', '4', '5', '6', '7', '8', '9',
+    'F1', 'F2', 'F3', 'F4', 'F5', 'F6', 'F7', 'F8', 'F9', 'F10', 'F11', 'F12',
+    'Tab', 'Space', 'Enter', 'Esc', 'Delete', 'Home', 'End', 'Page Up', 'Page Down',
+    'Up Arrow', 'Down Arrow', 'Left Arrow', 'Right Arrow',
+    '[', ']', ';', ',', '.', '-', '=', '+', '/', 'Numpad +', 'Numpad 5',
+]
+INTERMEDIATE_MODS = {
+    OS_WINDOWS: ['Ctrl', 'Shift', 'Alt'],
+    OS_MAC: ['Cmd', 'Shift', 'Opt', 'Ctrl'],
+}
+INTERMEDIATE_RANGES = ['0-9', '1-5', 'Numpad 0-9']
+
+# Keys and modifiers as they are used in ApplicationConfigs
+APPDATA_KEYS = [
+    'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M',
+    'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z',
+    'ONE', 'TWO', 'THREE', 'FOUR', 'FIVE', 'F1', 'F2', 'F3', 'F4', 'F5',
+    'TAB', 'SPACE', 'ENTER', 'ESCAPE', 'DELETE', 'HOME', 'END', 'UP_ARROW', 'DOWN_ARROW',
+]
+APPDATA_MODS = ['CONTROL', 'SHIFT', 'ALT', 'COMMAND']
+
+
+def _random_mods(rng, mods):
+    return rng.sample(mods, rng.choice((0, 1, 1, 2, 2, 3)) % (len(mods) + 1))
+
+
+def _random_combo(rng, mods, key):
+    return ' + '.join(_random_mods(rng, mods) + [key])
+
+
+def _random_keys(rng, os_name, range_ratio, multi_option_ratio):
+    mods = INTERMEDIATE_MODS[os_name]
+    r = rng.random()
+
+    # Range of keys: "Ctrl + 0-9"
+    if r < range_ratio:
+        return _random_combo(rng, mods, rng.choice(INTERMEDIATE_RANGES))
+
+    # Multiple options: "Shift + ] / Shift + [ or A"
+    if r < range_ratio + multi_option_ratio:
+        keys = _random_combo(rng, mods, rng.choice(INTERMEDIATE_KEYS))
+        for i in range(rng.randint(1, 3)):
+            keys += rng.choice((' / ', ' or ')) + _random_combo(rng, mods, rng.choice(INTERMEDIATE_KEYS))
+        return keys
+
+    return _random_combo(rng, mods, rng.choice(INTERMEDIATE_KEYS))
+
+
+def generate_intermediate_data(num_shortcuts, num_contexts=10, range_ratio=0.05, multi_option_ratio=0.1,
+                               seed=0, name_prefix="Shortcut"):
+    """Generates an IntermediateShortcutData document with num_shortcuts shortcuts spread over num_contexts contexts.
+
+    :param range_ratio: fraction of shortcuts that use a range of keys ("Ctrl + 0-9")
+    :param multi_option_ratio: fraction of shortcuts with multiple options ("A / Shift + B or C")
+    :param seed: the same seed always generates the same document
+    :param name_prefix: shortcut names are "PREFIX N", use the same prefix for documents that should be merged
+    """
+
+    rng = random.Random(seed)
+    idata = IntermediateShortcutData("Synthetic App", "v%d" % num_shortcuts, "Context 0", [OS_WINDOWS, OS_MAC])
+    for i in range(num_shortcuts):
+        context_name = "Context %d" % (i % num_contexts)
+        keys_win = _random_keys(rng, OS_WINDOWS, range_ratio, multi_option_ratio)
+        keys_mac = _random_keys(rng, OS_MAC, range_ratio, multi_option_ratio)
+        idata.add_shortcut(context_name, "%s %d" % (name_prefix, i), keys_win, keys_mac)
+
+    return idata
+
+
+def generate_application_config(num_shortcuts, num_contexts=10, anymod_ratio=0.02, seed=0, os_name=OS_WINDOWS,
+                                check_for_duplicates=True):
+    """Generates an ApplicationConfig with num_shortcuts shortcuts spread over num_contexts contexts.
+
+    :param anymod_ratio: fraction of shortcuts that can be used with any modifier
+    :param check_for_duplicates: skip shortcuts with a keycombo that already exists in their context, like in
+                                 a real export. Set to False to keep all shortcuts, no matter the number of contexts.
+    """
+
+    rng = random.Random(seed)
+    app = ApplicationConfig("Synthetic App", "v%d" % num_shortcuts, os_name, "Context 0")
+    contexts = [app.get_or_create_new_context("Context %d" % i) for i in range(num_contexts)]
+    for i in range(num_shortcuts):
+        anymod = rng.random() < anymod_ratio
+        shortcut = Shortcut("Shortcut %d" % i, rng.choice(APPDATA_KEYS), _random_mods(rng, APPDATA_MODS), anymod)
+        contexts[i % num_contexts].add_shortcut(shortcut, check_for_duplicates)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates a synthetic intermediate data file.")
+    parser.add_argument('-n', '--num-shortcuts', type=int, default=10000, help="Number of shortcuts")
+    parser.add_argument('-c', '--num-contexts', type=int, default=10, help="Number of contexts")
+    parser.add_argument('-r', '--range-ratio', type=float, default=0.05, help="Fraction of shortcuts with a range of keys")
+    parser.add_argument('-m', '--multi-option-ratio', type=float, default=0.1, help="Fraction of shortcuts with multiple options")
+    parser.add_argument('-s', '--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('-o', '--output', required=True, help="Output filepath")
+    args = parser.parse_args()
+
+    idata = generate_intermediate_data(args.num_shortcuts, args.num_contexts, args.range_ratio,
+                                       args.multi_option_ratio, args.seed)
+    idata.serialize(args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import os
+import json
+import time
+import threading
+import contextlib
+
+
+class _TracingState(object):
+    enabled = False
+
+    # Chrome trace_event dicts, in the order the spans ended
+    events = []
+
+
+def enable_tracing(process_name=None):
+    """Start a new recording of trace spans. The spans can be written in the Chrome trace_event format with write_trace()
+    and viewed in chrome://tracing or https://ui.perfetto.dev
+
+    :param process_name: label of this process in the timeline, like 'main' or 'worker 1'
+    """
+
+    # Forked worker processes inherit the events of their parent, they only send back their own
+    _TracingState.enabled = True
+    _TracingState.events = []
+    if process_name is not None:
+        _TracingState.events.append({
+            "name": "process_name",
+            "ph": "M",
+            "pid": os.getpid(),
+            "args": {"name": process_name},
+        })
+
+
+def is_tracing():
+    return _TracingState.enabled
+
+
+@contextlib.contextmanager
+def trace_span(name, category='export', **args):
+    """Records a span around a block of code, with the process and thread it ran on. Can also be used as a decorator.
+    Keyword arguments are shown with the span in the timeline. Does nothing unless enable_tracing() was called."""
+
+    if not _TracingState.enabled:
+        yield
+        return
+
+    # Wall clock time, so the spans of worker processes line up with the main process
+    start = time.time()
+    try:
+        yield
+    finally:
+        end = time.time()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": int(start * 1000000),
+            "dur": int((end - start) * 1000000),
+            "pid": os.getpid(),
+            "tid": threading.current_thread().ident,
+        }
+        if args:
+            event["args"] = args
+        _TracingState.events.append(event)
+
+
+def pop_trace_events():
+    """Returns all recorded events and clears them, used to send the events of a worker process to the main process"""
+
+    events = _TracingState.events
+    _TracingState.events = []
+    return events
+
+
+def add_trace_events(events):
+    """Adds events recorded by another process"""
+
+    _TracingState.events.extend(events)
+
+
+def write_trace(output_path):
+    """Writes all recorded events to a Chrome trace_event json file"""
+
+    with open(output_path, 'w') as f:
+        json.dump({"traceEvents": _TracingState.events, "displayTimeUnit": "ms"}, f)
@@ -12,7 +12,7 @@ sys.path.insert(0, os.path.normpath(os.path.join(CWD, '..', '..')))
 
 # Import common shortcut mapper library
 import shmaplib
-from shmaplib.adobe import AdobeDocsParser
+from shmaplib.adobe import AdobeDocsParser, PARSERS
 log = shmaplib.setuplog(os.path.join(CWD, 'output.log'))
 
 
@@ -20,6 +20,8 @@ def main():
     parser = argparse.ArgumentParser(description="Converts Lightrooms's raw files to an intermediate format.")
     parser.add_argument('-v', '--verbose', action='store_true', required=False, help="Verbose output")
     parser.add_argument('-o', '--output', required=True, help="Output filepath")
+    parser.add_argument('-p', '--profile', metavar='DIR', required=False, help="Profile each stage (parse, serialize) and write the .pstats files to DIR")
+    parser.add_argument('--parser', choices=PARSERS, required=False, help="BeautifulSoup parser backend (default: lxml when it is installed)")
     parser.add_argument('source', help="Source: HTML file containing shortcuts saved directly from adobe's online documentation (/raw folder)")
 
     args = parser.parse_args()
@@ -35,9 +37,14 @@ def main():
     if args.verbose:
         log.setLevel(logging.DEBUG)
 
+    if args.profile:
+        shmaplib.enable_profiling(args.profile)
+
     # Parse the docs html
-    docs_idata = AdobeDocsParser("Adobe Lightroom").parse(args.source)
-    docs_idata.serialize(args.output)
+    with shmaplib.profile_input(args.source):
+        with shmaplib.profile_stage('parse'):
+            docs_idata = AdobeDocsParser("Adobe Lightroom", args.parser).parse(args.source)
+        docs_idata.serialize(args.output)
 
 
 if __name__ == '__main__':
@@ -14,7 +14,7 @@ sys.path.insert(0, os.path.normpath(os.path.join(CWD, '..', '..')))
 
 # Import common shortcut mapper library
 import shmaplib
-from shmaplib.adobe import AdobeDocsParser, AdobeSummaryParser
+from shmaplib.adobe import AdobeDocsParser, AdobeSummaryParser, PARSERS
 from shmaplib import IntermediateShortcutData
 log = shmaplib.setuplog(os.path.join(CWD, 'output.log'))
 
@@ -24,6 +24,8 @@ def main():
     parser = argparse.ArgumentParser(description="Converts Photoshop's raw files to an intermediate format.")
     parser.add_argument('-v', '--verbose', action='store_true', required=False, help="Verbose output")
     parser.add_argument('-o', '--output', required=True, help="Output filepath")
+    parser.add_argument('-p', '--profile', metavar='DIR', required=False, help="Profile each stage (parse, merge, serialize) and write the .pstats files to DIR")
+    parser.add_argument('--parser', choices=PARSERS, required=False, help="BeautifulSoup parser backend (default: lxml when it is installed)")
     parser.add_argument('docs_html', help="A HTML file containing shortcuts saved directly from adobe's online documentation")
     parser.add_argument('summary_mac', help="A summary HTML file exported from photoshop for MacOS")
     parser.add_argument('summary_win', help="A summary HTML file exported from photoshop for Windows")
@@ -42,19 +44,27 @@ def main():
     if args.verbose:
         log.setLevel(logging.DEBUG)
 
+    if args.profile:
+        shmaplib.enable_profiling(args.profile)
+
     # Parse the docs html
-    docs_idata = AdobeDocsParser(APP_NAME).parse(args.docs_html)
+    with shmaplib.profile_input(args.docs_html), shmaplib.profile_stage('parse'):
+        docs_idata = AdobeDocsParser(APP_NAME, args.parser).parse(args.docs_html)
 
     # Parse both summary docs
-    mac_summary_idata = AdobeSummaryParser(APP_NAME).parse(args.summary_mac, "mac")
-    win_summary_idata = AdobeSummaryParser(APP_NAME).parse(args.summary_win, "windows")
+    with shmaplib.profile_input(args.summary_mac), shmaplib.profile_stage('parse'):
+        mac_summary_idata = AdobeSummaryParser(APP_NAME).parse(args.summary_mac, "mac")
+    with shmaplib.profile_input(args.summary_win), shmaplib.profile_stage('parse'):
+        win_summary_idata = AdobeSummaryParser(APP_NAME).parse(args.summary_win, "windows")
 
     # Merge all source data into a single file
-    merged_idata = IntermediateShortcutData(APP_NAME)
-    merged_idata.extend(mac_summary_idata)
-    merged_idata.extend(win_summary_idata)
-    merged_idata.extend(docs_idata)
-    merged_idata.serialize(args.output)
+    with shmaplib.profile_input(args.output):
+        with shmaplib.profile_stage('merge'):
+            merged_idata = IntermediateShortcutData(APP_NAME)
+            merged_idata.extend(mac_summary_idata)
+            merged_idata.extend(win_summary_idata)
+            merged_idata.extend(docs_idata)
+        merged_idata.serialize(args.output)
 
 
 
@@ -74,6 +74,7 @@ def main():
     parser = argparse.ArgumentParser(description="Converts 3dsMax's raw files to an intermediate format.")
     parser.add_argument('-v', '--verbose', action='store_true', required=False, help="Verbose output")
     parser.add_argument('-o', '--output', required=True, help="Output filepath")
+    parser.add_argument('-p', '--profile', metavar='DIR', required=False, help="Profile each stage (parse, serialize) and write the .pstats files to DIR")
     parser.add_argument('source', help="Source: a .txt file exported from max (/raw folder)")
 
     args = parser.parse_args()
@@ -89,9 +90,14 @@ def main():
     if args.verbose:
         log.setLevel(logging.DEBUG)
 
+    if args.profile:
+        shmaplib.enable_profiling(args.profile)
+
     # Parse the docs html
-    docs_idata = RawKBDXParser().parse(args.source)
-    docs_idata.serialize(args.output)
+    with shmaplib.profile_input(args.source):
+        with shmaplib.profile_stage('parse'):
+            docs_idata = RawKBDXParser().parse(args.source)
+        docs_idata.serialize(args.output)
 
 
 
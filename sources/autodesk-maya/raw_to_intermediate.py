@@ -102,6 +102,7 @@ def main():
     parser = argparse.ArgumentParser(description="Converts Maya's raw files to an intermediate format.")
     parser.add_argument('-v', '--verbose', action='store_true', required=False, help="Verbose output")
     parser.add_argument('-o', '--output', required=True, help="Output filepath")
+    parser.add_argument('-p', '--profile', metavar='DIR', required=False, help="Profile each stage (parse, serialize) and write the .pstats files to DIR")
     parser.add_argument('source', help="Source: HTML file containing shortcuts saved directly from adobe's online documentation (/raw folder)")
 
     args = parser.parse_args()
@@ -117,9 +118,14 @@ def main():
     if args.verbose:
         log.setLevel(logging.DEBUG)
 
+    if args.profile:
+        shmaplib.enable_profiling(args.profile)
+
     # Parse the docs html
-    docs_idata = RawDocsParser().parse(args.source)
-    docs_idata.serialize(args.output)
+    with shmaplib.profile_input(args.source):
+        with shmaplib.profile_stage('parse'):
+            docs_idata = RawDocsParser().parse(args.source)
+        docs_idata.serialize(args.output)
 
 
 
@@ -49,7 +49,7 @@ class RawHoudiniConfigParser(object):
         name = os.path.basename(source_dir)
         self.idata.version = name[name.index('_v')+1:-4]
 
-        files = os.listdir(source_dir)
+        files = sorted(os.listdir(source_dir))
         for filename in files:
             filepath = os.path.join(source_dir, filename)
             log.debug('Parsing file "%s"', filepath)
@@ -136,6 +136,7 @@ def main():
     parser = argparse.ArgumentParser(description="Converts Houdini's keyboard config files to an intermediate format that can be hand-edited.")
     parser.add_argument('-v', '--verbose', action='store_true', required=False, help="Verbose output")
     parser.add_argument('-o', '--output', required=True, help="Output filepath")
+    parser.add_argument('-p', '--profile', metavar='DIR', required=False, help="Profile each stage (parse, serialize) and write the .pstats files to DIR")
     parser.add_argument('source', help="Source: path to directory of Houdini keyboard shortcuts (found under raw dir)")
 
     args = parser.parse_args()
@@ -151,9 +152,14 @@ def main():
     if args.verbose:
         log.setLevel(logging.DEBUG)
 
+    if args.profile:
+        shmaplib.enable_profiling(args.profile)
+
     # Parse the keyconfig data
-    docs_idata = RawHoudiniConfigParser().parse(args.source)
-    docs_idata.serialize(args.output)
+    with shmaplib.profile_input(args.source):
+        with shmaplib.profile_stage('parse'):
+            docs_idata = RawHoudiniConfigParser().parse(args.source)
+        docs_idata.serialize(args.output)
 
 
 
@@ -98,6 +98,7 @@ def main():
     parser = argparse.ArgumentParser(description="Converts Sublime Text's raw files to an intermediate format.")
     parser.add_argument('-v', '--verbose', action='store_true', required=False, help="Verbose output")
     parser.add_argument('-o', '--output', required=True, help="Output filepath")
+    parser.add_argument('-p', '--profile', metavar='DIR', required=False, help="Profile each stage (parse, serialize) and write the .pstats files to DIR")
 
     args = parser.parse_args()
     args.output = os.path.abspath(args.output)
@@ -107,14 +108,19 @@ def main():
     if args.verbose:
         log.setLevel(logging.DEBUG)
 
+    if args.profile:
+        shmaplib.enable_profiling(args.profile)
+
     # Parse the docs html
     docs_idata = StEmmetParser()
     searchdir = os.path.join(CWD, '..', 'raw', '*.*')
     for filepath in glob.glob(searchdir):
         filepath = os.path.normpath(filepath)
-        docs_idata.parse(filepath)
+        with shmaplib.profile_input(filepath), shmaplib.profile_stage('parse'):
+            docs_idata.parse(filepath)
         log.info('    \n')
-    docs_idata.serialize(args.output)
+    with shmaplib.profile_input(args.output):
+        docs_idata.serialize(args.output)
 
 
 
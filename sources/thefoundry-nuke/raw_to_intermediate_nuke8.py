@@ -86,6 +86,7 @@ def main():
     parser = argparse.ArgumentParser(description="Scrapes a list of shortcuts from NUKE's documentation")
     parser.add_argument('-v', '--verbose', action='store_true', required=False, help="Verbose output")
     parser.add_argument('-o', '--output', required=True, help="Output filepath")
+    parser.add_argument('-p', '--profile', metavar='DIR', required=False, help="Profile each stage (parse, serialize) and write the .pstats files to DIR")
     parser.add_argument('source', help="Source: HTML file containing shortcuts saved directly from the NUKE online documentation (/raw folder)")
 
     args = parser.parse_args()
@@ -101,9 +102,14 @@ def main():
     if args.verbose:
         log.setLevel(logging.DEBUG)
 
+    if args.profile:
+        shmaplib.enable_profiling(args.profile)
+
     # Parse the docs html
-    docs_idata = RawDocsParser().parse(args.source)
-    docs_idata.serialize(args.output)
+    with shmaplib.profile_input(args.source):
+        with shmaplib.profile_stage('parse'):
+            docs_idata = RawDocsParser().parse(args.source)
+        docs_idata.serialize(args.output)
 
 
 
@@ -1 +1,12 @@
-from .keyboards import TestKeyboardLayout
\ No newline at end of file
+from .keyboards import TestKeyboardLayout
+from .keyparser import TestKeyParser
+from .scaling import TestScaling
+from .compact import TestCompactFormat
+from .search import TestSearchIndex
+from .sharding import TestShardedOutput
+from .database import TestShortcutDatabase
+from .query import TestQuery
+from .sqlite import TestSQLiteExport
+from .intermediate import TestIntermediateLoad
+from .adobe import TestAdobeParsers
+from .build import TestBuild
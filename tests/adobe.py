@@ -0,0 +1,133 @@
+import sys
+import os
+import logging
+from .utils import BaseTestCase
+
+# import our data common utility
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+import shmaplib
+from shmaplib import adobe
+from shmaplib.constants import DIR_SOURCES
+from bs4 import SoupStrainer
+
+
+DOCS_FILES = [
+    os.path.join(DIR_SOURCES, 'adobe-lightroom', 'raw', 'lightroom_v5.4.html'),       # <div class="parsys main-pars">
+    os.path.join(DIR_SOURCES, 'adobe-illustrator', 'raw', 'illustrator_cc.html'),     # <div id="main">
+]
+SUMMARY_FILE = os.path.join(DIR_SOURCES, 'adobe-photoshop', 'raw', 'photoshop_v14.2_summary_mac.html')
+SUMMARY_FILES = [
+    (os.path.join(DIR_SOURCES, 'adobe-photoshop', 'raw', 'photoshop_v14.2_summary_win.html'), 'windows'),
+    (SUMMARY_FILE, 'mac'),
+]
+
+
+def legacy_parse_summary(app_name, source_filepath, platform_type, parser):
+    """The original AdobeSummaryParser.parse, which walked the BeautifulSoup tree of the summary. Kept as a reference
+    for the streaming parser"""
+
+    idata = shmaplib.IntermediateShortcutData(app_name)
+    doc = adobe._parse_html(adobe._get_file_contents(source_filepath), parser, SoupStrainer('table'))
+    for table in doc.find_all('table'):
+        parent_categories = []
+        prev_was_category = False
+        indentation = None
+
+        for row in table.find_all('tr'):
+            cols = row.find_all('td')
+
+            # Check for category
+            if len(cols) == 1:
+                if len(parent_categories):
+                    parent_categories = parent_categories[:len(parent_categories)-1]
+                if len(cols[0]):
+                    parent_categories.append(cols[0].text + '>')
+                continue
+
+            spacers = [col for col in cols if col.get('width') == '40']
+            shortcutcols = [col for col in cols if 'shortcutcols' in col.get('class', ())]
+
+            # Handle indentation
+            if not indentation:
+                indentation = len(spacers)
+            if len(spacers) < indentation or (prev_was_category and len(spacers) == indentation):
+                parent_categories = parent_categories[:len(parent_categories)-1]
+            indentation = len(spacers)
+
+            # Skip if there are no shortcuts in this row, but check if it is a parent menu item '>'
+            if not len(shortcutcols):
+                for col in cols:
+                    if '>' in col.text:
+                        parent_categories.append(col.text)
+                        prev_was_category = True
+                continue
+            prev_was_category = False
+
+            # Find the name and shortcut text
+            name = None
+            keys = None
+            for col in shortcutcols:
+                if col.text:
+                    if name is None:
+                        name = col.text.replace('...', '')
+                        continue
+                    if col.text == u'\xa0':
+                        continue
+                    keys = u' or '.join(col.find_all(string=True))
+                    break
+
+            if not keys:
+                continue
+
+            full_name = u''.join(parent_categories) + name
+            if platform_type == 'windows':
+                idata.add_shortcut("Application", full_name, keys, "")
+            else:
+                idata.add_shortcut("Application", full_name, "", keys)
+    return idata
+
+
+class TestAdobeParsers(BaseTestCase):
+
+    def setup(self):
+        self.log = shmaplib.getlog()
+        self.log_level = self.log.level
+        self.log.setLevel(logging.CRITICAL)
+
+    def teardown(self):
+        self.log.setLevel(self.log_level)
+
+    def get_shortcuts(self, idata):
+        return [(c.name, [(s.name, s.win_keys, s.mac_keys) for s in c.shortcuts]) for c in idata.contexts]
+
+    def get_parsers(self):
+        # lxml is optional, html.parser is always available
+        if adobe.get_default_parser() == adobe.PARSER_LXML:
+            return [adobe.PARSER_HTML, adobe.PARSER_LXML]
+        return [adobe.PARSER_HTML]
+
+    def test_docs_parser_backends(self):
+        for path in DOCS_FILES:
+            results = [self.get_shortcuts(adobe.AdobeDocsParser("Test", parser).parse(path))
+                       for parser in self.get_parsers()]
+            self.assert_true(len(results[0]) > 0, "no contexts found in %s" % path)
+            for result in results[1:]:
+                self.assert_equal(result, results[0])
+
+    def test_summary_parser(self):
+        idata = adobe.AdobeSummaryParser("Test").parse(SUMMARY_FILE, "mac")
+        shortcuts = self.get_shortcuts(idata)
+        self.assert_equal(shortcuts[0][0], "Application")
+        self.assert_equal(shortcuts[0][1][0], ("Photoshop>Preferences>General", "", "Cmd+K"))
+
+        # The file is parsed while it is read, the size of the chunks must not change the result
+        chunked_idata = adobe.AdobeSummaryParser("Test", read_size=7).parse(SUMMARY_FILE, "mac")
+        self.assert_equal(self.get_shortcuts(chunked_idata), shortcuts)
+
+    def test_summary_parser_matches_legacy(self):
+        for path, platform_type in SUMMARY_FILES:
+            shortcuts = self.get_shortcuts(adobe.AdobeSummaryParser("Test").parse(path, platform_type))
+            self.assert_true(len(shortcuts[0][1]) > 100, "no shortcuts found in %s" % path)
+            for parser in self.get_parsers():
+                legacy_shortcuts = self.get_shortcuts(legacy_parse_summary("Test", path, platform_type, parser))
+                self.assert_equal(shortcuts, legacy_shortcuts)
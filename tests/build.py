@@ -0,0 +1,195 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+from .utils import ShortcutDataTestCase
+
+# import our data common utility
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+import shmaplib
+from shmaplib import build
+from shmaplib.constants import DIR_SOURCES
+
+
+# Writes the contents of its inputs to the output, like a raw_to_intermediate script: SCRIPT -o OUTPUT INPUTS...
+COPY_SCRIPT = """import sys
+with open(sys.argv[2], 'w') as out:
+    for path in sys.argv[3:]:
+        with open(path) as f:
+            out.write(f.read())
+"""
+
+
+class TestBuild(ShortcutDataTestCase):
+
+    def setup(self):
+        super(TestBuild, self).setup()
+        self.sources_dir = tempfile.mkdtemp()
+        self.source_dir = os.path.join(self.sources_dir, 'my-app')
+        os.makedirs(os.path.join(self.source_dir, 'raw'))
+        os.makedirs(os.path.join(self.source_dir, 'intermediate'))
+
+        self.write('raw_to_intermediate.py', COPY_SCRIPT)
+        self.write('raw/a.txt', 'a')
+        self.write('raw/b.txt', 'b')
+        self.write('build.json', json.dumps({"raw_to_intermediate": [{
+            "script": "raw_to_intermediate.py",
+            "inputs": ["raw/a.txt", "raw/b.txt"],
+            "output": "intermediate/my-app.json"
+        }]}))
+        self.state = build.BuildState(os.path.join(self.sources_dir, 'build_state.json'))
+
+    def teardown(self):
+        shutil.rmtree(self.sources_dir)
+        super(TestBuild, self).teardown()
+
+    def write(self, path, contents):
+        with open(os.path.join(self.source_dir, path), 'w') as f:
+            f.write(contents)
+
+    def get_status(self, step):
+        return self.state.get_raw_step_status(step, step.get_input_hashes())
+
+    def run_step(self, step):
+        returncode, _ = step.run()
+        self.assert_equal(returncode, 0)
+        self.state.update(step, step.get_input_hashes())
+
+    def test_discover(self):
+        steps = build.discover_raw_steps(self.sources_dir)
+        self.assert_equal(len(steps), 1)
+        self.assert_equal(steps[0].inputs, [os.path.join(self.source_dir, 'raw', 'a.txt'),
+                                            os.path.join(self.source_dir, 'raw', 'b.txt')])
+        self.assert_equal(build.discover_intermediate_files(self.sources_dir), [steps[0].output])
+
+        # The steps of the repository sources must all be runnable
+        for step in build.discover_raw_steps(DIR_SOURCES):
+            for path in [step.script] + step.inputs:
+                self.assert_true(os.path.exists(path), path)
+
+    def test_raw_step_status(self):
+        step = build.discover_raw_steps(self.sources_dir)[0]
+
+        # Missing intermediate files are written
+        self.assert_equal(self.get_status(step), build.RAW_STEP_STALE)
+        self.run_step(step)
+        with open(step.output) as f:
+            self.assert_equal(f.read(), 'ab')
+        self.assert_equal(self.get_status(step), build.RAW_STEP_UP_TO_DATE)
+
+        # Changed inputs make the step stale, as long as the intermediate file is untouched
+        self.write('raw/b.txt', 'c')
+        self.assert_equal(self.get_status(step), build.RAW_STEP_STALE)
+        self.run_step(step)
+
+        self.write('intermediate/my-app.json', 'hand edited')
+        self.assert_equal(self.get_status(step), build.RAW_STEP_UP_TO_DATE)
+        self.write('raw/b.txt', 'd')
+        self.assert_equal(self.get_status(step), build.RAW_STEP_EDITED)
+
+        # Existing intermediate files that aren't tracked yet are tracked as they are, they were converted before
+        self.state.entries = {}
+        self.assert_equal(self.get_status(step), build.RAW_STEP_UNTRACKED)
+        self.assert_false(step.key in self.state.entries)
+        self.state.track(step, step.get_input_hashes())
+        self.assert_false(self.state.entries[step.key]["generated"])
+        self.write('raw/b.txt', 'e')
+        self.assert_equal(self.get_status(step), build.RAW_STEP_EDITED)
+
+    def build_content(self):
+        cache = shmaplib.ExportCache(os.path.join(self.sources_dir, 'export_cache.json'))
+        cache.load()
+        failures = build.build_content(1, cache, self.state, sources_dir=self.sources_dir,
+                                       generated_dir=self.output_dir)
+        self.assert_equal(failures, [])
+        cache.save()
+        return cache
+
+    def test_plan_raw_steps(self):
+        # Dry runs only list the steps
+        self.write('intermediate/my-app.json', 'converted before')
+        tasks, failures = build.plan_raw_steps(self.state, dry_run=True, sources_dir=self.sources_dir)
+        self.assert_equal((tasks, failures), ([], []))
+        self.assert_equal(self.state.entries, {})
+
+        tasks, failures = build.plan_raw_steps(self.state, sources_dir=self.sources_dir)
+        self.assert_equal((tasks, failures), ([], []))
+        self.assert_false(self.state.entries[build.discover_raw_steps(self.sources_dir)[0].key]["generated"])
+
+        self.write('raw/b.txt', 'c')
+        tasks, _ = build.plan_raw_steps(self.state, sources_dir=self.sources_dir)
+        self.assert_equal(tasks, [])
+        tasks, _ = build.plan_raw_steps(self.state, overwrite_intermediate=True, sources_dir=self.sources_dir)
+        self.assert_equal(len(tasks), 1)
+
+        os.remove(os.path.join(self.source_dir, 'raw', 'a.txt'))
+        tasks, failures = build.plan_raw_steps(self.state, sources_dir=self.sources_dir)
+        self.assert_equal((tasks, len(failures)), ([], 1))
+
+    def test_build_content(self):
+        # The raw file is already in the intermediate format, without the version and default context of the app
+        idata = shmaplib.IntermediateShortcutData("My App")
+        idata.add_shortcut("Global", "Copy", "Ctrl + C", "Cmd + C")
+        idata.add_shortcut("Tools", "Brush", "B", "B")
+        idata.serialize(os.path.join(self.source_dir, 'raw', 'a.txt'))
+        self.write('build.json', json.dumps({"raw_to_intermediate": [{
+            "script": "raw_to_intermediate.py",
+            "inputs": ["raw/a.txt"],
+            "output": "intermediate/my-app.json",
+            "version": "v1",
+            "default_context": "Global"
+        }]}))
+
+        self.build_content()
+        converted = shmaplib.IntermediateShortcutData()
+        converted.load(os.path.join(self.source_dir, 'intermediate', 'my-app.json'))
+        self.assert_equal((converted.version, converted.default_context), ("v1", "Global"))
+        generated = sorted(os.listdir(self.output_dir))
+        self.assert_true(generated, "Nothing was exported")
+        for os_name in ("windows", "mac"):
+            self.assert_true(any(os_name in name for name in generated), generated)
+
+        # Nothing is converted or exported again
+        cache = self.build_content()
+        self.assert_equal((cache.hits, cache.misses), (1, 0))
+        self.assert_equal(sorted(os.listdir(self.output_dir)), generated)
+
+    def test_build_content_source(self):
+        # Convert a source of the repository again, its script doesn't know the version and default context of the app. Without them in
+        # build.json, they are kept from the previous intermediate file
+        source_dir = os.path.join(DIR_SOURCES, 'adobe-lightroom')
+        shutil.rmtree(self.source_dir)
+        shutil.copytree(source_dir, self.source_dir, ignore=shutil.ignore_patterns('__pycache__', '*.log'))
+        with open(os.path.join(self.source_dir, 'build.json')) as f:
+            manifest = json.load(f)
+        for step_manifest in manifest["raw_to_intermediate"]:
+            for name in build.METADATA_FIELDS:
+                del step_manifest[name]
+        self.write('build.json', json.dumps(manifest))
+        step = build.discover_raw_steps(self.sources_dir)[0]
+        with open(step.output) as f:
+            expected = json.load(f)
+        # The step wrote the intermediate file, but its raw file changed since
+        self.state.update(step, dict((path, 'changed') for path in step.get_input_hashes()))
+
+        self.build_content()
+        with open(step.output) as f:
+            converted = json.load(f)
+        self.assert_equal((converted["version"], converted["default_context"]),
+                          (expected["version"], expected["default_context"]))
+        self.assert_true(self.state.entries[step.key]["generated"])
+
+        generated = os.listdir(self.output_dir)
+        for os_name in ("windows", "mac"):
+            self.assert_true("adobe-lightroom_%s_%s.json" % (expected["version"], os_name) in generated, generated)
+
+    def test_hash_directory(self):
+        raw_dir = os.path.join(self.source_dir, 'raw')
+        dir_hash = build.hash_path(raw_dir)
+        self.write('raw/b.txt', 'c')
+        self.assert_true(build.hash_path(raw_dir) != dir_hash)
+        self.write('raw/b.txt', 'b')
+        self.assert_equal(build.hash_path(raw_dir), dir_hash)
+        os.rename(os.path.join(raw_dir, 'b.txt'), os.path.join(raw_dir, 'c.txt'))
+        self.assert_true(build.hash_path(raw_dir) != dir_hash)
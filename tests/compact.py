@@ -0,0 +1,46 @@
+import sys
+import os
+import json
+from .utils import ShortcutDataTestCase
+
+# import our data common utility
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+import shmaplib
+from shmaplib.compact import build_compact, compact_to_dict
+from shmaplib.synthetic import generate_application_config
+
+
+class TestCompactFormat(ShortcutDataTestCase):
+
+    def assert_roundtrip(self, app):
+        """The compact format must rebuild the generated json exactly, including the order of keys"""
+        app.serialize(self.output_dir, regenerate_apps_js=False)
+        with open(app.get_output_path(self.output_dir), encoding='utf-8') as f:
+            expected = json.load(f)
+
+        app.serialize_compact(self.output_dir)
+        actual = shmaplib.read_compact(app.get_compact_output_path(self.output_dir))
+        self.assert_equal(json.dumps(actual), json.dumps(expected))
+
+    def test_synthetic_roundtrip(self):
+        for os_name in (shmaplib.constants.OS_WINDOWS, shmaplib.constants.OS_MAC):
+            app = generate_application_config(5000, num_contexts=7, anymod_ratio=0.05, os_name=os_name)
+            self.assert_roundtrip(app)
+
+    def test_names_roundtrip(self):
+        app = shmaplib.ApplicationConfig("Test App", "v1", shmaplib.constants.OS_WINDOWS, "Global")
+        context = app.get_or_create_new_context("Global")
+        context.add_shortcut(shmaplib.Shortcut(u"Zoom to 100% über", "A", ["CONTROL", "SHIFT"]))
+        context.add_shortcut(shmaplib.Shortcut(u"Don't save", "A", ["ALT"]))
+        context.add_shortcut(shmaplib.Shortcut(u"Same name", "B"))
+        context.add_shortcut(shmaplib.Shortcut(u"Same name", "C", ["CONTROL"]))
+        app.get_or_create_new_context("Empty")
+        self.assert_roundtrip(app)
+
+        # Names are stored once
+        data = build_compact(app)
+        self.assert_equal(len(data["names"]), 3)
+        self.assert_equal(data["mods_used"], ["ALT", "CONTROL", "SHIFT"])
+
+    def test_unknown_format(self):
+        self.assert_raises(ValueError, compact_to_dict, {"name": "Not compact"})
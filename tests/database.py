@@ -0,0 +1,71 @@
+import sys
+import os
+from .utils import ShortcutDataTestCase
+
+# import our data common utility
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+import shmaplib
+from shmaplib.constants import OS_WINDOWS, OS_MAC
+from shmaplib.database import parse_combo
+
+
+class TestShortcutDatabase(ShortcutDataTestCase):
+
+    def setup(self):
+        super(TestShortcutDatabase, self).setup()
+        self.add_app("Paint", "v1", OS_WINDOWS, [
+            ("Global", "Undo", "Z", ["CONTROL"]),
+            ("Global", "Redo", "Z", ["SHIFT", "CONTROL"]),
+            ("Brush", "Bigger Brush", "RIGHT_BRACKET", []),
+        ])
+        self.add_app("Paint", "v1", OS_MAC, [
+            ("Global", "Undo", "Z", ["COMMAND"]),
+            ("Global", "Redo", "Z", ["SHIFT", "COMMAND"]),
+        ])
+        self.add_app("Editor", "v2", OS_WINDOWS, [
+            ("Global", "undo", "Z", ["CONTROL"]),
+            ("Text", "Redo Typing", "Z", ["CONTROL", "SHIFT"]),
+        ])
+
+    def get_db(self, max_loaded_apps=10):
+        return shmaplib.ShortcutDatabase(self.output_dir, max_loaded_apps, manifest_file=None)
+
+    def test_parse_combo(self):
+        self.assert_equal(parse_combo("SHIFT+CONTROL+Z"), (("CONTROL", "SHIFT"), "Z"))
+        self.assert_equal(parse_combo((["SHIFT", "CONTROL"], "Z")), (("CONTROL", "SHIFT"), "Z"))
+        self.assert_equal(parse_combo("PLUS"), ((), "PLUS"))
+
+    def test_apps(self):
+        db = self.get_db()
+        self.assert_equal(len(db.apps()), 3)
+        self.assert_equal(len(db.apps(app="paint")), 2)
+        self.assert_equal(len(db.apps(os_name=OS_WINDOWS)), 2)
+        self.assert_equal([a.name for a in db.apps(version="v2")], ["Editor"])
+
+    def test_find_by_combo(self):
+        db = self.get_db()
+        results = db.find_by_combo("CONTROL+SHIFT+Z")
+        self.assert_equal(sorted((r.app, r.name) for r in results), [("Editor", "Redo Typing"), ("Paint", "Redo")])
+        self.assert_equal([r.name for r in db.find_by_combo("COMMAND+Z", os_name=OS_MAC)], ["Undo"])
+        self.assert_equal(db.find_by_combo("CONTROL+SHIFT+Z", context="Brush"), [])
+
+    def test_find_by_name(self):
+        db = self.get_db()
+        self.assert_equal(len(db.find_by_name("Undo")), 3)
+        self.assert_equal(len(db.find_by_name("undo", app="Paint", os_name=OS_WINDOWS)), 1)
+        self.assert_equal([r.key for r in db.find_in_context("Brush")], ["RIGHT_BRACKET"])
+        self.assert_equal(db.get_contexts(app="Editor"), ["Global", "Text"])
+        self.assert_equal(len(db.get_shortcuts()), 7)
+        self.assert_equal([r.name for r in db.get_shortcuts(app="Paint", os_name=OS_MAC)], ["Redo", "Undo"])
+
+    def test_lru_bound(self):
+        db = self.get_db(max_loaded_apps=1)
+        self.assert_equal(len(db.find_by_name("Undo")), 3)
+        self.assert_equal(len(db._loaded), 1)
+
+    def test_refresh(self):
+        db = self.get_db()
+        self.assert_equal(len(db.find_by_name("Redo")), 2)
+        self.add_app("Viewer", "v1", OS_MAC, [("Global", "Redo", "Y", ["COMMAND"])])
+        db.refresh()
+        self.assert_equal(len(db.find_by_name("Redo")), 3)
@@ -0,0 +1,76 @@
+import sys
+import os
+import glob
+from .utils import ShortcutDataTestCase
+
+# import our data common utility
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+import shmaplib
+from shmaplib import intermediate
+from shmaplib.synthetic import generate_intermediate_data
+
+
+class TestIntermediateLoad(ShortcutDataTestCase):
+
+    def setup(self):
+        super(TestIntermediateLoad, self).setup()
+        self.orjson = intermediate.orjson
+
+    def teardown(self):
+        intermediate.orjson = self.orjson
+        super(TestIntermediateLoad, self).teardown()
+
+    def get_shortcuts(self, idata):
+        return [(c.name, [(s.name, s.win_keys, s.mac_keys) for s in c.shortcuts]) for c in idata.contexts]
+
+    def load_round_trip(self):
+        idata = generate_intermediate_data(500, num_contexts=5, range_ratio=0.2, multi_option_ratio=0.2)
+        idata.add_shortcut("Context 0", u'Quote "name" \\ über', "Ctrl + '", "Cmd + '")
+        path = os.path.join(self.output_dir, 'synthetic.json')
+        idata.serialize(path)
+
+        loaded = shmaplib.IntermediateShortcutData()
+        loaded.load(path)
+        self.assert_equal((loaded.name, loaded.version, loaded.default_context, loaded.os),
+                          (idata.name, idata.version, idata.default_context, idata.os))
+        self.assert_equal(sorted(self.get_shortcuts(loaded)), sorted(self.get_shortcuts(idata)))
+
+        # The lookups used by extend() must be filled in as well
+        context = loaded.contexts[0]
+        self.assert_true(context.get_shortcut(context.shortcuts[-1].name) is context.shortcuts[-1])
+
+    def test_load(self):
+        self.load_round_trip()
+
+    def test_load_without_orjson(self):
+        intermediate.orjson = None
+        self.assert_equal(intermediate.get_json_backend(), 'json')
+        self.load_round_trip()
+
+    def test_merge_key_alternatives(self):
+        idata = shmaplib.IntermediateShortcutData()
+        idata.add_shortcut("Global", "Select", "", "Cmd + A")
+        idata.add_shortcut("Global", "Select", "Ctrl + A", "A")
+        idata.add_shortcut("Global", "Select", "Ctrl + A / Ctrl + /", "Cmd + A")
+
+        source = shmaplib.IntermediateShortcutData()
+        source.add_shortcut("Global", "Select", "Ctrl + / / A", "Cmd + A / Cmd + B")
+        source.add_shortcut("Tools", "Brush", "B", "B")
+        idata.extend(source)
+
+        # "A" is a substring of "Cmd + A", but a different alternative
+        self.assert_equal(self.get_shortcuts(idata), [
+            ("Global", [("Select", "Ctrl + A / Ctrl + / / A", "Cmd + A / A / Cmd + B")]),
+            ("Tools", [("Brush", "B", "B")]),
+        ])
+
+        shortcut = idata.contexts[0].shortcuts[0]
+        shortcut.win_keys = "F1"
+        shortcut.add_keys("F1 / F2", "")
+        self.assert_equal(shortcut.win_keys, "F1 / F2")
+
+    def test_load_sources(self):
+        for path in glob.glob(os.path.join(shmaplib.DIR_SOURCES, '*', 'intermediate', '*.json')):
+            idata = shmaplib.IntermediateShortcutData()
+            idata.load(path)
+            self.assert_true(len(idata.contexts) > 0, "No contexts loaded from %s" % path)
@@ -0,0 +1,124 @@
+import sys
+import os
+import re
+import glob
+import json
+import codecs
+from .utils import BaseTestCase
+
+# import our data common utility
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+import shmaplib
+from shmaplib.keyparser import parse_key_combos, split_key_alternatives
+
+
+def legacy_parse_shortcut(keys):
+    """The original IntermediateDataExporter._parse_shortcut, kept as a reference.
+    Returns a list of (key, mods) tuples instead of Shortcuts."""
+
+    if len(keys) == 0:
+        return []
+
+    # Cleanup the string and replace edge cases
+    keys = re.sub("numpad \\+", "NUMPAD_PLUS", keys, flags=re.IGNORECASE)
+    keys = re.sub("numpad /", "NUMPAD_SLASH", keys, flags=re.IGNORECASE)
+    keys = keys.replace(" or +", " or TEMP_PLUS")
+    keys = keys.replace(" or /", " or TEMP_SLASH")
+    keys = keys.replace(" + +", " + TEMP_PLUS")
+    keys = keys.replace(" + /", " + TEMP_SLASH")
+    keys = keys.strip(" ")
+    if keys == '/':
+        keys = "TEMP_SLASH"
+    if keys == '+':
+        keys = "TEMP_PLUS"
+
+    # If we split by ' or ' and then ' / ' we can parse each combo separately
+    combo_parts = []
+    for parts1 in keys.split(' or '):
+        for parts2 in parts1.split('/'):
+            combo_parts.append(parts2)
+
+    # Parse each combo
+    shortcuts = []
+    for combo in combo_parts:
+        if 'click' in combo.lower() or 'drag' in combo.lower():
+            continue
+
+        parts = combo.split("+")
+
+        # Parse main key
+        key = parts[-1]  # last element
+        key = key.strip(' ')
+        if key == 'TEMP_SLASH':
+            key = '/'
+        elif key == 'TEMP_PLUS':
+            key = '+'
+
+        # Has no key
+        if len(key) == 0:
+            continue
+
+        # Parse modifiers
+        mods = tuple([m.strip(u' ') for m in parts[:-1]])  # all but last
+
+        # Handle a range of keys (Example: "Ctrl + 0-9" or "Ctrl + Numpad 0-9")
+        results = re.findall(".*?([0-9])-([0-9])", key)
+        if results:
+            start = int(results[0][0])
+            end = int(results[0][1])
+            is_numpad_key = 'numpad' in key.lower()
+
+            for i in range(start, end+1):
+                key_name = str(i)
+                if is_numpad_key:
+                    key_name = 'Numpad ' + key_name
+                shortcuts.append((key_name, mods))
+        else:
+            shortcuts.append((key, mods))
+
+    return shortcuts
+
+
+class TestKeyParser(BaseTestCase):
+
+    def setup(self):
+        self.intermediate_files = glob.glob(os.path.join(shmaplib.DIR_SOURCES, '*', 'intermediate', '*.json'))
+
+    def assert_same_as_legacy(self, keys):
+        self.assert_equal(list(parse_key_combos(keys)), legacy_parse_shortcut(keys))
+
+    def test_documented_cases(self):
+        self.assert_equal(parse_key_combos("A"), (("A", ()),))
+        self.assert_equal(parse_key_combos("Shift + A"), (("A", ("Shift",)),))
+        self.assert_equal(len(parse_key_combos("Ctrl + 0-9")), 10)
+        self.assert_equal(parse_key_combos("Ctrl + Numpad 0-1"), (("Numpad 0", ("Ctrl",)), ("Numpad 1", ("Ctrl",))))
+        self.assert_equal(parse_key_combos("Shift + ] / Shift + ["), (("]", ("Shift",)), ("[", ("Shift",))))
+        self.assert_equal(parse_key_combos("Up Arrow / Down Arrow or + / -"),
+                          (("Up Arrow", ()), ("Down Arrow", ()), ("+", ()), ("-", ())))
+        self.assert_equal(parse_key_combos("Ctrl + Numpad +"), (("NUMPAD_PLUS", ("Ctrl",)),))
+        self.assert_equal(parse_key_combos("Alt + click"), ())
+        self.assert_equal(parse_key_combos(""), ())
+
+    def test_edge_cases_match_legacy(self):
+        for keys in ["/", "+", " + ", "Shift + /", "Shift + +", "A or /", "numpad / or NUMPAD +", " + +",
+                     "Ctrl + Shift + Up Arrow / Ctrl + Shift + Down Arrow or Ctrl + + / Ctrl + -",
+                     "9-0", "Numpad 1-3 / F1", "Ctrl + Shift +", "Cmd+click / Opt+drag or Z"]:
+            self.assert_same_as_legacy(keys)
+
+    def test_split_key_alternatives(self):
+        self.assert_equal(split_key_alternatives("Shift + ] / Shift + ["), ["Shift + ]", "Shift + ["])
+        self.assert_equal(split_key_alternatives("Ctrl + / / Ctrl + A"), ["Ctrl + /", "Ctrl + A"])
+        self.assert_equal(split_key_alternatives("Numpad / / A or /"), ["Numpad /", "A or /"])
+        self.assert_equal(split_key_alternatives("Up Arrow or + / -"), ["Up Arrow or +", "-"])
+        self.assert_equal(split_key_alternatives("/ / A / "), ["/", "A"])
+        self.assert_equal(split_key_alternatives(""), [])
+
+    def test_intermediate_corpus_matches_legacy(self):
+        for p in self.intermediate_files:
+            with codecs.open(p, encoding='utf-8') as idata_file:
+                json_idata = json.load(idata_file)
+
+            for shortcuts in json_idata["contexts"].values():
+                for os_keys in shortcuts.values():
+                    for keys in os_keys:
+                        self.assert_same_as_legacy(keys)
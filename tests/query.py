@@ -0,0 +1,57 @@
+import sys
+import os
+import shutil
+import tempfile
+from .utils import ShortcutDataTestCase
+
+# import our data common utility
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+import shmaplib
+from shmaplib.constants import OS_WINDOWS, OS_MAC
+from shmaplib.query import QueryIndex, resolve_combos, query
+
+
+class TestQuery(ShortcutDataTestCase):
+
+    def setup(self):
+        super(TestQuery, self).setup()
+        self.index_file = os.path.join(tempfile.mkdtemp(), 'query_index.bin')
+        self.add_app("Paint", "v1", OS_WINDOWS, [
+            ("Global", "Redo", "Z", ["SHIFT", "CONTROL"]),
+            ("Global", "Zoom In", "PLUS", ["CONTROL"]),
+        ])
+        self.add_app("Paint", "v1", OS_MAC, [
+            ("Global", "Redo", "Z", ["SHIFT", "COMMAND"]),
+        ])
+
+    def teardown(self):
+        super(TestQuery, self).teardown()
+        shutil.rmtree(os.path.dirname(self.index_file))
+
+    def get_index(self):
+        return QueryIndex(self.output_dir, self.index_file)
+
+    def test_resolve_combos(self):
+        self.assert_equal(resolve_combos("shift+ctrl+z"), ["CONTROL+SHIFT+Z"])
+        self.assert_equal(resolve_combos("Ctrl + +"), ["CONTROL+PLUS", "CONTROL+NUMPAD_PLUS"])
+        self.assert_raises(ValueError, resolve_combos, "ctrl+nokey")
+
+    def test_query(self):
+        index = self.get_index()
+        self.assert_true(index.rebuilt)
+
+        results = query("ctrl+shift+z", index=index)
+        self.assert_equal([(r.app, r.os, r.context, r.name) for r in results], [("Paint", OS_WINDOWS, "Global", "Redo")])
+        self.assert_equal(results[0].mods, ("CONTROL", "SHIFT"))
+        self.assert_equal([r.name for r in query("ctrl++", index=index)], ["Zoom In"])
+        self.assert_equal([r.os for r in query("cmd+shift+z", os_name=OS_MAC, index=index)], [OS_MAC])
+        self.assert_equal(query("cmd+shift+z", os_name=OS_WINDOWS, index=index), [])
+
+    def test_rebuild_on_change(self):
+        self.assert_true(self.get_index().rebuilt)
+        self.assert_true(not self.get_index().rebuilt)
+
+        self.add_app("Editor", "v2", OS_WINDOWS, [("Text", "Redo Typing", "Z", ["CONTROL", "SHIFT"])])
+        index = self.get_index()
+        self.assert_true(index.rebuilt)
+        self.assert_equal(sorted(r.app for r in query("ctrl+shift+z", index=index)), ["Editor", "Paint"])
@@ -1,6 +1,17 @@
 import unittest
 
 from .keyboards import TestKeyboardLayout
+from .keyparser import TestKeyParser
+from .scaling import TestScaling
+from .compact import TestCompactFormat
+from .search import TestSearchIndex
+from .sharding import TestShardedOutput
+from .database import TestShortcutDatabase
+from .query import TestQuery
+from .sqlite import TestSQLiteExport
+from .intermediate import TestIntermediateLoad
+from .adobe import TestAdobeParsers
+from .build import TestBuild
 
 
 def main():
@@ -12,6 +23,17 @@ def main():
     try:
         suite = unittest.TestSuite()
         suite.addTest(unittest.makeSuite(TestKeyboardLayout))
+        suite.addTest(unittest.makeSuite(TestKeyParser))
+        suite.addTest(unittest.makeSuite(TestScaling))
+        suite.addTest(unittest.makeSuite(TestCompactFormat))
+        suite.addTest(unittest.makeSuite(TestSearchIndex))
+        suite.addTest(unittest.makeSuite(TestShardedOutput))
+        suite.addTest(unittest.makeSuite(TestShortcutDatabase))
+        suite.addTest(unittest.makeSuite(TestQuery))
+        suite.addTest(unittest.makeSuite(TestSQLiteExport))
+        suite.addTest(unittest.makeSuite(TestIntermediateLoad))
+        suite.addTest(unittest.makeSuite(TestAdobeParsers))
+        suite.addTest(unittest.makeSuite(TestBuild))
 
         unittest.TextTestRunner(verbosity=2).run(suite)
 
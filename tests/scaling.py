@@ -0,0 +1,141 @@
+import sys
+import os
+import math
+import time
+import logging
+import unittest
+from .utils import BaseTestCase
+
+# import our data common utility
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+import shmaplib
+from shmaplib.synthetic import generate_intermediate_data, generate_application_config
+
+
+# Sizes each stage is timed at, and the maximum exponent k of the fitted curve time = c * n^k.
+# Linear and n*log(n) stages fit well below the limit, quadratic stages fit close to 2.
+SIZES = [2000, 4000, 8000, 16000]
+MAX_EXPONENT = 1.4
+REPEAT = 3
+
+# The timings are unreliable on a busy machine, so the tests that measure them only run when asked for:
+#   SHMAP_SCALING_TESTS=1 python utils/run_all_tests.py
+SCALING_TESTS_ENV = 'SHMAP_SCALING_TESTS'
+timing_test = unittest.skipUnless(os.environ.get(SCALING_TESTS_ENV),
+                                  "set %s=1 to run the scaling tests" % SCALING_TESTS_ENV)
+
+
+def fit_exponent(sizes, times):
+    """Least squares fit of log(time) = k * log(n) + c, returns k"""
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(t) for t in times]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    return covariance / variance
+
+
+class TestScaling(BaseTestCase):
+
+    def setup(self):
+        # The synthetic data has lots of duplicate keycombos, which are logged as warnings
+        self.log = shmaplib.getlog()
+        self.log_level = self.log.level
+        self.log.setLevel(logging.CRITICAL)
+
+    def teardown(self):
+        self.log.setLevel(self.log_level)
+
+    def measure(self, make_input, stage):
+        """Times stage(make_input(n)) for all SIZES, returns the fitted exponent"""
+        times = []
+        for n in SIZES:
+            best = None
+            for i in range(REPEAT):
+                data = make_input(n)
+                start = time.perf_counter()
+                stage(data)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            times.append(best)
+        return fit_exponent(SIZES, times)
+
+    def assert_not_superlinear(self, name, exponent):
+        self.assert_true(exponent < MAX_EXPONENT, "%s scales superlinearly: time ~ n^%.2f" % (name, exponent))
+
+    def test_fit_exponent(self):
+        self.assert_true(abs(fit_exponent([1, 2, 4], [3.0, 6.0, 12.0]) - 1.0) < 1e-9)
+        self.assert_true(abs(fit_exponent([1, 2, 4], [1.0, 4.0, 16.0]) - 2.0) < 1e-9)
+
+    def test_synthetic_data(self):
+        idata = generate_intermediate_data(1000, num_contexts=7, range_ratio=0.2, multi_option_ratio=0.2)
+        self.assert_equal(len(idata.contexts), 7)
+        self.assert_equal(sum(len(c.shortcuts) for c in idata.contexts), 1000)
+
+        app = generate_application_config(1000, num_contexts=1, anymod_ratio=0.1, check_for_duplicates=False)
+        self.assert_true(sum(len(c.shortcuts) for c in app.contexts.values()) >= 1000)
+
+    @timing_test
+    def test_context_add_shortcut(self):
+        def make_input(n):
+            return n
+
+        def stage(n):
+            generate_application_config(n, num_contexts=n // 500)
+
+        self.assert_not_superlinear("ShortcutContext.add_shortcut", self.measure(make_input, stage))
+
+    @timing_test
+    def test_context_serialize(self):
+        def make_input(n):
+            app = generate_application_config(n, num_contexts=1, check_for_duplicates=False)
+            return list(app.contexts.values())[0]
+
+        def stage(context):
+            context.serialize()
+
+        self.assert_not_superlinear("ShortcutContext.serialize", self.measure(make_input, stage))
+
+    @timing_test
+    def test_application_get_mods_used(self):
+        def make_input(n):
+            return generate_application_config(n, check_for_duplicates=False)
+
+        def stage(app):
+            app.get_mods_used()
+
+        self.assert_not_superlinear("ApplicationConfig.get_mods_used", self.measure(make_input, stage))
+
+    @timing_test
+    def test_intermediate_extend(self):
+        # Both documents have the same shortcut names, so every shortcut gets merged
+        def make_input(n):
+            return (generate_intermediate_data(n, seed=1), generate_intermediate_data(n, seed=2))
+
+        def stage(sources):
+            merged = shmaplib.IntermediateShortcutData("Merged")
+            for source in sources:
+                merged.extend(source)
+
+        self.assert_not_superlinear("IntermediateShortcutData.extend", self.measure(make_input, stage))
+
+    @timing_test
+    def test_intermediate_extend_key_alternatives(self):
+        # Every source adds another alternative to the keys of the same shortcuts
+        def make_input(n):
+            sources = []
+            for i in range(n // 10):
+                source = shmaplib.IntermediateShortcutData("Source %d" % i)
+                for j in range(10):
+                    source.add_shortcut("Global", "Shortcut %d" % j, "Ctrl + F%d" % i, "Cmd + F%d" % i)
+                sources.append(source)
+            return sources
+
+        def stage(sources):
+            merged = shmaplib.IntermediateShortcutData("Merged")
+            for source in sources:
+                merged.extend(source)
+
+        self.assert_not_superlinear("IntermediateShortcutData.extend with many key alternatives",
+                                    self.measure(make_input, stage))
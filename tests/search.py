@@ -0,0 +1,79 @@
+import sys
+import os
+import json
+import hashlib
+from .utils import ShortcutDataTestCase
+
+# import our data common utility
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+import shmaplib
+from shmaplib.search import tokenize, build_search_index, search_shortcuts, MIN_PREFIX_LENGTH
+
+
+class TestSearchIndex(ShortcutDataTestCase):
+
+    def setup(self):
+        super(TestSearchIndex, self).setup()
+        self.app = self.add_app("Test App", "v1", shmaplib.constants.OS_WINDOWS, [
+            ("Global", u"Select All", "A", ["CONTROL"]),
+            ("Global", u"Select All Layers", "A", ["CONTROL", "ALT"]),
+            ("Global", u"Zoom In", "PLUS", ["CONTROL"]),
+            ("Global", u"Zoom Out", "MINUS", ["CONTROL"]),
+            (u"Édition", u"Sélection de zone", "M", []),
+            (u"Édition", u"Move (X axis)", "X", []),
+        ])
+        with open(self.app.get_output_path(self.output_dir), encoding='utf-8') as f:
+            self.data = json.load(f)
+
+    def scan(self, query):
+        """What the index replaces: a scan over all shortcuts in the generated json"""
+        words = tokenize(query)
+        results = []
+        for context_name, context in self.data["contexts"].items():
+            for key, shortcuts in context.items():
+                for i, shortcut in enumerate(shortcuts):
+                    tokens = tokenize(shortcut["name"])
+                    if words and all(any(t.startswith(w) if len(w) >= MIN_PREFIX_LENGTH else t == w for t in tokens)
+                                     for w in words):
+                        results.append((context_name, key, i))
+        return results
+
+    def test_tokenize(self):
+        self.assert_equal(tokenize(u"Sélection de Zone (X-axis)"), ["selection", "de", "zone", "x", "axis"])
+
+    def test_search_matches_scan(self):
+        self.app.serialize_search_index(self.output_dir)
+        index = shmaplib.read_search_index(self.app.get_search_index_output_path(self.output_dir))
+        for query in ["se", "sel all", "select all", "zoom", "zoom o", "selec", "x", "ax", "layers sel", "nothing", ""]:
+            self.assert_equal(search_shortcuts(index, query), self.scan(query))
+
+    def test_results_point_at_shortcuts(self):
+        index = build_search_index(self.app)
+        for context_name, key, i in search_shortcuts(index, "zoom"):
+            self.assert_true(self.data["contexts"][context_name][key][i]["name"].startswith("Zoom"))
+
+    def test_decoded_context_names(self):
+        # Names are written to the generated json as they are, escapes included. The index has them decoded, like the
+        # keys the web application reads from the json
+        app = self.add_app("Escaped App", "v1", shmaplib.constants.OS_MAC, [
+            (u"\\u00c9dition", u"Copier \\u00e9l\\u00e9ment", "C", ["COMMAND"]),
+            (u"Ébauche", u"Zoom", "Z", []),
+        ])
+        with open(app.get_output_path(self.output_dir), encoding='utf-8') as f:
+            data = json.load(f)
+
+        index = build_search_index(app)
+        self.assert_equal(sorted(index["contexts"]), sorted(data["contexts"]))
+        self.assert_equal(search_shortcuts(index, u"élément"), [(u"Édition", "C", 0)])
+        for context_name, key, i in search_shortcuts(index, u"copier") + search_shortcuts(index, u"zoom"):
+            self.assert_true(data["contexts"][context_name][key][i])
+
+    def test_source(self):
+        self.app.serialize_search_index(self.output_dir)
+        index = shmaplib.read_search_index(self.app.get_search_index_output_path(self.output_dir))
+        with open(self.app.get_output_path(self.output_dir), 'rb') as f:
+            json_data = f.read()
+        self.assert_equal(index["source"], {
+            "name": self.data["name"], "version": self.data["version"], "os": self.data["os"],
+            "size": len(json_data), "sha1": hashlib.sha1(json_data).hexdigest()
+        })
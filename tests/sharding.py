@@ -0,0 +1,56 @@
+import sys
+import os
+import json
+import hashlib
+from .utils import ShortcutDataTestCase
+
+# import our data common utility
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+import shmaplib
+from shmaplib.synthetic import generate_application_config
+
+
+class TestShardedOutput(ShortcutDataTestCase):
+
+    def test_shards_match_full_output(self):
+        app = generate_application_config(3000, num_contexts=5)
+        app.serialize(self.output_dir, regenerate_apps_js=False)
+        app.serialize_sharded(self.output_dir)
+        with open(app.get_output_path(self.output_dir), encoding='utf-8') as f:
+            full = json.load(f)
+
+        index_path, shards_dir = app.get_sharded_output_paths(self.output_dir)
+        with open(index_path, encoding='utf-8') as f:
+            index = json.load(f)
+
+        for key in ("name", "version", "os", "mods_used", "default_context"):
+            self.assert_equal(index[key], full[key])
+        self.assert_equal(index["source"], shmaplib.search.get_source(app, app.get_output_path(self.output_dir)))
+
+        # Only the default context is embedded
+        self.assert_equal(index["contexts"], {full["default_context"]: full["contexts"][full["default_context"]]})
+
+        contexts = {}
+        for shard in index["shards"]:
+            with open(os.path.join(self.output_dir, shard["file"]), 'rb') as f:
+                data = f.read()
+            self.assert_equal(len(data), shard["size"])
+            self.assert_equal(hashlib.sha1(data).hexdigest(), shard["sha1"])
+            contexts.update(json.loads(data.decode('utf-8')))
+        self.assert_equal(json.dumps(contexts), json.dumps(full["contexts"]))
+
+    def test_stale_shards_are_removed(self):
+        app = generate_application_config(100, num_contexts=5)
+        app.serialize(self.output_dir, regenerate_apps_js=False)
+        app.serialize_sharded(self.output_dir)
+
+        app = generate_application_config(100, num_contexts=2)
+        output_paths = app.serialize_sharded(self.output_dir)
+        index_path, shards_dir = app.get_sharded_output_paths(self.output_dir)
+        self.assert_equal(len(os.listdir(shards_dir)), 2)
+        self.assert_equal(len(output_paths), 3)
+
+        # The web application would load the sharded output of the previous export instead of the new .json file
+        app.serialize(self.output_dir, regenerate_apps_js=False)
+        self.assert_false(os.path.exists(index_path))
+        self.assert_false(os.path.exists(shards_dir))
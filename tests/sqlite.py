@@ -0,0 +1,85 @@
+import sys
+import os
+import sqlite3
+from .utils import ShortcutDataTestCase
+
+# import our data common utility
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+import shmaplib
+from shmaplib.constants import OS_WINDOWS, OS_MAC
+from shmaplib.sqlite import has_application
+
+
+class TestSQLiteExport(ShortcutDataTestCase):
+
+    def setup(self):
+        super(TestSQLiteExport, self).setup()
+        self.db_path = os.path.join(self.output_dir, 'shortcuts.sqlite')
+
+    def make_paint_app(self, os_name, shortcuts):
+        return self.make_app("Paint", "v1", os_name, shortcuts)
+
+    def query(self, sql, *args):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql, args).fetchall()
+        finally:
+            conn.close()
+
+    def test_write(self):
+        self.assert_true(self.make_paint_app(OS_WINDOWS, [
+            ("Global", "Redo", "Z", ["SHIFT", "CONTROL"]),
+            ("Global", "Zoom In", "+", ["CONTROL"]),
+            ("Brush", "Bigger Brush", "RIGHT_BRACKET", []),
+        ]).serialize_sqlite(self.db_path))
+        self.assert_true(self.make_paint_app(OS_MAC, [("Global", "Redo", "Z", ["SHIFT", "COMMAND"])]).serialize_sqlite(self.db_path))
+
+        rows = self.query("SELECT app, version, os, context, key, mods, name FROM shortcut_combos "
+                          "WHERE os = ? ORDER BY key, name", OS_WINDOWS)
+        self.assert_equal(rows, [
+            ("Paint", "v1", OS_WINDOWS, "Global", "NUMPAD_PLUS", "CONTROL", "Zoom In"),
+            ("Paint", "v1", OS_WINDOWS, "Global", "PLUS", "CONTROL", "Zoom In"),
+            ("Paint", "v1", OS_WINDOWS, "Brush", "RIGHT_BRACKET", "", "Bigger Brush"),
+            ("Paint", "v1", OS_WINDOWS, "Global", "Z", "CONTROL+SHIFT", "Redo"),
+        ])
+        self.assert_equal(self.query("SELECT os FROM shortcut_combos WHERE mods = 'COMMAND+SHIFT'"), [(OS_MAC,)])
+        self.assert_equal(self.query("SELECT count(*) FROM apps"), [(1,)])
+
+    def test_rewrite_replaces_app(self):
+        self.make_paint_app(OS_WINDOWS, [("Global", "Undo", "Z", ["CONTROL"]),
+                                         ("Brush", "Bigger Brush", "RIGHT_BRACKET", [])]).serialize_sqlite(self.db_path)
+        self.make_paint_app(OS_MAC, [("Global", "Undo", "Z", ["COMMAND"])]).serialize_sqlite(self.db_path)
+        self.make_paint_app(OS_WINDOWS, [("Global", "Undo", "Z", ["CONTROL"])]).serialize_sqlite(self.db_path)
+
+        self.assert_equal(self.query("SELECT os, context, name FROM shortcut_combos ORDER BY os"),
+                          [(OS_MAC, "Global", "Undo"), (OS_WINDOWS, "Global", "Undo")])
+        self.assert_equal(self.query("SELECT count(*) FROM contexts"), [(2,)])
+        self.assert_equal(self.query("SELECT count(*) FROM shortcut_mods"), [(2,)])
+
+    def test_has_application(self):
+        self.assert_false(has_application(self.db_path, "Paint", "v1", OS_WINDOWS))
+        self.assert_false(os.path.exists(self.db_path))
+
+        self.make_paint_app(OS_WINDOWS, [("Global", "Undo", "Z", ["CONTROL"])]).serialize_sqlite(self.db_path)
+        self.assert_true(has_application(self.db_path, "Paint", "v1", OS_WINDOWS))
+        self.assert_false(has_application(self.db_path, "Paint", "v1", OS_MAC))
+        self.assert_false(has_application(self.db_path, "Paint", "v2", OS_WINDOWS))
+
+    def test_export_cache(self):
+        source = os.path.join(self.output_dir, 'paint.json')
+        with open(source, 'w') as f:
+            f.write('{}')
+        options = shmaplib.ExportOptions(sqlite_db=self.db_path)
+        cache = shmaplib.ExportCache(os.path.join(self.output_dir, 'export_cache.json'))
+
+        # A cached export is only up to date while the database has the apps it wrote
+        self.make_paint_app(OS_WINDOWS, [("Global", "Undo", "Z", ["CONTROL"])]).serialize_sqlite(self.db_path)
+        cache.update(source, False, [], options, [("Paint", "v1", OS_WINDOWS)])
+        self.assert_true(cache.is_up_to_date(source, False, options))
+        os.remove(self.db_path)
+        self.assert_false(cache.is_up_to_date(source, False, options))
+
+        # Exports without a database don't check it
+        cache.update(source, False, [], shmaplib.ExportOptions())
+        self.assert_true(cache.is_up_to_date(source, False, shmaplib.ExportOptions()))
+        self.assert_false(cache.is_up_to_date(source, False, options))
@@ -1,6 +1,14 @@
 import sys
+import os
+import shutil
+import logging
+import tempfile
 import unittest
 
+# import our data common utility
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+import shmaplib
+
 
 class BaseTestCase(unittest.TestCase):
     """Baseclass for all the tests that Flask uses.  Use these methods
@@ -51,6 +59,38 @@ class BaseTestCase(unittest.TestCase):
             assert x not in y, "%r unexpectedly in %r" % (x, y)
 
 
+class ShortcutDataTestCase(BaseTestCase):
+    """Baseclass for the tests that write generated files: they are
+    written to the temporary self.output_dir, and the log only shows
+    critical messages while the test runs.
+    """
+
+    def setup(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.log = shmaplib.getlog()
+        self.log_level = self.log.level
+        self.log.setLevel(logging.CRITICAL)
+
+    def teardown(self):
+        self.log.setLevel(self.log_level)
+        shutil.rmtree(self.output_dir)
+
+    def make_app(self, name, version, os_name, shortcuts):
+        """Returns an ApplicationConfig with the shortcuts, a list of
+        (context name, shortcut name, key, mods) tuples.
+        """
+        app = shmaplib.ApplicationConfig(name, version, os_name, "Global")
+        for context_name, shortcut_name, key, mods in shortcuts:
+            app.get_or_create_new_context(context_name).add_shortcut(shmaplib.Shortcut(shortcut_name, key, mods))
+        return app
+
+    def add_app(self, name, version, os_name, shortcuts):
+        """Like make_app, and serializes the app to self.output_dir"""
+        app = self.make_app(name, version, os_name, shortcuts)
+        app.serialize(self.output_dir, regenerate_apps_js=False)
+        return app
+
+
 class _ExceptionCatcher(object):
 
     def __init__(self, test_case, exc_type):
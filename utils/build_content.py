@@ -0,0 +1,57 @@
+import sys
+import os
+import logging
+import argparse
+import multiprocessing
+
+# Import common scripts
+CWD = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, CWD)
+sys.path.insert(0, os.path.normpath(os.path.join(CWD, '..')))
+
+# Import common shortcut mapper library
+import shmaplib
+from shmaplib import build
+log = shmaplib.getlog()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Brings the whole site content up to date: runs the raw_to_intermediate scripts of the sources whose raw files changed (see shmaplib/build.py), then exports the intermediate files that changed.")
+    parser.add_argument('-v', '--verbose', action='store_true', required=False, help="Verbose output")
+    parser.add_argument('-j', '--jobs', type=int, default=0, required=False, help="Number of worker processes (default: 0 uses all cores)")
+    parser.add_argument('-e', '--explicit-numpad-keys', action='store_true', required=False, help="Numpad keys don't have the same action as main keys")
+    parser.add_argument('-f', '--force', action='store_true', required=False, help="Export all intermediate files, even if they are unchanged since the last export")
+    parser.add_argument('-n', '--dry-run', action='store_true', required=False, help="Only list the steps that would run")
+    parser.add_argument('--overwrite-intermediate', action='store_true', required=False, help="Also convert raw files that changed when that overwrites changes to the intermediate file")
+
+    args = parser.parse_args()
+
+    shmaplib.setuplog(os.path.join(CWD, 'output.log'))
+
+    # Verbosity setting on log
+    log.setLevel(logging.INFO)
+    if args.verbose:
+        log.setLevel(logging.DEBUG)
+
+    jobs = args.jobs
+    if jobs <= 0:
+        jobs = multiprocessing.cpu_count()
+
+    cache = shmaplib.ExportCache(force=args.force)
+    cache.load()
+    state = build.BuildState()
+    state.load()
+
+    try:
+        failures = build.build_content(jobs, cache, state, args.explicit_numpad_keys, args.overwrite_intermediate,
+                                       args.dry_run)
+    finally:
+        if not args.dry_run:
+            state.save()
+            cache.save()
+            log.info("Export cache: %d hits, %d misses", cache.hits, cache.misses)
+
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
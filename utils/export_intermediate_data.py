@@ -3,6 +3,7 @@ import os
 import glob
 import logging
 import argparse
+import multiprocessing
 
 # Import common scripts
 CWD = os.path.dirname(os.path.abspath(__file__))
@@ -11,17 +12,39 @@ sys.path.insert(0, os.path.normpath(os.path.join(CWD, '..')))
 
 # Import common shortcut mapper library
 import shmaplib
-from shmaplib.constants import DIR_SOURCES
-log = shmaplib.setuplog(os.path.join(CWD, 'output.log'))
-
-
-def export_intermediate_file(file_path, test_mode, explicit_numpad_mode):
-    log.info("Exporting from file: %s", file_path)
-
-    exporter = shmaplib.IntermediateDataExporter(file_path, explicit_numpad_mode)
-    exporter.parse()
-    if not test_mode:
-        exporter.export()
+from shmaplib.constants import DIR_SOURCES, DIR_CONTENT_GENERATED, SQLITE_DB_FILE
+from shmaplib.export import export_intermediate_file, init_worker, export_intermediate_file_worker, handle_export_result
+log = shmaplib.getlog()
+
+
+def export_intermediate_files_parallel(file_paths, test_mode, explicit_numpad_mode, jobs, cache=None, profile_dir=None,
+                                       trace=False, options=shmaplib.ExportOptions()):
+    """Exports all files in a pool of worker processes, apps.js is regenerated once all files are exported.
+    Returns a list of (file_path, error) for the files that failed to export"""
+
+    tasks = [(file_path, test_mode, explicit_numpad_mode, options) for file_path in file_paths]
+    failures = []
+    num_warnings = 0
+
+    use_cache = cache is not None and not test_mode
+    initargs = (log.level, cache.cache_file if use_cache else None, cache.force if cache else False, profile_dir, trace)
+    pool = multiprocessing.Pool(jobs, initializer=init_worker, initargs=initargs)
+    with shmaplib.ExportSession():
+        try:
+            # Results are handled in submission order, so the log reads the same as a serial run
+            for result in pool.imap(export_intermediate_file_worker, tasks):
+                warnings, error = handle_export_result(result, cache if use_cache else None, test_mode)
+                num_warnings += warnings
+                if error is not None:
+                    failures.append((result[0], error))
+                log.info('    \n')
+        finally:
+            pool.close()
+            pool.join()
+
+    log.info("Exported %d files with %d jobs: %d warnings, %d failures",
+             len(file_paths), jobs, num_warnings, len(failures))
+    return failures
 
 
 def main():
@@ -30,6 +53,15 @@ def main():
     parser.add_argument('-v', '--verbose', action='store_true', required=False, help="Verbose output")
     parser.add_argument('-a', '--all', action='store_true', required=False, help="Convert all raw files to our json format")
     parser.add_argument('-e', '--explicit-numpad-keys', action='store_true', required=False, help="Numpad keys don't have the same action as main keys")
+    parser.add_argument('-j', '--jobs', type=int, default=1, required=False, help="Number of worker processes used with the -a flag (0 uses all cores)")
+    parser.add_argument('-f', '--force', action='store_true', required=False, help="Export files even if they are unchanged since the last export")
+    parser.add_argument('-z', '--compressed', action='store_true', required=False, help="Also write a minified .min.json and a gzipped .json.gz next to each generated file")
+    parser.add_argument('-c', '--compact', action='store_true', required=False, help="Also write the compact string table format (.compact.json) next to each generated file")
+    parser.add_argument('-s', '--search-index', action='store_true', required=False, help="Also write a search index (.search.json) next to each generated file")
+    parser.add_argument('--sharded', action='store_true', required=False, help="Also write a .shards.json index and one shard file per context next to each generated file")
+    parser.add_argument('--sqlite', metavar='FILE', nargs='?', const=SQLITE_DB_FILE, required=False, help="Also write the generated data into a SQLite database (default: %s)" % os.path.relpath(SQLITE_DB_FILE))
+    parser.add_argument('-p', '--profile', metavar='DIR', required=False, help="Profile each stage (load, parse, serialize, apps.js) of each file and write the .pstats files to DIR")
+    parser.add_argument('--trace', metavar='FILE', required=False, help="Write a timeline of the export in the Chrome trace_event format to FILE (view it in chrome://tracing or Perfetto)")
     parser.add_argument('file', nargs='?', help="File to convert (Ignored if -a flag is set)")
 
     args = parser.parse_args()
@@ -38,6 +70,10 @@ def main():
         return
     if args.file is not None:
         args.file = os.path.abspath(args.file)
+    if args.sqlite is not None:
+        args.sqlite = os.path.abspath(args.sqlite)
+
+    shmaplib.setuplog(os.path.join(CWD, 'output.log'))
 
     # Verbosity setting on log
     log.setLevel(logging.INFO)
@@ -47,26 +83,64 @@ def main():
     # Test mode
     test_mode = args.test
 
-    # If --all flag is set, convert all application intermediate data
-    if args.all:
-        search_dir = os.path.join(DIR_SOURCES, '*', 'intermediate', '*.json')
-        for file_path in glob.glob(search_dir):
-            file_path = os.path.normpath(file_path)
-            export_intermediate_file(file_path, test_mode, args.explicit_numpad_keys)
-            log.info('    \n')
-    else:
-        export_intermediate_file(args.file, test_mode, args.explicit_numpad_keys)
-
-if __name__ == '__main__':
-    main()
-
+    if args.profile:
+        shmaplib.enable_profiling(args.profile)
+    if args.trace:
+        args.trace = os.path.abspath(args.trace)
+        shmaplib.enable_tracing('main')
 
+    # Files written besides the generated json files
+    options = shmaplib.ExportOptions(compressed_variants=args.compressed, compact=args.compact,
+                                     search_index=args.search_index, sharded=args.sharded, sqlite_db=args.sqlite)
 
+    # Skip files that are unchanged since the last export
+    cache = shmaplib.ExportCache(force=args.force)
+    cache.load()
 
+    # Files that failed to export in the worker processes, the serial export raises the error instead
+    failures = []
 
+    # If --all flag is set, convert all application intermediate data
+    if args.all:
+        search_dir = os.path.join(DIR_SOURCES, '*', 'intermediate', '*.json')
+        file_paths = [os.path.normpath(p) for p in glob.glob(search_dir)]
+
+        jobs = args.jobs
+        if jobs <= 0:
+            jobs = multiprocessing.cpu_count()
+
+        if jobs > 1:
+            failures = export_intermediate_files_parallel(file_paths, test_mode, args.explicit_numpad_keys, jobs,
+                                                          cache, args.profile, args.trace is not None, options)
+        else:
+            # apps.js is regenerated once at the end of the session
+            with shmaplib.ExportSession():
+                for file_path in file_paths:
+                    export_intermediate_file(file_path, test_mode, args.explicit_numpad_keys, cache=cache,
+                                             options=options)
+                    log.info('    \n')
+    else:
+        export_intermediate_file(args.file, test_mode, args.explicit_numpad_keys, cache=cache, options=options)
 
+    # Stages that don't belong to a single file, like the apps.js rebuild at the end of the session
+    shmaplib.write_profiles()
 
+    if args.trace:
+        shmaplib.write_trace(args.trace)
+        log.info("Trace written to %s", args.trace)
 
+    if args.compressed and not test_mode:
+        shmaplib.log_compressed_size_report(DIR_CONTENT_GENERATED)
 
+    if not test_mode:
+        cache.save()
+        log.info("Export cache: %d hits, %d misses", cache.hits, cache.misses)
 
+    if failures:
+        log.error("Failed to export %d files:\n    %s", len(failures),
+                  '\n    '.join(file_path for file_path, _ in failures))
+        return 1
+    return 0
 
+if __name__ == '__main__':
+    sys.exit(main())